@@ -1,24 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
+import asyncio
+import hashlib
+import hmac
+import re
+import secrets
 import uuid
 import structlog
 
 from .database import get_db
 from .config import settings
-from models import User, Organization, Role, Permission, UserRole, RolePermission
+from models import User, Role, Permission, UserRole, RolePermission
 from models.user import UserStatus, PermissionType, ResourceType
+from services.activity import activity_recorder
+from services.auth_cache import auth_cache
+from services.permissions import PermissionSet, parse_permission, permission_cache, token_permissions
+from services.rate_limiter import tier_limit
 
 logger = structlog.get_logger()
 
+# Stored API keys are hex HMAC-SHA256 digests (see AuthService.hash_api_key)
+API_KEY_HASH = re.compile(r"[0-9a-f]{64}")
+
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so a few threads hash in parallel without blocking the event loop
+_hash_executor: Optional[ThreadPoolExecutor] = None
+
+def hash_executor() -> ThreadPoolExecutor:
+    """The bounded pool that runs bcrypt."""
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            thread_name_prefix="password-hash"
+        )
+    return _hash_executor
+
 # Security scheme
 security = HTTPBearer()
 
@@ -26,19 +52,64 @@ class AuthService:
     """Authentication and authorization service."""
     
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        """Verify a password against its hash."""
-        return pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash, in the hashing pool."""
+        return await asyncio.get_running_loop().run_in_executor(
+            hash_executor(), pwd_context.verify, plain_password, hashed_password
+        )
+    
+    @staticmethod
+    async def get_password_hash(password: str) -> str:
+        """Hash a password, in the hashing pool."""
+        return await asyncio.get_running_loop().run_in_executor(hash_executor(), pwd_context.hash, password)
+    
+    @staticmethod
+    def hash_api_key(api_key: str) -> str:
+        """Keyed hash an API key is stored and looked up by."""
+        return hmac.new(settings.SECRET_KEY.encode(), api_key.encode(), hashlib.sha256).hexdigest()
+    
+    @staticmethod
+    def generate_api_key() -> Tuple[str, str]:
+        """Create an API key; returns the key to hand out once and the hash to store in ``User.api_key``."""
+        api_key = secrets.token_urlsafe(32)
+        return api_key, AuthService.hash_api_key(api_key)
     
     @staticmethod
-    def get_password_hash(password: str) -> str:
-        """Hash a password."""
-        return pwd_context.hash(password)
+    async def issue_api_key(db: AsyncSession, user: User, expires_in_days: Optional[int] = None) -> str:
+        """Give ``user`` a new API key, replacing any previous one; only its hash is stored."""
+        api_key, key_hash = AuthService.generate_api_key()
+        now = datetime.utcnow()
+        user.api_key = key_hash
+        user.api_key_created_at = now
+        user.api_key_expires_at = now + timedelta(days=expires_in_days) if expires_in_days else None
+        await db.commit()
+        logger.info("API key issued", user_id=str(user.id))
+        return api_key
     
     @staticmethod
-    def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-        """Create a JWT access token."""
+    async def migrate_plaintext_api_keys(db: AsyncSession) -> int:
+        """Replace API keys stored in plain text, from before keys were hashed, with their hash."""
+        result = await db.execute(select(User.id, User.api_key).where(User.api_key.isnot(None)))
+        legacy = [(user_id, key) for user_id, key in result.all() if not API_KEY_HASH.fullmatch(key)]
+        for user_id, key in legacy:
+            await db.execute(
+                update(User).where(User.id == user_id).values(api_key=AuthService.hash_api_key(key))
+            )
+        await db.commit()
+        if legacy:
+            logger.info("Hashed plaintext API keys", count=len(legacy))
+        return len(legacy)
+    
+    @staticmethod
+    def create_access_token(
+        data: dict,
+        expires_delta: Optional[timedelta] = None,
+        permissions: Optional[PermissionSet] = None
+    ) -> str:
+        """Create a JWT access token, carrying the user's grants if AUTH_PERMISSION_CLAIMS is on."""
         to_encode = data.copy()
+        if permissions is not None and settings.AUTH_PERMISSION_CLAIMS:
+            to_encode["perms"] = permissions.to_claims()
         if expires_delta:
             expire = datetime.utcnow() + expires_delta
         else:
@@ -59,9 +130,13 @@ class AuthService:
     
     @staticmethod
     def verify_token(token: str) -> Optional[Dict[str, Any]]:
-        """Verify and decode a JWT token."""
+        """Verify and decode a JWT token; verified claims are cached briefly."""
+        payload = auth_cache.get_claims(token)
+        if payload is not None:
+            return payload
         try:
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            auth_cache.set_claims(token, payload)
             return payload
         except JWTError as e:
             logger.warning(f"Token verification failed: {e}")
@@ -77,7 +152,7 @@ class AuthService:
             if not user:
                 return None
             
-            if not AuthService.verify_password(password, user.hashed_password):
+            if not await AuthService.verify_password(password, user.hashed_password):
                 return None
             
             if user.status != UserStatus.ACTIVE:
@@ -98,8 +173,7 @@ class AuthService:
     async def authenticate_api_key(db: AsyncSession, api_key: str) -> Optional[User]:
         """Authenticate a user with API key."""
         try:
-            result = await db.execute(select(User).where(User.api_key == api_key))
-            user = result.scalar_one_or_none()
+            user = await auth_cache.get_api_key_user(db, AuthService.hash_api_key(api_key))
             
             if not user:
                 return None
@@ -109,12 +183,11 @@ class AuthService:
             
             # Check if API key is expired
             if user.api_key_expires_at and user.api_key_expires_at < datetime.utcnow():
-                logger.warning(f"Expired API key used: {api_key}")
+                logger.warning("Expired API key used", user_id=str(user.id))
                 return None
             
-            # Update last activity
-            user.last_activity_at = datetime.utcnow()
-            await db.commit()
+            # Update last activity; written in batches
+            activity_recorder.record(user.id)
             
             return user
         except Exception as e:
@@ -123,7 +196,7 @@ class AuthService:
     
     @staticmethod
     async def get_user_permissions(db: AsyncSession, user_id: str) -> List[Dict[str, Any]]:
-        """Get user permissions through roles."""
+        """Get user permissions through roles, for display; checks use the compiled ``PermissionSet``."""
         try:
             # Get user roles
             result = await db.execute(
@@ -158,19 +231,10 @@ class AuthService:
     ) -> bool:
         """Check if user has specific permission."""
         try:
-            permissions = await AuthService.get_user_permissions(db, user_id)
-            
-            for perm in permissions:
-                if (perm["resource_type"] == resource_type and 
-                    perm["permission_type"] == permission_type):
-                    return True
-                
-                # Check for admin permission
-                if (perm["resource_type"] == resource_type and 
-                    perm["permission_type"] == PermissionType.ADMIN):
-                    return True
-            
-            return False
+            user = await auth_cache.get_user(db, user_id)
+            if user is None:
+                return False
+            return await has_permission(user, resource_type, permission_type, db)
         except Exception as e:
             logger.error(f"Permission check error: {e}")
             return False
@@ -201,12 +265,15 @@ async def get_current_user(
         if token_type == "refresh":
             raise credentials_exception
         
+        # Grants embedded in the token skip the permission lookup for this request
+        claims = payload.get("perms")
+        token_permissions.set((user_id, PermissionSet.from_claims(claims)) if claims is not None else None)
+        
     except JWTError:
         raise credentials_exception
     
-    # Get user from database
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    # Get user from the auth cache or the database
+    user = await auth_cache.get_user(db, user_id)
     
     if user is None:
         raise credentials_exception
@@ -255,8 +322,7 @@ async def get_current_user_optional(
             if payload and payload.get("type") != "refresh":
                 user_id = payload.get("sub")
                 if user_id:
-                    result = await db.execute(select(User).where(User.id == user_id))
-                    user = result.scalar_one_or_none()
+                    user = await auth_cache.get_user(db, user_id)
                     if user and user.status == UserStatus.ACTIVE:
                         return user
         except Exception:
@@ -274,30 +340,41 @@ async def get_current_user_optional(
     
     return None
 
-# Permission decorators
-def require_permission(resource_type: ResourceType, permission_type: PermissionType):
-    """Decorator to require specific permission."""
-    async def permission_checker(
-        current_user: User = Depends(get_current_user),
-        db: AsyncSession = Depends(get_db)
-    ) -> User:
-        has_permission = await AuthService.check_permission(
-            db, str(current_user.id), resource_type, permission_type
+# Permission checks
+async def has_permission(
+    user: User,
+    resource_type: ResourceType,
+    permission_type: PermissionType,
+    db: Optional[AsyncSession] = None
+) -> bool:
+    """Check a permission against the user's compiled permission set."""
+    claimed = token_permissions.get()
+    if claimed is not None and claimed[0] == str(user.id):
+        permissions = claimed[1]
+    else:
+        permissions = await permission_cache.get(user.id, user.organization_id, db)
+    return permissions.allows(resource_type, permission_type)
+
+async def require_permission(user: User, permission: str, db: Optional[AsyncSession] = None) -> User:
+    """Require a ``"resource:action"`` permission, e.g. ``"monitoring:write"``."""
+    resource_type, permission_type = parse_permission(permission)
+    if not await has_permission(user, resource_type, permission_type, db):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Insufficient permissions: {permission}"
         )
-        
-        if not has_permission:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Insufficient permissions: {permission_type} on {resource_type}"
-            )
-        
-        return current_user
     
-    return permission_checker
+    return user
 
 def require_admin():
-    """Decorator to require admin permission."""
-    return require_permission(ResourceType.ORGANIZATION, PermissionType.ADMIN)
+    """Dependency to require admin permission on the organization."""
+    async def admin_checker(
+        current_user: User = Depends(get_current_user),
+        db: AsyncSession = Depends(get_db)
+    ) -> User:
+        return await require_permission(current_user, "organization:admin", db)
+    
+    return admin_checker
 
 # Organization context
 async def get_organization_context(
@@ -306,10 +383,7 @@ async def get_organization_context(
 ) -> Dict[str, Any]:
     """Get organization context for the current user."""
     try:
-        result = await db.execute(
-            select(Organization).where(Organization.id == current_user.organization_id)
-        )
-        organization = result.scalar_one_or_none()
+        organization = await auth_cache.get_organization(db, current_user.organization_id)
         
         if not organization:
             raise HTTPException(
@@ -336,13 +410,5 @@ async def get_rate_limit_context(
     """Get rate limiting context based on organization plan."""
     organization = context["organization"]
     
-    # Set rate limit based on plan
-    if organization.plan_type == "enterprise":
-        rate_limit = settings.RATE_LIMIT_ENTERPRISE_TIER
-    elif organization.plan_type == "pro":
-        rate_limit = settings.RATE_LIMIT_PRO_TIER
-    else:
-        rate_limit = settings.RATE_LIMIT_FREE_TIER
-    
-    context["rate_limit"] = rate_limit
+    context["rate_limit"] = tier_limit(organization.plan_type)
     return context 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 import os
@@ -18,6 +18,11 @@ class Settings(BaseSettings):
     ALGORITHM: str = Field(default="HS256", env="ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=30, env="ACCESS_TOKEN_EXPIRE_MINUTES")
     REFRESH_TOKEN_EXPIRE_DAYS: int = Field(default=7, env="REFRESH_TOKEN_EXPIRE_DAYS")
+    AUTH_CACHE_TTL_SECONDS: int = Field(default=30, env="AUTH_CACHE_TTL_SECONDS")  # token claims, users and organizations
+    AUTH_CACHE_SIZE: int = Field(default=10000, env="AUTH_CACHE_SIZE")  # entries per map
+    AUTH_PERMISSION_CLAIMS: bool = Field(default=False, env="AUTH_PERMISSION_CLAIMS")  # embed grants in access tokens
+    PASSWORD_HASH_WORKERS: int = Field(default=4, env="PASSWORD_HASH_WORKERS")  # bcrypt threads
+    ACTIVITY_FLUSH_SECONDS: float = Field(default=10.0, env="ACTIVITY_FLUSH_SECONDS")  # batched last_activity_at writes
     
     # CORS
     ALLOWED_ORIGINS: List[str] = Field(
@@ -34,6 +39,21 @@ class Settings(BaseSettings):
     DATABASE_POOL_SIZE: int = Field(default=20, env="DATABASE_POOL_SIZE")
     DATABASE_MAX_OVERFLOW: int = Field(default=30, env="DATABASE_MAX_OVERFLOW")
     DATABASE_POOL_TIMEOUT: int = Field(default=30, env="DATABASE_POOL_TIMEOUT")
+    DATABASE_REPLICA_URLS: List[str] = Field(default=[], env="DATABASE_REPLICA_URLS")
+    DATABASE_REPLICA_MAX_LAG_SECONDS: float = Field(default=5.0, env="DATABASE_REPLICA_MAX_LAG_SECONDS")  # lagging replicas get no reads
+    DATABASE_REPLICA_LAG_CHECK_SECONDS: float = Field(default=5.0, env="DATABASE_REPLICA_LAG_CHECK_SECONDS")
+    DATABASE_READ_YOUR_WRITES_SECONDS: float = Field(default=10.0, env="DATABASE_READ_YOUR_WRITES_SECONDS")  # reads on the primary after a write
+    SQL_SERVER_TIMING: bool = Field(default=True, env="SQL_SERVER_TIMING")  # per-request db time in a Server-Timing header
+    SQL_QUERY_BUDGET_DEFAULT: int = Field(default=50, env="SQL_QUERY_BUDGET_DEFAULT")  # statements per request, checked in dev and tests
+    SQL_QUERY_BUDGETS: Dict[str, int] = Field(default={}, env="SQL_QUERY_BUDGETS")  # route template -> budget
+    SQL_N_PLUS_ONE_THRESHOLD: int = Field(default=10, env="SQL_N_PLUS_ONE_THRESHOLD")  # repeats of one statement
+    SLOW_QUERY_SECONDS: float = Field(default=0.2, env="SLOW_QUERY_SECONDS")
+    SLOW_QUERY_MAX_FINGERPRINTS: int = Field(default=500, env="SLOW_QUERY_MAX_FINGERPRINTS")
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = Field(default=0.1, env="SLOW_QUERY_EXPLAIN_SAMPLE_RATE")
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: int = Field(default=600, env="SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS")  # per fingerprint
+    SLOW_QUERY_EXPLAIN_TIMEOUT_SECONDS: float = Field(default=10.0, env="SLOW_QUERY_EXPLAIN_TIMEOUT_SECONDS")
+    SLOW_QUERY_EXPLAIN_CONCURRENCY: int = Field(default=2, env="SLOW_QUERY_EXPLAIN_CONCURRENCY")
+    OPERATOR_ORGANIZATION_IDS: List[str] = Field(default=[], env="OPERATOR_ORGANIZATION_IDS")  # admins here see cross-tenant diagnostics
     
     # Redis
     REDIS_URL: str = Field(default="redis://localhost:6379", env="REDIS_URL")
@@ -61,6 +81,11 @@ class Settings(BaseSettings):
     MINIO_BUCKET: str = Field(default="feature-store", env="MINIO_BUCKET")
     MINIO_SECURE: bool = Field(default=False, env="MINIO_SECURE")
     
+    # Object storage for large computation outputs
+    OBJECT_STORE_BACKEND: str = Field(default="local", env="OBJECT_STORE_BACKEND")  # local, minio
+    OBJECT_STORE_LOCAL_PATH: str = Field(default="/var/lib/feature-store/objects", env="OBJECT_STORE_LOCAL_PATH")
+    RESULT_INLINE_MAX_BYTES: int = Field(default=65536, env="RESULT_INLINE_MAX_BYTES")  # larger results are offloaded
+    
     # ClickHouse
     CLICKHOUSE_HOST: str = Field(default="localhost", env="CLICKHOUSE_HOST")
     CLICKHOUSE_PORT: int = Field(default=8123, env="CLICKHOUSE_PORT")
@@ -71,6 +96,7 @@ class Settings(BaseSettings):
     # Monitoring
     PROMETHEUS_ENABLED: bool = Field(default=True, env="PROMETHEUS_ENABLED")
     PROMETHEUS_PORT: int = Field(default=9090, env="PROMETHEUS_PORT")
+    METRICS_MAX_ORGANIZATIONS: int = Field(default=50, env="METRICS_MAX_ORGANIZATIONS")  # others share "other"
     
     # Rate Limiting
     RATE_LIMIT_ENABLED: bool = Field(default=True, env="RATE_LIMIT_ENABLED")
@@ -78,6 +104,8 @@ class Settings(BaseSettings):
     RATE_LIMIT_FREE_TIER: int = Field(default=1000, env="RATE_LIMIT_FREE_TIER")
     RATE_LIMIT_PRO_TIER: int = Field(default=10000, env="RATE_LIMIT_PRO_TIER")
     RATE_LIMIT_ENTERPRISE_TIER: int = Field(default=100000, env="RATE_LIMIT_ENTERPRISE_TIER")
+    RATE_LIMIT_SYNC_SECONDS: float = Field(default=1.0, env="RATE_LIMIT_SYNC_SECONDS")  # local buckets -> Redis
+    RATE_LIMIT_PLAN_CACHE_SECONDS: int = Field(default=300, env="RATE_LIMIT_PLAN_CACHE_SECONDS")
     
     # Feature Store Specific
     FEATURE_CACHE_TTL: int = Field(default=3600, env="FEATURE_CACHE_TTL")  # seconds
@@ -87,7 +115,56 @@ class Settings(BaseSettings):
     # Computation
     SPARK_MASTER_URL: str = Field(default="local[*]", env="SPARK_MASTER_URL")
     FLINK_JOBMANAGER_URL: str = Field(default="localhost:8081", env="FLINK_JOBMANAGER_URL")
-    
+
+    # Computation workers / task queue
+    COMPUTATION_WORKERS: int = Field(default=4, env="COMPUTATION_WORKERS")  # concurrent tasks per worker process
+    WORKER_POLL_INTERVAL_SECONDS: float = Field(default=1.0, env="WORKER_POLL_INTERVAL_SECONDS")
+    TASK_LEASE_SECONDS: int = Field(default=60, env="TASK_LEASE_SECONDS")
+    TASK_HEARTBEAT_SECONDS: int = Field(default=15, env="TASK_HEARTBEAT_SECONDS")
+    TASK_MAX_ATTEMPTS: int = Field(default=3, env="TASK_MAX_ATTEMPTS")
+    TASK_RETRY_BACKOFF_SECONDS: int = Field(default=30, env="TASK_RETRY_BACKOFF_SECONDS")
+    COMPUTATION_PROCESSES: Optional[int] = Field(default=None, env="COMPUTATION_PROCESSES")  # defaults to CPU count
+    TASK_PRIORITY_AGING_SECONDS: int = Field(default=300, env="TASK_PRIORITY_AGING_SECONDS")  # wait per +1 effective priority
+    TASK_ORG_MAX_CONCURRENT: int = Field(default=10, env="TASK_ORG_MAX_CONCURRENT")  # running tasks per organization
+    PIPELINE_MAX_CONCURRENCY: int = Field(default=50, env="PIPELINE_MAX_CONCURRENCY")  # parallel steps per pipeline run
+    WORKER_METRICS_PORT: Optional[int] = Field(default=None, env="WORKER_METRICS_PORT")
+    BACKFILL_SHARD_HOURS: int = Field(default=24, env="BACKFILL_SHARD_HOURS")
+    BACKFILL_MAX_PARALLEL_SHARDS: int = Field(default=4, env="BACKFILL_MAX_PARALLEL_SHARDS")
+    SQL_ENGINE_BATCH_ROWS: int = Field(default=65536, env="SQL_ENGINE_BATCH_ROWS")
+    SQL_ENGINE_PLAN_CACHE_SIZE: int = Field(default=128, env="SQL_ENGINE_PLAN_CACHE_SIZE")  # feature versions
+    UDF_WORKERS: Optional[int] = Field(default=None, env="UDF_WORKERS")  # defaults to COMPUTATION_PROCESSES
+    UDF_MEMORY_LIMIT_MB: int = Field(default=4096, env="UDF_MEMORY_LIMIT_MB")  # RSS per UDF batch, 0 disables
+    UDF_BATCH_ROWS: int = Field(default=100000, env="UDF_BATCH_ROWS")
+    UDF_CODE_CACHE_SIZE: int = Field(default=64, env="UDF_CODE_CACHE_SIZE")  # compiled versions per worker
+    RESOURCE_SAMPLE_SECONDS: int = Field(default=5, env="RESOURCE_SAMPLE_SECONDS")  # job resource time series
+    STREAM_BATCH_SIZE: int = Field(default=500, env="STREAM_BATCH_SIZE")  # events per poll
+    STREAM_SNAPSHOT_SECONDS: int = Field(default=60, env="STREAM_SNAPSHOT_SECONDS")
+    STREAM_MAX_OUT_OF_ORDERNESS_SECONDS: int = Field(default=30, env="STREAM_MAX_OUT_OF_ORDERNESS_SECONDS")
+    STREAM_ALLOWED_LATENESS_SECONDS: int = Field(default=300, env="STREAM_ALLOWED_LATENESS_SECONDS")
+    STREAM_IDLE_TIMEOUT_SECONDS: int = Field(default=60, env="STREAM_IDLE_TIMEOUT_SECONDS")  # then the watermark follows the clock
+    ONLINE_STORE_TTL_SECONDS: Optional[int] = Field(default=None, env="ONLINE_STORE_TTL_SECONDS")
+
+    # Computation scheduler
+    SCHEDULER_ENABLED: bool = Field(default=True, env="SCHEDULER_ENABLED")
+    SCHEDULER_POLL_SECONDS: int = Field(default=30, env="SCHEDULER_POLL_SECONDS")
+    SCHEDULER_LEASE_SECONDS: int = Field(default=90, env="SCHEDULER_LEASE_SECONDS")  # leader lease TTL
+    SCHEDULER_BATCH_SIZE: int = Field(default=500, env="SCHEDULER_BATCH_SIZE")
+    SCHEDULER_CATCHUP_POLICY: str = Field(default="latest", env="SCHEDULER_CATCHUP_POLICY")  # skip, latest, all
+    SCHEDULER_MAX_CATCHUP_RUNS: int = Field(default=24, env="SCHEDULER_MAX_CATCHUP_RUNS")
+    SCHEDULER_MISFIRE_GRACE_SECONDS: int = Field(default=300, env="SCHEDULER_MISFIRE_GRACE_SECONDS")
+
+    # Live status events
+    STATUS_EVENTS_CHANNEL: str = Field(default="computation-status", env="STATUS_EVENTS_CHANNEL")
+    STATUS_STREAM_HEARTBEAT_SECONDS: int = Field(default=15, env="STATUS_STREAM_HEARTBEAT_SECONDS")
+    STATUS_STREAM_QUEUE_SIZE: int = Field(default=100, env="STATUS_STREAM_QUEUE_SIZE")  # events per subscriber
+
+    # Lineage graph
+    LINEAGE_INDEX_TTL_SECONDS: int = Field(default=300, env="LINEAGE_INDEX_TTL_SECONDS")  # rebuild to pick up other processes' writes
+    LINEAGE_CLOSURE_CACHE_SIZE: int = Field(default=10000, env="LINEAGE_CLOSURE_CACHE_SIZE")  # cached closures per organization
+    LINEAGE_TRAVERSAL: str = Field(default="memory", env="LINEAGE_TRAVERSAL")  # memory, sql
+    LINEAGE_MAX_DEPTH: int = Field(default=10, env="LINEAGE_MAX_DEPTH")  # hop limit for sql traversal
+    LINEAGE_TRAVERSAL_MAX_ROWS: int = Field(default=50000, env="LINEAGE_TRAVERSAL_MAX_ROWS")
+
     # Email (for notifications)
     SMTP_HOST: Optional[str] = Field(default=None, env="SMTP_HOST")
     SMTP_PORT: int = Field(default=587, env="SMTP_PORT")
@@ -101,6 +178,10 @@ class Settings(BaseSettings):
     # Logging
     LOG_LEVEL: str = Field(default="INFO", env="LOG_LEVEL")
     LOG_FORMAT: str = Field(default="json", env="LOG_FORMAT")
+    LOG_QUEUE_SIZE: int = Field(default=10000, env="LOG_QUEUE_SIZE")  # lines; more are dropped
+    LOG_SAMPLE_RATE_DEFAULT: float = Field(default=0.1, env="LOG_SAMPLE_RATE_DEFAULT")  # share of requests logged
+    LOG_SAMPLE_RATES: Dict[str, float] = Field(default={"/health": 0.0, "/metrics": 0.0}, env="LOG_SAMPLE_RATES")  # path prefix -> rate
+    LOG_SLOW_REQUEST_SECONDS: float = Field(default=1.0, env="LOG_SLOW_REQUEST_SECONDS")  # always logged
     
     # Testing
     TESTING: bool = Field(default=False, env="TESTING")
@@ -1,11 +1,23 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
+from fastapi import Request
+from collections import OrderedDict
+from datetime import datetime
 import asyncio
-from typing import AsyncGenerator
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional, Set
 import structlog
 
 from .config import settings
+from .profiling import current_profile, install as install_profiling
 from models import Base
 
 logger = structlog.get_logger()
@@ -37,9 +49,352 @@ SessionLocal = sessionmaker(
     autoflush=False,
 )
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+# Read replicas; with none configured, read-only sessions use the primary
+replica_engines: List[AsyncEngine] = [
+    create_async_engine(
+        url,
+        echo=settings.DEBUG,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+    )
+    for url in settings.DATABASE_REPLICA_URLS
+]
+
+# Per-request query counts and timings
+for profiled_engine in [engine, *replica_engines]:
+    install_profiling(profiled_engine.sync_engine)
+
+# Seconds a replica is behind; zero when it has replayed everything it received
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+def client_key(request: Request) -> str:
+    """Who a request is from, for read-your-writes: its credentials, else its organization or address."""
+    headers = request.headers
+    return (
+        headers.get("authorization")
+        or headers.get("x-api-key")
+        or headers.get("x-organization-id")
+        or (request.client.host if request.client else "unknown")
+    )
+
+
+class ReplicaRouter:
+    """Routes read-only sessions to the least busy replica that is not lagging.
+
+    Replica lag is measured in the background every
+    ``DATABASE_REPLICA_LAG_CHECK_SECONDS``. A replica more than
+    ``DATABASE_REPLICA_MAX_LAG_SECONDS`` behind, or unreachable, gets no reads
+    until it catches up. Until the first check completes, reads go to the
+    primary. A client that committed a write reads from the primary for
+    ``DATABASE_READ_YOUR_WRITES_SECONDS``, so it sees its own writes. That is
+    tracked per process.
+    """
+
+    def __init__(
+        self,
+        engines: List[AsyncEngine],
+        max_lag_seconds: Optional[float] = None,
+        check_seconds: Optional[float] = None,
+        sticky_seconds: Optional[float] = None
+    ):
+        self.engines = engines
+        self.max_lag_seconds = max_lag_seconds if max_lag_seconds is not None else settings.DATABASE_REPLICA_MAX_LAG_SECONDS
+        self.check_seconds = check_seconds or settings.DATABASE_REPLICA_LAG_CHECK_SECONDS
+        self.sticky_seconds = sticky_seconds if sticky_seconds is not None else settings.DATABASE_READ_YOUR_WRITES_SECONDS
+        self.lag: Dict[int, float] = {}  # replica index -> seconds behind
+        self.last_writes: Dict[str, float] = {}  # client key -> monotonic time of the last write
+        self._check_task: Optional[asyncio.Task] = None
+
+    def mark_write(self, key: str):
+        """Send the client's reads to the primary for the read-your-writes window."""
+        if self.engines:
+            self.last_writes[key] = time.monotonic()
+
+    def choose(self, key: str) -> Optional[AsyncEngine]:
+        """The replica to read from, or None for the primary."""
+        if not self.engines:
+            return None
+        self._ensure_checks()
+
+        wrote_at = self.last_writes.get(key)
+        if wrote_at is not None:
+            if time.monotonic() - wrote_at < self.sticky_seconds:
+                return None
+            del self.last_writes[key]
+
+        fresh = [
+            replica for index, replica in enumerate(self.engines)
+            if self.lag.get(index, math.inf) <= self.max_lag_seconds
+        ]
+        if not fresh:
+            return None
+        return min(fresh, key=lambda replica: replica.pool.checkedout())
+
+    def _ensure_checks(self):
+        if self._check_task is None or self._check_task.done():
+            try:
+                self._check_task = asyncio.get_running_loop().create_task(self._check_loop())
+            except RuntimeError:
+                pass
+
+    async def _check_loop(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_seconds)
+
+    async def check(self):
+        """Measure every replica's lag and forget expired read-your-writes windows."""
+        for index, replica in enumerate(self.engines):
+            try:
+                async with replica.connect() as conn:
+                    self.lag[index] = float((await conn.execute(REPLICA_LAG_QUERY)).scalar() or 0.0)
+            except Exception as e:
+                if self.lag.get(index) != math.inf:
+                    logger.warning("Read replica unavailable", replica=index, error=str(e))
+                self.lag[index] = math.inf
+
+        cutoff = time.monotonic() - self.sticky_seconds
+        self.last_writes = {key: at for key, at in self.last_writes.items() if at >= cutoff}
+
+    async def close(self):
+        """Stop checking lag and close the replica pools."""
+        if self._check_task is not None:
+            self._check_task.cancel()
+            try:
+                await self._check_task
+            except asyncio.CancelledError:
+                pass
+            self._check_task = None
+        for replica in self.engines:
+            await replica.dispose()
+
+
+# Shared router; one lag check task per process
+replica_router = ReplicaRouter(replica_engines)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush_write(session: Session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _stick_to_primary(session: Session):
+    if session.info.pop("has_writes", False) and "client_key" in session.info:
+        replica_router.mark_write(session.info["client_key"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_writes(session: Session):
+    session.info.pop("has_writes", None)
+
+
+# Comments, literals and bind parameters; fingerprints keep only the shape of a statement
+FINGERPRINT_PATTERNS = [
+    (re.compile(r"--[^\n]*|/\*.*?\*/", re.S), " "),
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\$\d+|%\(\w+\)s|%s|(?<!:):\w+"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:::\w+)?(?:\s*,\s*\?(?:::\w+)?)*\s*\)"), "(?)"),
+]
+
+
+def fingerprint(statement: str) -> str:
+    """A statement with its literals and parameters replaced by ``?``."""
+    for pattern, replacement in FINGERPRINT_PATTERNS:
+        statement = pattern.sub(replacement, statement)
+    return " ".join(statement.split())
+
+
+class SlowQueryStats:
+    """Latency of one statement fingerprint, and its latest plan."""
+
+    __slots__ = ("fingerprint", "statement", "count", "total", "max", "last_seen", "plan", "explained_at")
+
+    def __init__(self, fingerprint: str, statement: str):
+        self.fingerprint = fingerprint
+        self.statement = statement  # first statement seen, without its parameters
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last_seen = 0.0
+        self.plan: Any = None
+        self.explained_at: Optional[float] = None
+
+    def add(self, duration: float):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.last_seen = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": hashlib.sha1(self.fingerprint.encode()).hexdigest()[:16],
+            "fingerprint": self.fingerprint,
+            "statement": self.statement,
+            "count": self.count,
+            "total_seconds": self.total,
+            "mean_seconds": self.total / self.count if self.count else 0.0,
+            "max_seconds": self.max,
+            "last_seen": datetime.utcfromtimestamp(self.last_seen).isoformat(),
+            "plan": self.plan,
+            "explained_at": datetime.utcfromtimestamp(self.explained_at).isoformat() if self.explained_at else None,
+        }
+
+
+class SlowQueryLog:
+    """Statements slower than ``SLOW_QUERY_SECONDS``, aggregated by fingerprint.
+
+    Cursor hooks time every statement on the engines the log is installed on.
+    Slow ones are normalized into a fingerprint (literals and parameters
+    become ``?``), and count, total and maximum latency are kept per
+    fingerprint. At most ``SLOW_QUERY_MAX_FINGERPRINTS`` are kept; the least
+    recently seen are dropped first.
+
+    A sampled subset (``SLOW_QUERY_EXPLAIN_SAMPLE_RATE``, at most once per
+    fingerprint every ``SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS``) is re-run as
+    ``EXPLAIN (ANALYZE, BUFFERS)`` in a background task, with the original
+    parameters. This only applies to PostgreSQL reads (``SELECT`` and
+    ``WITH``). The EXPLAIN runs in a read-only transaction that is rolled
+    back, under ``SLOW_QUERY_EXPLAIN_TIMEOUT_SECONDS``, and at most
+    ``SLOW_QUERY_EXPLAIN_CONCURRENCY`` run at once. Parameters are only held
+    until their EXPLAIN has run; the log keeps statements and plans.
+    """
+
+    def __init__(
+        self,
+        threshold_seconds: Optional[float] = None,
+        max_fingerprints: Optional[int] = None,
+        explain_sample_rate: Optional[float] = None,
+        explain_interval_seconds: Optional[float] = None
+    ):
+        self.threshold_seconds = threshold_seconds if threshold_seconds is not None else settings.SLOW_QUERY_SECONDS
+        self.max_fingerprints = max_fingerprints or settings.SLOW_QUERY_MAX_FINGERPRINTS
+        self.explain_sample_rate = (
+            explain_sample_rate if explain_sample_rate is not None else settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+        )
+        self.explain_interval_seconds = (
+            explain_interval_seconds if explain_interval_seconds is not None
+            else settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS
+        )
+        self.stats: "OrderedDict[str, SlowQueryStats]" = OrderedDict()
+        self.engines: Dict[Engine, AsyncEngine] = {}  # sync engine -> the async engine to EXPLAIN on
+        self._explaining: Set[str] = set()
+
+    def install(self, async_engine: AsyncEngine):
+        """Time the statements executed through an engine."""
+        sync_engine = async_engine.sync_engine
+        if sync_engine in self.engines:
+            return
+        self.engines[sync_engine] = async_engine
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(sync_engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("slow_query_started")
+        if started:
+            duration = time.perf_counter() - started.pop()
+            if duration >= self.threshold_seconds:
+                self.observe(statement, duration, None if executemany else parameters, conn.engine)
+
+    def _handle_error(self, exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("slow_query_started"):
+            conn.info["slow_query_started"].pop()
+
+    def observe(self, statement: str, duration: float, parameters: Any = None, engine: Optional[Engine] = None):
+        """Record a slow statement, and maybe EXPLAIN it."""
+        if statement.lstrip()[:7].upper() == "EXPLAIN":
+            return
+        key = fingerprint(statement)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = SlowQueryStats(key, statement)
+            while len(self.stats) > self.max_fingerprints:
+                self.stats.popitem(last=False)
+        else:
+            self.stats.move_to_end(key)
+        stats.add(duration)
+
+        if parameters is not None and engine is not None and self._should_explain(stats, engine):
+            self._schedule_explain(stats, statement, parameters, engine)
+
+    def _should_explain(self, stats: SlowQueryStats, engine: Engine) -> bool:
+        return (
+            engine.dialect.name == "postgresql"
+            and stats.statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "WITH")
+            and stats.fingerprint not in self._explaining
+            and len(self._explaining) < settings.SLOW_QUERY_EXPLAIN_CONCURRENCY
+            and (stats.explained_at is None or time.time() - stats.explained_at >= self.explain_interval_seconds)
+            and random.random() < self.explain_sample_rate
+        )
+
+    def _schedule_explain(self, stats: SlowQueryStats, statement: str, parameters: Any, engine: Engine):
+        async_engine = self.engines.get(engine)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if async_engine is None:
+            return
+        self._explaining.add(stats.fingerprint)
+        loop.create_task(self._explain(stats, statement, parameters, async_engine))
+
+    async def _explain(self, stats: SlowQueryStats, statement: str, parameters: Any, engine: AsyncEngine):
+        current_profile.set(None)  # not part of the request whose statement was slow
+        try:
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(postgresql_readonly=True)
+                timeout_ms = int(settings.SLOW_QUERY_EXPLAIN_TIMEOUT_SECONDS * 1000)
+                await conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout_ms}")
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+                )
+                plan = result.scalar()
+                await conn.rollback()
+            stats.plan = json.loads(plan) if isinstance(plan, str) else plan
+        except Exception as e:
+            logger.warning("Slow query EXPLAIN failed", fingerprint=stats.fingerprint[:200], error=str(e))
+        finally:
+            stats.explained_at = time.time()
+            self._explaining.discard(stats.fingerprint)
+
+    def snapshot(self, sort: str = "total") -> List[Dict[str, Any]]:
+        """Every fingerprint, slowest first by ``sort`` (total, mean, max or count)."""
+        entries = [stats.to_dict() for stats in list(self.stats.values())]
+        key = "count" if sort == "count" else f"{sort}_seconds"
+        return sorted(entries, key=lambda entry: entry[key], reverse=True)
+
+    def clear(self):
+        self.stats.clear()
+
+
+# Shared log; covers every statement this process runs
+slow_query_log = SlowQueryLog()
+for logged_engine in [engine, *replica_engines]:
+    slow_query_log.install(logged_engine)
+
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """Dependency to get database session."""
-    async with AsyncSessionLocal() as session:
+    async with AsyncSessionLocal(info={"client_key": client_key(request)}) as session:
         try:
             yield session
             await session.commit()
@@ -50,6 +405,19 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Dependency to get a read-only session, on a replica when one is fresh enough.
+
+    The transaction is opened READ ONLY and rolled back at the end, never committed.
+    """
+    replica = replica_router.choose(client_key(request))
+    async with AsyncSessionLocal(bind=replica or engine) as session:
+        try:
+            await session.connection(execution_options={"postgresql_readonly": True})
+            yield session
+        finally:
+            await session.rollback()
+
 async def init_db():
     """Initialize database tables."""
     try:
@@ -63,6 +431,7 @@ async def init_db():
 async def close_db():
     """Close database connections."""
     try:
+        await replica_router.close()
         await engine.dispose()
         logger.info("Database connections closed")
     except Exception as e:
@@ -0,0 +1,129 @@
+"""
+Logging setup for the API process.
+
+Log calls on the serving path do as little as possible:
+
+* structlog renders each event to one line with orjson;
+* the stdlib handler only puts that line on a bounded queue. A
+  ``QueueListener`` thread writes the lines to stdout. When the queue is full,
+  lines are dropped and counted rather than blocking a request;
+* request logging is sampled. ``RequestLoggingMiddleware`` decides once per
+  request whether it is logged, and debug/info events from the route handler
+  follow that decision. ``LOG_SAMPLE_RATES`` maps path prefixes to rates;
+  other paths use ``LOG_SAMPLE_RATE_DEFAULT``. Warnings, errors, failed
+  requests and requests slower than ``LOG_SLOW_REQUEST_SECONDS`` are always
+  logged.
+"""
+
+from contextvars import ContextVar
+from typing import Optional
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import orjson
+import structlog
+from prometheus_client import Counter
+
+from .config import settings
+
+LOG_LINES_DROPPED = Counter(
+    'log_lines_dropped_total',
+    'Log lines dropped because the log queue was full'
+)
+
+# Whether the current request's debug/info events are logged
+request_sampled: ContextVar[bool] = ContextVar("request_sampled", default=True)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def sample_rate(path: str) -> float:
+    """Sampling rate for a request path; the longest matching prefix wins."""
+    best, rate = -1, settings.LOG_SAMPLE_RATE_DEFAULT
+    for prefix, prefix_rate in settings.LOG_SAMPLE_RATES.items():
+        if len(prefix) > best and path.startswith(prefix):
+            best, rate = len(prefix), prefix_rate
+    return rate
+
+
+def sample_request(path: str) -> bool:
+    """Decide whether this request's debug/info events are logged."""
+    sampled = random.random() < sample_rate(path)
+    request_sampled.set(sampled)
+    return sampled
+
+
+def drop_unsampled(logger, method_name: str, event_dict):
+    """Drop debug/info events of requests that were sampled out."""
+    if method_name in ("debug", "info") and not request_sampled.get():
+        raise structlog.DropEvent
+    return event_dict
+
+
+def render_orjson(obj, **kwargs) -> str:
+    return orjson.dumps(obj, default=str).decode()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops lines instead of blocking when the queue is full."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # structlog has already rendered the line; skip QueueHandler's copy and reformat
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_LINES_DROPPED.inc()
+
+
+def configure_logging():
+    """Configure structlog and the stdlib root logger; idempotent."""
+    global _listener
+    if _listener is not None:
+        return
+
+    renderer = (
+        structlog.dev.ConsoleRenderer()
+        if settings.LOG_FORMAT == "console"
+        else structlog.processors.JSONRenderer(serializer=render_orjson)
+    )
+    structlog.configure(
+        processors=[
+            drop_unsampled,
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.TimeStamper(fmt="iso"),
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.format_exc_info,
+            structlog.processors.UnicodeDecoder(),
+            renderer
+        ],
+        context_class=dict,
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(logging.Formatter("%(message)s"))
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=False)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.handlers = [DroppingQueueHandler(log_queue)]
+    root.setLevel(settings.LOG_LEVEL)
+
+
+def stop_logging():
+    """Flush queued lines and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
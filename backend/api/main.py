@@ -8,9 +8,10 @@ import structlog
 from contextlib import asynccontextmanager
 
 from .config import settings
-from .database import engine, Base
-from .middleware import RequestLoggingMiddleware, RateLimitMiddleware
-from .auth import get_current_user
+from .database import AsyncSessionLocal, engine, Base, replica_router
+from .logging_config import configure_logging, stop_logging
+from .middleware import create_middleware_stack
+from .auth import AuthService, get_current_user
 from .routes import (
     features,
     feature_values,
@@ -19,27 +20,16 @@ from .routes import (
     monitoring,
     computation,
     lineage,
-    health
+    health,
+    admin
 )
+from services.scheduler import computation_scheduler
+from services.status_events import status_broker
+from services.activity import activity_recorder
+from services.rate_limiter import rate_limiter
 
 # Configure structured logging
-structlog.configure(
-    processors=[
-        structlog.stdlib.filter_by_level,
-        structlog.stdlib.add_logger_name,
-        structlog.stdlib.add_log_level,
-        structlog.stdlib.PositionalArgumentsFormatter(),
-        structlog.processors.TimeStamper(fmt="iso"),
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        structlog.processors.UnicodeDecoder(),
-        structlog.processors.JSONRenderer()
-    ],
-    context_class=dict,
-    logger_factory=structlog.stdlib.LoggerFactory(),
-    wrapper_class=structlog.stdlib.BoundLogger,
-    cache_logger_on_first_use=True,
-)
+configure_logging()
 
 logger = structlog.get_logger()
 
@@ -58,10 +48,25 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to create database tables: {e}")
         raise
     
+    # Keys stored before API keys were hashed are hashed once, in place
+    async with AsyncSessionLocal() as session:
+        await AuthService.migrate_plaintext_api_keys(session)
+    
+    # Start the computation scheduler (only the elected leader enqueues runs)
+    if settings.SCHEDULER_ENABLED and not settings.TESTING:
+        computation_scheduler.start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Feature Store API")
+    if settings.SCHEDULER_ENABLED and not settings.TESTING:
+        await computation_scheduler.stop()
+    await status_broker.close()
+    await rate_limiter.close()
+    await activity_recorder.close()
+    await replica_router.close()
+    stop_logging()
 
 # Create FastAPI application
 app = FastAPI(
@@ -84,8 +89,8 @@ app.add_middleware(
 )
 
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=settings.ALLOWED_HOSTS)
-app.add_middleware(RequestLoggingMiddleware)
-app.add_middleware(RateLimitMiddleware)
+# The same stack the middleware benchmark measures; metrics and logging wrap rate limiting
+create_middleware_stack(app)
 
 # Custom exception handler
 @app.exception_handler(Exception)
@@ -189,6 +194,7 @@ app.include_router(feature_values.router, prefix="/api/v1/feature-values", tags=
 app.include_router(monitoring.router, prefix="/api/v1/monitoring", tags=["Monitoring"])
 app.include_router(computation.router, prefix="/api/v1/computation", tags=["Computation"])
 app.include_router(lineage.router, prefix="/api/v1/lineage", tags=["Lineage"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
 
 # Root endpoint
 @app.get("/")
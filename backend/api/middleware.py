@@ -1,18 +1,52 @@
-from fastapi import Request, Response
-from fastapi.middleware.base import BaseHTTPMiddleware
-from starlette.middleware.base import RequestResponseEndpoint
+"""
+Pure ASGI middleware.
+
+Every middleware here is a plain ASGI callable, with no per-request task and
+no wrapping of the response body stream, so streaming responses pass through
+untouched. The outermost one creates a ``RequestContext`` for the request and
+stores it in ``scope["state"]``. Starlette exposes it as
+``request.state.request_context``.
+
+Inner middleware find the context and register on it instead of wrapping
+``send`` again. The request is timed once, and the response start message is
+intercepted once. Each middleware implements some of three hooks:
+
+* ``before(context, send)``: runs on the way in; it may send a response
+  itself and return True to stop the request there;
+* ``on_headers(context, headers)``: edits the response headers;
+* ``after(context, error)``: runs once the response is finished or failed,
+  innermost first.
+
+Request metrics are labeled with the matched route template
+(``/api/v1/features/{feature_id}``), not the raw path. The organization
+label is bounded: the first ``METRICS_MAX_ORGANIZATIONS`` organizations seen
+get their own series, and any others share ``"other"``. ``MetricsMiddleware``
+serves ``GET /metrics`` in front of the whole stack, so scrapes skip
+logging, rate limiting and auth.
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+import math
 import time
+import uuid
 import structlog
-from typing import Dict, Any
-import asyncio
-from collections import defaultdict
-import aioredis
-from prometheus_client import Counter, Histogram, Gauge
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, Gauge, generate_latest
 
 from .config import settings
+from .logging_config import request_sampled, sample_request
+from .profiling import QueryProfile, check_profile, current_profile, violations
+from services.rate_limiter import rate_limiter
 
 logger = structlog.get_logger()
 
+CONTEXT_KEY = "request_context"
+METRICS_PATH = "/metrics"
+UNMATCHED_ROUTE = "unmatched"
+OVERFLOW_ORGANIZATION = "other"
+
+# Serving latencies: most requests take milliseconds, and the slow tail runs to seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
 # Prometheus metrics
 REQUEST_COUNT = Counter(
     'http_requests_total',
@@ -23,7 +57,8 @@ REQUEST_COUNT = Counter(
 REQUEST_DURATION = Histogram(
     'http_request_duration_seconds',
     'HTTP request duration in seconds',
-    ['method', 'endpoint', 'organization_id']
+    ['method', 'endpoint', 'organization_id'],
+    buckets=LATENCY_BUCKETS
 )
 
 ACTIVE_REQUESTS = Gauge(
@@ -32,285 +67,390 @@ ACTIVE_REQUESTS = Gauge(
     ['organization_id']
 )
 
+DB_QUERIES_PER_REQUEST = Histogram(
+    'db_queries_per_request',
+    'SQL statements issued per HTTP request',
+    ['method', 'endpoint'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+)
+
+DB_TIME_PER_REQUEST = Histogram(
+    'db_time_per_request_seconds',
+    'Time spent in the database per HTTP request',
+    ['method', 'endpoint'],
+    buckets=LATENCY_BUCKETS
+)
+
 RATE_LIMIT_EXCEEDED = Counter(
     'rate_limit_exceeded_total',
     'Total rate limit exceeded requests',
-    ['organization_id', 'endpoint']
+    ['organization_id']
 )
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for structured request logging."""
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        start_time = time.time()
-        
-        # Extract request information
-        method = request.method
-        url = str(request.url)
-        client_ip = request.client.host if request.client else "unknown"
-        user_agent = request.headers.get("user-agent", "unknown")
-        
-        # Get organization ID from headers or context
-        organization_id = request.headers.get("X-Organization-ID", "unknown")
-        
-        # Log request start
-        logger.info(
-            "Request started",
-            method=method,
-            url=url,
-            client_ip=client_ip,
-            user_agent=user_agent,
-            organization_id=organization_id
-        )
-        
-        # Process request
+
+class OrganizationLabels:
+    """Bounded organization label values; organizations past the limit share one series."""
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.max_size = max_size if max_size is not None else settings.METRICS_MAX_ORGANIZATIONS
+        self.known: Set[str] = set()
+
+    def __call__(self, organization_id: str) -> str:
+        if organization_id in self.known:
+            return organization_id
+        if len(self.known) < self.max_size:
+            self.known.add(organization_id)
+            return organization_id
+        return OVERFLOW_ORGANIZATION
+
+
+organization_label = OrganizationLabels()
+
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """The path template of the route that handled a request."""
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    return getattr(route, "path_format", None) or getattr(route, "path", UNMATCHED_ROUTE)
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class RequestContext:
+    """Per-request state shared by every middleware."""
+
+    __slots__ = (
+        "scope", "method", "path", "started", "status_code", "organization_id",
+        "correlation_id", "rate_limit_key", "middleware"
+    )
+
+    def __init__(self, scope: Dict[str, Any]):
+        self.scope = scope
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.started = time.perf_counter()
+        self.status_code: Optional[int] = None
+        self.organization_id = self.header(b"x-organization-id") or "unknown"
+        self.correlation_id: Optional[str] = None
+        self.rate_limit_key: Optional[str] = None  # set once a request is admitted
+        self.middleware: List["ContextMiddleware"] = []
+
+    def header(self, name: bytes) -> Optional[str]:
+        """A request header by lower-case name."""
+        for key, value in self.scope["headers"]:
+            if key == name:
+                return value.decode("latin-1")
+        return None
+
+    @property
+    def client_ip(self) -> str:
+        client = self.scope.get("client")
+        return client[0] if client else "unknown"
+
+    @property
+    def url(self) -> str:
+        query = self.scope.get("query_string")
+        return f"{self.path}?{query.decode('latin-1')}" if query else self.path
+
+    @property
+    def duration(self) -> float:
+        return time.perf_counter() - self.started
+
+    async def respond(self, send, status_code: int, body: bytes, headers: Optional[Headers] = None):
+        """Send a complete response from a middleware."""
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *(headers or []),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class ContextMiddleware:
+    """Base class: runs the hooks of every middleware that shares a request context."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        context = state.get(CONTEXT_KEY)
+        if context is not None:
+            # An outer middleware owns the request and already wraps send
+            context.middleware.append(self)
+            if not await self.before(context, send):
+                await self.app(scope, receive, send)
+            return
+
+        context = state[CONTEXT_KEY] = RequestContext(scope)
+        context.middleware.append(self)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                context.status_code = message["status"]
+                headers = list(message.get("headers", ()))
+                for middleware in context.middleware:
+                    middleware.on_headers(context, headers)
+                message = {**message, "headers": headers}
+            await send(message)
+
+        error = None
         try:
-            response = await call_next(request)
-            
-            # Calculate duration
-            duration = time.time() - start_time
-            
-            # Log request completion
+            if not await self.before(context, send_wrapper):
+                await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            for middleware in reversed(context.middleware):
+                middleware.after(context, error)
+
+    async def before(self, context: RequestContext, send) -> bool:
+        return False
+
+    def on_headers(self, context: RequestContext, headers: Headers):
+        pass
+
+    def after(self, context: RequestContext, error: Optional[BaseException]):
+        pass
+
+
+class RequestLoggingMiddleware(ContextMiddleware):
+    """Middleware for sampled structured request logging."""
+
+    async def before(self, context: RequestContext, send) -> bool:
+        if sample_request(context.path):
             logger.info(
-                "Request completed",
-                method=method,
-                url=url,
-                status_code=response.status_code,
-                duration=duration,
-                organization_id=organization_id
+                "Request started",
+                method=context.method,
+                url=context.url,
+                client_ip=context.client_ip,
+                user_agent=context.header(b"user-agent") or "unknown",
+                organization_id=context.organization_id
             )
-            
-            # Record metrics
-            REQUEST_COUNT.labels(
-                method=method,
-                endpoint=request.url.path,
-                status_code=response.status_code,
-                organization_id=organization_id
-            ).inc()
-            
-            REQUEST_DURATION.labels(
-                method=method,
-                endpoint=request.url.path,
-                organization_id=organization_id
-            ).observe(duration)
-            
-            return response
-            
-        except Exception as e:
-            # Calculate duration
-            duration = time.time() - start_time
-            
-            # Log request error
+        return False
+
+    def after(self, context: RequestContext, error: Optional[BaseException]):
+        duration = context.duration
+        status_code = 500 if error is not None else context.status_code
+
+        # Failed and slow requests are always logged
+        if status_code is None or status_code >= 500 or duration >= settings.LOG_SLOW_REQUEST_SECONDS:
+            request_sampled.set(True)
+
+        if error is not None:
             logger.error(
                 "Request failed",
-                method=method,
-                url=url,
-                error=str(e),
+                method=context.method,
+                url=context.url,
+                error=str(error),
                 duration=duration,
-                organization_id=organization_id,
-                exc_info=True
+                organization_id=context.organization_id,
+                exc_info=error
             )
-            
-            # Record metrics
-            REQUEST_COUNT.labels(
-                method=method,
-                endpoint=request.url.path,
-                status_code=500,
-                organization_id=organization_id
-            ).inc()
-            
-            raise
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Middleware for rate limiting based on organization."""
-    
-    def __init__(self, app):
-        super().__init__(app)
-        self.redis = None
-        self.rate_limit_cache = defaultdict(lambda: {"count": 0, "reset_time": 0})
-    
-    async def get_redis(self):
-        """Get Redis connection."""
-        if self.redis is None:
-            self.redis = await aioredis.from_url(
-                settings.REDIS_URL,
-                password=settings.REDIS_PASSWORD,
-                encoding="utf-8",
-                decode_responses=True
+        else:
+            logger.info(
+                "Request completed",
+                method=context.method,
+                url=context.url,
+                status_code=status_code,
+                duration=duration,
+                organization_id=context.organization_id
             )
-        return self.redis
-    
-    async def check_rate_limit(self, organization_id: str, endpoint: str) -> bool:
-        """Check if request is within rate limit."""
-        try:
-            redis = await self.get_redis()
-            
-            # Create rate limit key
-            key = f"rate_limit:{organization_id}:{endpoint}"
-            current_time = int(time.time())
-            
-            # Get current count
-            count = await redis.get(key)
-            count = int(count) if count else 0
-            
-            # Get rate limit for organization (simplified - in real app, get from DB)
-            rate_limit = settings.RATE_LIMIT_DEFAULT
-            
-            if count >= rate_limit:
-                RATE_LIMIT_EXCEEDED.labels(
-                    organization_id=organization_id,
-                    endpoint=endpoint
-                ).inc()
-                return False
-            
-            # Increment counter
-            pipe = redis.pipeline()
-            pipe.incr(key)
-            pipe.expire(key, 60)  # Reset every minute
-            await pipe.execute()
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Rate limit check failed: {e}")
-            # Allow request if rate limiting fails
-            return True
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+
+        # Record metrics
+        endpoint = route_template(context.scope)
+        organization_id = organization_label(context.organization_id)
+        REQUEST_COUNT.labels(
+            method=context.method,
+            endpoint=endpoint,
+            status_code=status_code,
+            organization_id=organization_id
+        ).inc()
+
+        REQUEST_DURATION.labels(
+            method=context.method,
+            endpoint=endpoint,
+            organization_id=organization_id
+        ).observe(duration)
+
+
+class RateLimitMiddleware(ContextMiddleware):
+    """Middleware for rate limiting based on organization and plan tier."""
+
+    async def before(self, context: RequestContext, send) -> bool:
         if not settings.RATE_LIMIT_ENABLED:
-            return await call_next(request)
-        
-        # Get organization ID
-        organization_id = request.headers.get("X-Organization-ID", "default")
-        endpoint = request.url.path
-        
-        # Check rate limit
-        allowed = await self.check_rate_limit(organization_id, endpoint)
-        
+            return False
+
+        organization_id = context.header(b"x-organization-id") or "default"
+
+        # Check rate limit against the local token bucket
+        allowed, retry_after = rate_limiter.allow(organization_id)
+
         if not allowed:
+            RATE_LIMIT_EXCEEDED.labels(organization_id=organization_label(organization_id)).inc()
             logger.warning(
                 "Rate limit exceeded",
                 organization_id=organization_id,
-                endpoint=endpoint,
-                client_ip=request.client.host if request.client else "unknown"
+                endpoint=context.path,
+                client_ip=context.client_ip
             )
-            
-            return Response(
-                content='{"success": false, "message": "Rate limit exceeded", "error_code": "RATE_LIMIT_EXCEEDED"}',
-                status_code=429,
-                media_type="application/json"
+
+            await context.respond(
+                send,
+                429,
+                b'{"success": false, "message": "Rate limit exceeded", "error_code": "RATE_LIMIT_EXCEEDED"}',
+                [(b"retry-after", str(math.ceil(retry_after)).encode())]
             )
-        
-        # Increment active requests
-        ACTIVE_REQUESTS.labels(organization_id=organization_id).inc()
-        
-        try:
-            response = await call_next(request)
-            return response
-        finally:
-            # Decrement active requests
-            ACTIVE_REQUESTS.labels(organization_id=organization_id).dec()
+            return True
 
-class MonitoringMiddleware(BaseHTTPMiddleware):
+        context.rate_limit_key = organization_label(organization_id)
+        ACTIVE_REQUESTS.labels(organization_id=context.rate_limit_key).inc()
+        return False
+
+    def after(self, context: RequestContext, error: Optional[BaseException]):
+        if context.rate_limit_key is not None:
+            ACTIVE_REQUESTS.labels(organization_id=context.rate_limit_key).dec()
+
+
+class MonitoringMiddleware(ContextMiddleware):
     """Middleware for application monitoring."""
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        start_time = time.time()
-        
-        # Extract monitoring information
-        organization_id = request.headers.get("X-Organization-ID", "unknown")
-        endpoint = request.url.path
-        method = request.method
-        
-        # Track request start
-        logger.debug(
-            "Request monitoring start",
-            organization_id=organization_id,
-            endpoint=endpoint,
-            method=method
-        )
-        
-        try:
-            response = await call_next(request)
-            
-            # Calculate metrics
-            duration = time.time() - start_time
-            
-            # Log performance metrics
-            if duration > 1.0:  # Log slow requests
-                logger.warning(
-                    "Slow request detected",
-                    organization_id=organization_id,
-                    endpoint=endpoint,
-                    method=method,
-                    duration=duration,
-                    status_code=response.status_code
-                )
-            
-            return response
-            
-        except Exception as e:
-            duration = time.time() - start_time
-            
-            # Log error metrics
+
+    def after(self, context: RequestContext, error: Optional[BaseException]):
+        duration = context.duration
+
+        if error is not None:
             logger.error(
                 "Request error",
-                organization_id=organization_id,
-                endpoint=endpoint,
-                method=method,
+                organization_id=context.organization_id,
+                endpoint=context.path,
+                method=context.method,
                 duration=duration,
-                error=str(e),
-                exc_info=True
+                error=str(error)
+            )
+        elif duration > 1.0:  # Log slow requests
+            logger.warning(
+                "Slow request detected",
+                organization_id=context.organization_id,
+                endpoint=context.path,
+                method=context.method,
+                duration=duration,
+                status_code=context.status_code
             )
-            
-            raise
 
-class SecurityMiddleware(BaseHTTPMiddleware):
-    """Middleware for security headers and validation."""
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        # Add security headers
-        response = await call_next(request)
-        
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Content-Security-Policy"] = "default-src 'self'"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
+
+SECURITY_HEADERS: Headers = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    (b"content-security-policy", b"default-src 'self'"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+]
+
+
+class SecurityMiddleware(ContextMiddleware):
+    """Middleware for security headers."""
+
+    def on_headers(self, context: RequestContext, headers: Headers):
         # Remove sensitive headers
-        response.headers.pop("Server", None)
-        
-        return response
+        headers[:] = [header for header in headers if header[0].lower() != b"server"]
+        headers.extend(SECURITY_HEADERS)
 
-class CorrelationMiddleware(BaseHTTPMiddleware):
+
+class CorrelationMiddleware(ContextMiddleware):
     """Middleware for request correlation and tracing."""
-    
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        # Generate correlation ID
-        correlation_id = request.headers.get("X-Correlation-ID")
-        if not correlation_id:
-            import uuid
-            correlation_id = str(uuid.uuid4())
-        
-        # Add correlation ID to request state
-        request.state.correlation_id = correlation_id
-        
-        # Add correlation ID to response headers
-        response = await call_next(request)
-        response.headers["X-Correlation-ID"] = correlation_id
-        
-        return response
+
+    async def before(self, context: RequestContext, send) -> bool:
+        context.correlation_id = context.header(b"x-correlation-id") or str(uuid.uuid4())
+        context.scope["state"]["correlation_id"] = context.correlation_id
+        return False
+
+    def on_headers(self, context: RequestContext, headers: Headers):
+        headers.append((b"x-correlation-id", context.correlation_id.encode()))
+
+
+class QueryProfilingMiddleware(ContextMiddleware):
+    """Middleware for per-request SQL statistics and, in development and tests, query budgets."""
+
+    async def before(self, context: RequestContext, send) -> bool:
+        current_profile.set(QueryProfile())
+        return False
+
+    def on_headers(self, context: RequestContext, headers: Headers):
+        profile = current_profile.get()
+        if settings.SQL_SERVER_TIMING and profile is not None and profile.count:
+            headers.append((b"server-timing", profile.server_timing().encode()))
+
+    def after(self, context: RequestContext, error: Optional[BaseException]):
+        profile = current_profile.get()
+        if profile is None:
+            return
+        current_profile.set(None)
+        endpoint = route_template(context.scope)
+        DB_QUERIES_PER_REQUEST.labels(method=context.method, endpoint=endpoint).observe(profile.count)
+        DB_TIME_PER_REQUEST.labels(method=context.method, endpoint=endpoint).observe(profile.duration)
+
+        if settings.DEBUG or settings.TESTING:
+            for problem in check_profile(f"{context.method} {endpoint}", profile):
+                violations.append(problem)
+                logger.warning(
+                    "Query budget violation",
+                    problem=problem,
+                    queries=profile.count,
+                    db_time=profile.duration,
+                    slowest=profile.slowest
+                )
+
+
+class MetricsMiddleware:
+    """Serves the Prometheus scrape endpoint ahead of every other middleware."""
+
+    def __init__(self, app, path: str = METRICS_PATH):
+        self.app = app
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] == "http"
+            and scope["path"] == self.path
+            and scope["method"] == "GET"
+            and settings.PROMETHEUS_ENABLED
+        ):
+            body = generate_latest(REGISTRY)
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", CONTENT_TYPE_LATEST.encode()),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        await self.app(scope, receive, send)
+
 
 # Middleware factory
 def create_middleware_stack(app):
     """Create and configure middleware stack."""
+    # The last one added is outermost: metrics wrap everything, so scrapes skip the
+    # rest, and rejected requests still pass through logging on their way out
     app.add_middleware(CorrelationMiddleware)
+    app.add_middleware(QueryProfilingMiddleware)
     app.add_middleware(SecurityMiddleware)
     app.add_middleware(MonitoringMiddleware)
     app.add_middleware(RateLimitMiddleware)
     app.add_middleware(RequestLoggingMiddleware)
-    
-    return app 
\ No newline at end of file
+    app.add_middleware(MetricsMiddleware)
+
+    return app
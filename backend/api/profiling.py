@@ -0,0 +1,106 @@
+"""
+Per-request SQL profiling.
+
+Cursor hooks on the primary and replica engines add every statement to the
+``QueryProfile`` of the request that issued it: the number of statements,
+the total time spent in the database, and the slowest statement.
+``QueryProfilingMiddleware`` starts a profile for each request and reports
+it in three ways:
+
+* a ``Server-Timing`` header (``db;dur=12.4;desc="7 queries"``);
+* the ``db_queries_per_request`` and ``db_time_per_request_seconds``
+  histograms, labeled by route template;
+* in development and tests (``DEBUG`` or ``TESTING``), it also checks the
+  request against its query budget. ``SQL_QUERY_BUDGETS`` maps routes
+  (``"GET /api/v1/features/{feature_id}"``) to a maximum number of
+  statements, and other routes get ``SQL_QUERY_BUDGET_DEFAULT``. It also checks for N+1 patterns: the same
+  statement text executed ``SQL_N_PLUS_ONE_THRESHOLD`` or more times with
+  different parameters. Violations are logged and collected in
+  ``violations``, which the test suite asserts is empty after every test.
+
+Statements issued outside a request, such as by the scheduler or workers,
+are not profiled.
+"""
+
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+# Profile of the current request; None outside requests
+current_profile: ContextVar[Optional["QueryProfile"]] = ContextVar("current_profile", default=None)
+
+# Budget and N+1 violations seen in development and tests
+violations: List[str] = []
+
+
+class QueryProfile:
+    """Statements issued while handling one request."""
+
+    __slots__ = ("count", "duration", "slowest", "slowest_duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest: Optional[str] = None
+        self.slowest_duration = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+        if duration > self.slowest_duration:
+            self.slowest, self.slowest_duration = statement, duration
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Statements executed at least ``threshold`` times, the signature of an N+1."""
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+def budget(route: str) -> int:
+    """The maximum number of statements a route may issue per request."""
+    return settings.SQL_QUERY_BUDGETS.get(route, settings.SQL_QUERY_BUDGET_DEFAULT)
+
+
+def check_profile(route: str, profile: QueryProfile) -> List[str]:
+    """Budget and N+1 violations of one request."""
+    problems = []
+    limit = budget(route)
+    if profile.count > limit:
+        problems.append(f"{route} issued {profile.count} queries, over its budget of {limit}")
+    for statement, count in profile.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD).items():
+        problems.append(f"{route} ran the same statement {count} times (N+1): {statement[:200]}")
+    return problems
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is not None and conn.info.get("query_started"):
+        profile.record(statement, time.perf_counter() - conn.info["query_started"].pop())
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def install(engine: Engine):
+    """Profile statements executed through an engine (the sync engine of an async one)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+import structlog
+
+from ..config import settings
+from ..database import slow_query_log
+from ..auth import require_admin
+from ..models.base import APIResponse
+from ..models.user import User
+
+logger = structlog.get_logger()
+router = APIRouter()
+
+@router.get("/slow-queries", response_model=APIResponse)
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    sort: str = Query("total", regex="^(total|mean|max|count)$"),
+    current_user: User = Depends(require_admin())
+):
+    """Slow statements seen by this API process, by fingerprint, with sampled EXPLAIN plans."""
+    # Plans and statements span every tenant, so only operators may read them
+    if str(current_user.organization_id) not in settings.OPERATOR_ORGANIZATION_IDS:
+        raise HTTPException(status_code=403, detail="Operator access required")
+
+    queries = slow_query_log.snapshot(sort)
+    return APIResponse(
+        success=True,
+        message=f"{len(queries)} slow query fingerprints",
+        data={
+            "threshold_seconds": slow_query_log.threshold_seconds,
+            "queries": queries[:limit]
+        }
+    )
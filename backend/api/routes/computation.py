@@ -1,18 +1,22 @@
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc
+from sqlalchemy import select, and_, desc, func
 from datetime import datetime, timedelta
-import json
 import asyncio
+import json
+import structlog
 
-from ..database import get_db
+from ..database import AsyncSessionLocal, get_db, get_read_db
 from ..auth import get_current_user, require_permission
 from ..models.computation import (
     ComputationJob,
     ComputationPipeline,
     ComputationTask,
-    ComputationResult
+    ComputationResult,
+    JobResourceSample,
+    JobStatus
 )
 from ..models.user import User
 from ..schemas.computation import (
@@ -25,13 +29,54 @@ from ..schemas.computation import (
     ComputationTaskResponse,
     ComputationResultResponse,
     JobExecutionRequest,
+    JobResourceSampleResponse,
     PipelineExecutionRequest
 )
 from ..schemas.common import PaginationParams, PaginatedResponse, Status, ComputationType
+from services.job_queue import job_queue
+from services.pipeline_executor import topological_order, PipelineGraphError
+from services.object_store import delete_offloaded, load
+from services.status_events import is_terminal, job_event, status_broker, task_event
+from ..config import settings
 
+logger = structlog.get_logger()
 router = APIRouter(prefix="/computation", tags=["computation"])
 
 
+def _sse(event_data: dict) -> str:
+    return f"event: {event_data['type']}\ndata: {json.dumps(event_data)}\n\n"
+
+
+async def _status_stream(request: Request, kind: str, object_id: str, queue: asyncio.Queue, snapshot: dict):
+    """Send the current status, then every change until the job or task finishes."""
+    try:
+        yield _sse(snapshot)
+        if is_terminal(snapshot):
+            return
+        while True:
+            try:
+                event_data = await asyncio.wait_for(queue.get(), settings.STATUS_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            yield _sse(event_data)
+            if is_terminal(event_data):
+                return
+    finally:
+        status_broker.unsubscribe(kind, object_id, queue)
+
+
+def _event_response(stream) -> StreamingResponse:
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/jobs", response_model=ComputationJobResponse)
 async def create_computation_job(
     job: ComputationJobCreate,
@@ -66,7 +111,7 @@ async def list_computation_jobs(
     job_type: Optional[ComputationType] = Query(None),
     created_by: Optional[int] = Query(None),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List computation jobs with filtering."""
     await require_permission(current_user, "computation:read")
@@ -89,7 +134,7 @@ async def list_computation_jobs(
     jobs = result.scalars().all()
     
     # Get total count
-    count_query = select(ComputationJob).where(
+    count_query = select(func.count(ComputationJob.id)).where(
         ComputationJob.organization_id == current_user.organization_id
     )
     if status:
@@ -100,7 +145,7 @@ async def list_computation_jobs(
         count_query = count_query.where(ComputationJob.created_by == created_by)
     
     count_result = await db.execute(count_query)
-    total_count = len(count_result.scalars().all())
+    total_count = count_result.scalar_one()
     
     return PaginatedResponse(
         items=[ComputationJobResponse.from_orm(j) for j in jobs],
@@ -115,7 +160,7 @@ async def list_computation_jobs(
 async def get_computation_job(
     job_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific computation job."""
     await require_permission(current_user, "computation:read")
@@ -136,6 +181,44 @@ async def get_computation_job(
     return ComputationJobResponse.from_orm(job)
 
 
+@router.get("/jobs/{job_id}/events")
+async def stream_computation_job_events(
+    job_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream a computation job's status and progress as server-sent events."""
+    await require_permission(current_user, "computation:read")
+    
+    # A short-lived session on the primary: a dependency session would hold its
+    # connection until the stream ends, and a lagging replica would send a stale snapshot
+    async with AsyncSessionLocal() as db:
+        job = await db.execute(
+            select(ComputationJob).where(
+                and_(
+                    ComputationJob.id == job_id,
+                    ComputationJob.organization_id == current_user.organization_id
+                )
+            )
+        )
+        job = job.scalar_one_or_none()
+        
+        if not job:
+            raise HTTPException(status_code=404, detail="Computation job not found")
+        
+        # Subscribe before reading the snapshot so no change falls in between
+        key = str(job.id)
+        queue = await status_broker.subscribe("job", key)
+        try:
+            await db.refresh(job)
+            snapshot = job_event(job)
+        except Exception:
+            status_broker.unsubscribe("job", key, queue)
+            raise
+    
+    return _event_response(_status_stream(request, "job", key, queue, snapshot))
+
+
 @router.put("/jobs/{job_id}", response_model=ComputationJobResponse)
 async def update_computation_job(
     job_id: int,
@@ -173,6 +256,55 @@ async def update_computation_job(
     return ComputationJobResponse.from_orm(job)
 
 
+@router.get("/jobs/{job_id}/resources", response_model=List[JobResourceSampleResponse])
+async def get_computation_job_resources(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get a computation job's CPU and memory use over time."""
+    await require_permission(current_user, "computation:read")
+    
+    samples = await db.execute(
+        select(JobResourceSample).where(
+            and_(
+                JobResourceSample.job_id == job_id,
+                JobResourceSample.organization_id == current_user.organization_id
+            )
+        ).order_by(JobResourceSample.sampled_at)
+    )
+    
+    return [JobResourceSampleResponse.from_orm(sample) for sample in samples.scalars().all()]
+
+
+@router.get("/jobs/{job_id}/output")
+async def get_computation_job_output(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get a computation job's full output and artifacts, downloading offloaded payloads."""
+    await require_permission(current_user, "computation:read")
+    
+    job = await db.execute(
+        select(ComputationJob.output_data, ComputationJob.artifacts).where(
+            and_(
+                ComputationJob.id == job_id,
+                ComputationJob.organization_id == current_user.organization_id
+            )
+        )
+    )
+    job = job.one_or_none()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Computation job not found")
+    
+    return {
+        "output_data": await load(job.output_data),
+        "artifacts": await load(job.artifacts)
+    }
+
+
 @router.delete("/jobs/{job_id}")
 async def delete_computation_job(
     job_id: int,
@@ -195,9 +327,16 @@ async def delete_computation_job(
     if not job:
         raise HTTPException(status_code=404, detail="Computation job not found")
     
+    offloaded = (job.output_data, job.artifacts)
     await db.delete(job)
     await db.commit()
     
+    # Only once the row is gone, so a failed delete never leaves a dangling pointer
+    try:
+        await delete_offloaded(*offloaded)
+    except Exception as e:
+        logger.warning("Failed to delete offloaded job output", job_id=job_id, error=str(e))
+    
     return {"message": "Computation job deleted successfully"}
 
 
@@ -205,11 +344,10 @@ async def delete_computation_job(
 async def execute_computation_job(
     job_id: int,
     execution_request: JobExecutionRequest,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Execute a computation job."""
+    """Queue a computation job for execution by the worker pool."""
     await require_permission(current_user, "computation:execute")
     
     job = await db.execute(
@@ -225,79 +363,25 @@ async def execute_computation_job(
     if not job:
         raise HTTPException(status_code=404, detail="Computation job not found")
     
-    # Create a new task for this execution
+    # Create a new task for this execution; workers lease it from the queue
     task = ComputationTask(
         job_id=job_id,
         name=f"Execution of {job.name}",
-        task_type=job.job_type,
+        task_type="job",
         config=execution_request.config or job.config,
-        status=Status.PENDING,
+        max_attempts=job.max_retries + 1 if job.max_retries is not None else None,
         created_by=current_user.id,
         organization_id=current_user.organization_id
     )
-    
-    db.add(task)
-    await db.commit()
-    await db.refresh(task)
-    
-    # Add background task to execute the job
-    background_tasks.add_task(execute_job_task, task.id, db)
+    task = await job_queue.enqueue(db, task, priority=execution_request.priority)
     
     return {
-        "message": "Job execution started",
+        "message": "Job execution queued",
         "task_id": task.id,
         "status": task.status
     }
 
 
-async def execute_job_task(task_id: int, db: AsyncSession):
-    """Background task to execute a computation job."""
-    # This is a simplified implementation
-    # In a real system, you'd want to use a proper task queue like Celery
-    
-    task = await db.execute(
-        select(ComputationTask).where(ComputationTask.id == task_id)
-    )
-    task = task.scalar_one_or_none()
-    
-    if not task:
-        return
-    
-    try:
-        # Update task status to running
-        task.status = Status.RUNNING
-        task.started_at = datetime.utcnow()
-        await db.commit()
-        
-        # Simulate job execution
-        await asyncio.sleep(5)  # Simulate work
-        
-        # Update task status to completed
-        task.status = Status.SUCCESS
-        task.completed_at = datetime.utcnow()
-        task.result = {"message": "Job completed successfully"}
-        
-        # Create computation result
-        result = ComputationResult(
-            task_id=task_id,
-            job_id=task.job_id,
-            result_type="success",
-            data=task.result,
-            created_by=task.created_by,
-            organization_id=task.organization_id
-        )
-        
-        db.add(result)
-        await db.commit()
-        
-    except Exception as e:
-        # Update task status to failed
-        task.status = Status.FAILED
-        task.completed_at = datetime.utcnow()
-        task.error_message = str(e)
-        await db.commit()
-
-
 @router.post("/pipelines", response_model=ComputationPipelineResponse)
 async def create_computation_pipeline(
     pipeline: ComputationPipelineCreate,
@@ -327,7 +411,7 @@ async def create_computation_pipeline(
 @router.get("/pipelines", response_model=List[ComputationPipelineResponse])
 async def list_computation_pipelines(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List all computation pipelines."""
     await require_permission(current_user, "computation:read")
@@ -346,11 +430,10 @@ async def list_computation_pipelines(
 async def execute_computation_pipeline(
     pipeline_id: int,
     execution_request: PipelineExecutionRequest,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Execute a computation pipeline."""
+    """Queue a computation pipeline for execution by the worker pool."""
     await require_permission(current_user, "computation:execute")
     
     pipeline = await db.execute(
@@ -366,83 +449,67 @@ async def execute_computation_pipeline(
     if not pipeline:
         raise HTTPException(status_code=404, detail="Computation pipeline not found")
     
+    # Reject dependency graphs that could never finish before queueing anything
+    try:
+        topological_order({
+            step.get('name'): step.get('dependencies') or [] for step in pipeline.steps
+        })
+    except PipelineGraphError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # The pipeline run is the queued task; its steps are driven by whichever worker leases it
+    run = ComputationTask(
+        name=f"Execution of pipeline {pipeline.name}",
+        task_type="pipeline",
+        config={
+            "pipeline_id": pipeline_id,
+            "parallel": execution_request.parallel,
+            "parameters": execution_request.parameters or {},
+            **(execution_request.config or {})
+        },
+        created_by=current_user.id,
+        organization_id=current_user.organization_id
+    )
+    db.add(run)
+    await db.flush()
+    
     # Create tasks for each pipeline step
     tasks = []
     for i, step in enumerate(pipeline.steps):
         task = ComputationTask(
-            job_id=None,  # Pipeline tasks don't have a job_id
+            parent_id=run.id,
             name=f"{pipeline.name} - Step {i+1}: {step.get('name', 'Unknown')}",
-            task_type=step.get('type', 'custom'),
-            config=step.get('config', {}),
-            status=Status.PENDING,
+            task_type="pipeline_step",
+            config={
+                "name": step.get('name'),
+                "type": step.get('type', 'custom'),
+                "dependencies": step.get('dependencies') or [],
+                "config": step.get('config', {})
+            },
+            status=JobStatus.PENDING,
             created_by=current_user.id,
             organization_id=current_user.organization_id
         )
         tasks.append(task)
     
     db.add_all(tasks)
-    await db.commit()
-    
-    # Refresh tasks to get IDs
-    for task in tasks:
-        await db.refresh(task)
-    
-    # Add background task to execute the pipeline
-    background_tasks.add_task(execute_pipeline_task, [t.id for t in tasks], db)
+    run = await job_queue.enqueue(db, run)
     
     return {
-        "message": "Pipeline execution started",
+        "message": "Pipeline execution queued",
+        "run_id": run.id,
         "task_ids": [t.id for t in tasks],
         "total_steps": len(tasks)
     }
 
 
-async def execute_pipeline_task(task_ids: List[int], db: AsyncSession):
-    """Background task to execute a computation pipeline."""
-    # This is a simplified implementation
-    # In a real system, you'd want proper pipeline orchestration
-    
-    for task_id in task_ids:
-        task = await db.execute(
-            select(ComputationTask).where(ComputationTask.id == task_id)
-        )
-        task = task.scalar_one_or_none()
-        
-        if not task:
-            continue
-        
-        try:
-            # Update task status to running
-            task.status = Status.RUNNING
-            task.started_at = datetime.utcnow()
-            await db.commit()
-            
-            # Simulate step execution
-            await asyncio.sleep(3)  # Simulate work
-            
-            # Update task status to completed
-            task.status = Status.SUCCESS
-            task.completed_at = datetime.utcnow()
-            task.result = {"message": f"Step {task.name} completed successfully"}
-            
-            await db.commit()
-            
-        except Exception as e:
-            # Update task status to failed
-            task.status = Status.FAILED
-            task.completed_at = datetime.utcnow()
-            task.error_message = str(e)
-            await db.commit()
-            break  # Stop pipeline on first failure
-
-
 @router.get("/tasks", response_model=PaginatedResponse[ComputationTaskResponse])
 async def list_computation_tasks(
     pagination: PaginationParams = Depends(),
     status: Optional[Status] = Query(None),
     job_id: Optional[int] = Query(None),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List computation tasks with filtering."""
     await require_permission(current_user, "computation:read")
@@ -463,7 +530,7 @@ async def list_computation_tasks(
     tasks = result.scalars().all()
     
     # Get total count
-    count_query = select(ComputationTask).where(
+    count_query = select(func.count(ComputationTask.id)).where(
         ComputationTask.organization_id == current_user.organization_id
     )
     if status:
@@ -472,7 +539,7 @@ async def list_computation_tasks(
         count_query = count_query.where(ComputationTask.job_id == job_id)
     
     count_result = await db.execute(count_query)
-    total_count = len(count_result.scalars().all())
+    total_count = count_result.scalar_one()
     
     return PaginatedResponse(
         items=[ComputationTaskResponse.from_orm(t) for t in tasks],
@@ -487,7 +554,7 @@ async def list_computation_tasks(
 async def get_computation_task(
     task_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific computation task."""
     await require_permission(current_user, "computation:read")
@@ -508,6 +575,44 @@ async def get_computation_task(
     return ComputationTaskResponse.from_orm(task)
 
 
+@router.get("/tasks/{task_id}/events")
+async def stream_computation_task_events(
+    task_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream a computation task's status as server-sent events."""
+    await require_permission(current_user, "computation:read")
+    
+    # A short-lived session on the primary: a dependency session would hold its
+    # connection until the stream ends, and a lagging replica would send a stale snapshot
+    async with AsyncSessionLocal() as db:
+        task = await db.execute(
+            select(ComputationTask).where(
+                and_(
+                    ComputationTask.id == task_id,
+                    ComputationTask.organization_id == current_user.organization_id
+                )
+            )
+        )
+        task = task.scalar_one_or_none()
+        
+        if not task:
+            raise HTTPException(status_code=404, detail="Computation task not found")
+        
+        # Subscribe before reading the snapshot so no change falls in between
+        key = str(task.id)
+        queue = await status_broker.subscribe("task", key)
+        try:
+            await db.refresh(task)
+            snapshot = task_event(task)
+        except Exception:
+            status_broker.unsubscribe("task", key, queue)
+            raise
+    
+    return _event_response(_status_stream(request, "task", key, queue, snapshot))
+
+
 @router.get("/results", response_model=PaginatedResponse[ComputationResultResponse])
 async def list_computation_results(
     pagination: PaginationParams = Depends(),
@@ -515,7 +620,7 @@ async def list_computation_results(
     job_id: Optional[int] = Query(None),
     result_type: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List computation results with filtering."""
     await require_permission(current_user, "computation:read")
@@ -538,7 +643,7 @@ async def list_computation_results(
     results = result.scalars().all()
     
     # Get total count
-    count_query = select(ComputationResult).where(
+    count_query = select(func.count(ComputationResult.id)).where(
         ComputationResult.organization_id == current_user.organization_id
     )
     if task_id:
@@ -549,7 +654,7 @@ async def list_computation_results(
         count_query = count_query.where(ComputationResult.result_type == result_type)
     
     count_result = await db.execute(count_query)
-    total_count = len(count_result.scalars().all())
+    total_count = count_result.scalar_one()
     
     return PaginatedResponse(
         items=[ComputationResultResponse.from_orm(r) for r in results],
@@ -560,10 +665,35 @@ async def list_computation_results(
     )
 
 
+@router.get("/results/{result_id}/data")
+async def get_computation_result_data(
+    result_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get a computation result's full data, downloading it if it was offloaded."""
+    await require_permission(current_user, "computation:read")
+    
+    result = await db.execute(
+        select(ComputationResult.data).where(
+            and_(
+                ComputationResult.id == result_id,
+                ComputationResult.organization_id == current_user.organization_id
+            )
+        )
+    )
+    result = result.one_or_none()
+    
+    if not result:
+        raise HTTPException(status_code=404, detail="Computation result not found")
+    
+    return await load(result.data)
+
+
 @router.get("/dashboard")
 async def get_computation_dashboard(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get computation dashboard data."""
     await require_permission(current_user, "computation:read")
@@ -6,7 +6,7 @@ import asyncio
 import json
 from datetime import datetime, timedelta
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..auth import get_current_user, require_permission
 from ..models.feature import Feature, FeatureValue
 from ..models.user import User
@@ -158,7 +158,7 @@ async def list_feature_values(
     start_timestamp: Optional[datetime] = Query(None, description="Start timestamp filter"),
     end_timestamp: Optional[datetime] = Query(None, description="End timestamp filter"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List feature values with filtering and pagination."""
     await require_permission(current_user, "feature_values:read")
@@ -217,7 +217,7 @@ async def list_feature_values(
 async def get_feature_value(
     feature_value_id: int,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific feature value by ID."""
     await require_permission(current_user, "feature_values:read")
@@ -307,7 +307,7 @@ async def delete_feature_value(
 async def serve_feature_values(
     query: FeatureValueQuery,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Serve feature values for online inference."""
     await require_permission(current_user, "feature_values:read")
@@ -369,7 +369,7 @@ async def get_feature_value_stats(
     start_timestamp: Optional[datetime] = Query(None),
     end_timestamp: Optional[datetime] = Query(None),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get statistics for a feature's values."""
     await require_permission(current_user, "feature_values:read")
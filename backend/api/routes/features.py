@@ -5,7 +5,7 @@ from sqlalchemy import select, and_, or_, func
 from sqlalchemy.orm import selectinload
 import structlog
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..auth import get_current_user, get_organization_context, require_permission
 from ..models.base import APIResponse, PaginatedResponse
 from models import Feature, FeatureVersion, FeatureValue
@@ -117,7 +117,7 @@ async def list_features(
     tags: Optional[str] = Query(None, description="Filter by tags (comma-separated)"),
     owner: Optional[str] = Query(None, description="Filter by owner"),
     context: Dict[str, Any] = Depends(get_organization_context),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List features with pagination and filtering."""
     try:
@@ -206,7 +206,7 @@ async def list_features(
 async def get_feature(
     feature_id: str,
     context: Dict[str, Any] = Depends(get_organization_context),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a specific feature by ID."""
     try:
@@ -364,7 +364,7 @@ async def delete_feature(
 async def get_feature_versions(
     feature_id: str,
     context: Dict[str, Any] = Depends(get_organization_context),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all versions of a feature."""
     try:
@@ -427,7 +427,7 @@ async def get_feature_versions(
 async def get_feature_stats(
     feature_id: str,
     context: Dict[str, Any] = Depends(get_organization_context),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get feature statistics."""
     try:
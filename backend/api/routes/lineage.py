@@ -1,9 +1,130 @@
-from fastapi import APIRouter
+from typing import List, Optional, Dict, Any, Set, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_read_db
+from ..auth import get_current_user, require_permission
+from ..config import settings
+from ..models.user import User
+from models.lineage import LineageType
+from services.lineage_graph import DOWNSTREAM, UPSTREAM, LineageIndex, lineage_graph, traverse
 
 router = APIRouter()
 
-# TODO: Implement lineage routes
-# - Feature lineage tracking
-# - Data lineage
-# - Model lineage
-# - Lineage visualization 
\ No newline at end of file
+
+def _graph_response(graph: Dict[str, Any], index: LineageIndex, **metadata) -> Dict[str, Any]:
+    return {
+        **graph,
+        "metadata": {
+            **metadata,
+            "node_count": len(graph["nodes"]),
+            "edge_count": len(graph["edges"]),
+            "total_nodes": len(index.nodes),
+            "total_edges": len(index.edges),
+        },
+    }
+
+
+def _lineage_types(lineage_type: Optional[List[LineageType]]) -> Optional[Set[str]]:
+    return {value.value for value in lineage_type} if lineage_type else None
+
+
+async def _load_lineage(
+    db: AsyncSession,
+    current_user: User,
+    node_type: str,
+    node_id: str,
+    direction: str,
+    max_depth: Optional[int],
+    lineage_types: Optional[Set[str]]
+) -> Tuple[str, LineageIndex]:
+    """The start node and an index covering its lineage in ``direction``."""
+    if settings.LINEAGE_TRAVERSAL == "sql":
+        directions = (UPSTREAM, DOWNSTREAM) if direction == "both" else (direction,)
+        node, index = None, LineageIndex()
+        for side in directions:
+            start, walked = await traverse(
+                db, current_user.organization_id, node_type, node_id, side, max_depth, lineage_types
+            )
+            if node is None or walked.edges:
+                node = start
+            index.merge(walked)
+        return node, index
+
+    index = await lineage_graph.get_index(db, current_user.organization_id)
+    node = index.resolve(node_type, node_id)
+    if node is None:
+        raise HTTPException(status_code=404, detail="Lineage node not found")
+    return node, index
+
+
+@router.get("/graph")
+async def get_lineage_graph(
+    limit: int = Query(1000, ge=1, le=10000),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get the organization's lineage graph, up to ``limit`` nodes."""
+    await require_permission(current_user, "lineage:read")
+
+    index = await lineage_graph.get_index(db, current_user.organization_id)
+    graph = index.subgraph(sorted(index.nodes)[:limit])
+    return _graph_response(graph, index, truncated=len(index.nodes) > limit)
+
+
+@router.get("/graph/{node_type}/{node_id}")
+async def get_node_lineage_graph(
+    node_type: str,
+    node_id: str,
+    direction: str = Query("both", regex="^(upstream|downstream|both)$"),
+    max_depth: Optional[int] = Query(None, ge=1),
+    lineage_type: Optional[List[LineageType]] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get the lineage graph around one feature, dataset or model."""
+    await require_permission(current_user, "lineage:read")
+
+    lineage_types = _lineage_types(lineage_type)
+    node, index = await _load_lineage(db, current_user, node_type, node_id, direction, max_depth, lineage_types)
+
+    graph = index.neighborhood(node, direction, max_depth, lineage_types)
+    return _graph_response(graph, index, node_id=node, direction=direction, max_depth=max_depth)
+
+
+@router.get("/impact/{node_id}")
+async def get_lineage_impact(
+    node_id: str,
+    node_type: str = Query("feature"),
+    max_depth: Optional[int] = Query(None, ge=1),
+    lineage_type: Optional[List[LineageType]] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get everything downstream of a node that a change to it would affect."""
+    await require_permission(current_user, "lineage:read")
+
+    lineage_types = _lineage_types(lineage_type)
+    node, index = await _load_lineage(db, current_user, node_type, node_id, DOWNSTREAM, max_depth, lineage_types)
+
+    return index.impact(node, max_depth, lineage_types)
+
+
+@router.get("/trace/{node_id}")
+async def get_lineage_trace(
+    node_id: str,
+    node_type: str = Query("feature"),
+    max_depth: Optional[int] = Query(None, ge=1),
+    lineage_type: Optional[List[LineageType]] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Trace a node back through everything it is derived from."""
+    await require_permission(current_user, "lineage:read")
+
+    lineage_types = _lineage_types(lineage_type)
+    node, index = await _load_lineage(db, current_user, node_type, node_id, UPSTREAM, max_depth, lineage_types)
+
+    trace = index.trace(node, max_depth, lineage_types)
+    trace["metadata"] = {"max_depth": max_depth, "upstream_count": len(trace["trace_path"])}
+    return trace
@@ -5,7 +5,7 @@ from sqlalchemy import select, and_, func, desc
 from datetime import datetime, timedelta
 import json
 
-from ..database import get_db
+from ..database import get_db, get_read_db
 from ..auth import get_current_user, require_permission
 from ..models.monitoring import (
     DataQualityMetric,
@@ -70,7 +70,7 @@ async def list_data_quality_metrics(
     start_timestamp: Optional[datetime] = Query(None),
     end_timestamp: Optional[datetime] = Query(None),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List data quality metrics with filtering."""
     await require_permission(current_user, "monitoring:read")
@@ -158,7 +158,7 @@ async def list_performance_metrics(
     start_timestamp: Optional[datetime] = Query(None),
     end_timestamp: Optional[datetime] = Query(None),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List performance metrics with filtering."""
     await require_permission(current_user, "monitoring:read")
@@ -243,7 +243,7 @@ async def list_alerts(
     start_timestamp: Optional[datetime] = Query(None),
     end_timestamp: Optional[datetime] = Query(None),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List alerts with filtering."""
     await require_permission(current_user, "monitoring:read")
@@ -357,7 +357,7 @@ async def create_alert_rule(
 @router.get("/alert-rules", response_model=List[AlertRuleResponse])
 async def list_alert_rules(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List all alert rules."""
     await require_permission(current_user, "monitoring:read")
@@ -375,7 +375,7 @@ async def list_alert_rules(
 @router.get("/dashboard", response_model=MonitoringDashboard)
 async def get_monitoring_dashboard(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get monitoring dashboard data."""
     await require_permission(current_user, "monitoring:read")
@@ -451,7 +451,7 @@ async def get_monitoring_dashboard(
 @router.get("/health", response_model=HealthCheckResponse)
 async def get_system_health(
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get system health status."""
     await require_permission(current_user, "monitoring:read")
@@ -491,7 +491,7 @@ async def get_metric_data(
     end_timestamp: datetime = Query(...),
     interval: str = Query("1h", description="Time interval for aggregation"),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get time series data for a specific metric."""
     await require_permission(current_user, "monitoring:read")
@@ -1,4 +1,10 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.auth import AuthService, get_current_user
+from api.database import get_db
+from models.user import User
 
 router = APIRouter()
 
@@ -6,4 +12,19 @@ router = APIRouter()
 # - User registration
 # - User authentication
 # - User profile management
-# - API key management 
\ No newline at end of file
+
+
+@router.post("/me/api-key")
+async def create_api_key(
+    expires_in_days: Optional[int] = Query(None, ge=1, description="Days until the key expires"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Issue a new API key for the current user, replacing any existing key. The key is shown only once."""
+    user = await db.get(User, current_user.id)
+    api_key = await AuthService.issue_api_key(db, user, expires_in_days)
+    return {
+        "api_key": api_key,
+        "created_at": user.api_key_created_at,
+        "expires_at": user.api_key_expires_at
+    }
@@ -0,0 +1,122 @@
+"""
+Per-request overhead of the middleware stack.
+
+Drives ASGI apps in-process, without a server or sockets, and reports the
+mean time per request for:
+
+* ``bare``: the route with no middleware;
+* ``base_http``: five pass-through ``BaseHTTPMiddleware`` layers, the shape
+  of the previous stack with none of its work;
+* ``asgi``: the current pure-ASGI stack from ``create_middleware_stack``,
+  doing its real work (logging calls, metrics, rate limiting, headers).
+
+Logging is filtered out so that log I/O is not part of the measurement.
+
+Run from the backend directory::
+
+    python -m benchmarks.middleware_overhead --requests 20000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import structlog
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from api.middleware import create_middleware_stack
+from services.rate_limiter import TokenBucket, rate_limiter
+
+ORGANIZATION_ID = "benchmark-org"
+
+
+async def ping(request):
+    return PlainTextResponse("pong")
+
+
+def bare_app():
+    return Starlette(routes=[Route("/ping", ping)])
+
+
+class PassThrough(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+def base_http_app():
+    app = bare_app()
+    for _ in range(5):
+        app.add_middleware(PassThrough)
+    return app
+
+
+def asgi_app():
+    return create_middleware_stack(bare_app())
+
+
+async def measure(app, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"benchmark"), (b"x-organization-id", ORGANIZATION_ID.encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+
+    request = {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def run_once():
+        received = False
+
+        async def receive():
+            nonlocal received
+            if received:
+                # Stay connected until the response is done
+                await asyncio.Event().wait()
+            received = True
+            return request
+
+        await app(dict(scope, state={}), receive, send)
+
+    for _ in range(min(requests, 500)):  # warm up
+        await run_once()
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await run_once()
+    return (time.perf_counter() - started) / requests
+
+
+async def main(requests: int):
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+    # A bucket large enough that no benchmark request is rejected
+    rate_limiter.set_plans({ORGANIZATION_ID: "enterprise"})
+    rate_limiter.buckets[ORGANIZATION_ID] = TokenBucket(10 ** 12, time.monotonic())
+
+    results = {}
+    for name, factory in (("bare", bare_app), ("base_http", base_http_app), ("asgi", asgi_app)):
+        results[name] = await measure(factory(), requests)
+
+    for name, seconds in results.items():
+        overhead = seconds - results["bare"]
+        print(f"{name:>10}: {seconds * 1e6:8.1f} us/request  (+{overhead * 1e6:7.1f} us middleware)")
+    await rate_limiter.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args().requests))
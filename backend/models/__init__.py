@@ -1,9 +1,9 @@
 from .base import Base
 from .feature import Feature, FeatureVersion, FeatureValue
-from .user import User, Organization, Role, Permission
+from .user import User, Organization, Role, Permission, UserRole, RolePermission
 from .monitoring import FeatureDrift, DataQuality, MonitoringAlert
-from .computation import FeatureComputation, ComputationJob
-from .lineage import FeatureLineage, DataSource
+from .computation import FeatureComputation, ComputationJob, ComputationTask, ComputationResult, JobResourceSample, SchedulerLease, DataSource
+from .lineage import FeatureLineage, DataLineage, ModelLineage
 
 __all__ = [
     "Base",
@@ -14,11 +14,19 @@ __all__ = [
     "Organization",
     "Role",
     "Permission",
+    "UserRole",
+    "RolePermission",
     "FeatureDrift",
     "DataQuality",
     "MonitoringAlert",
     "FeatureComputation",
     "ComputationJob",
+    "ComputationTask",
+    "ComputationResult",
+    "JobResourceSample",
+    "SchedulerLease",
     "FeatureLineage",
+    "DataLineage",
+    "ModelLineage",
     "DataSource"
 ] 
\ No newline at end of file
@@ -4,12 +4,12 @@ from sqlalchemy import (
     Column, String, Text, JSON, Float, Integer, DateTime, 
     ForeignKey, Index, Boolean, Enum as SQLEnum
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, backref
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from enum import Enum
 
-from .base import Base, BaseModelMixin, PydanticBaseModel, Field
+from .base import Base, BaseModelMixin, TimestampMixin, PydanticBaseModel, Field
 
 class JobStatus(str, Enum):
     """Computation job status."""
@@ -61,6 +61,7 @@ class FeatureComputation(Base, BaseModelMixin):
     is_active = Column(Boolean, default=True)
     last_run_at = Column(DateTime, nullable=True)
     next_run_at = Column(DateTime, nullable=True)
+    watermarks = Column(JSON, nullable=True)  # Per-source high-watermarks for incremental runs
     
     # Relationships
     feature = relationship("Feature")
@@ -128,6 +129,91 @@ class ComputationJob(Base, BaseModelMixin):
         Index('idx_job_external', 'job_id'),
     )
 
+class ComputationTask(Base, BaseModelMixin):
+    """Queued unit of work leased and executed by computation workers."""
+    __tablename__ = "computation_tasks"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("computation_jobs.id"), nullable=True)
+    parent_id = Column(UUID(as_uuid=True), ForeignKey("computation_tasks.id"), nullable=True)
+    
+    # Task definition
+    name = Column(String(255), nullable=False)
+    task_type = Column(String(100), nullable=False)  # "job", "pipeline", "pipeline_step"
+    config = Column(JSON, nullable=True)
+    
+    # Execution state
+    status = Column(SQLEnum(JobStatus), default=JobStatus.PENDING, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    result = Column(JSON, nullable=True)
+    error_message = Column(Text, nullable=True)
+    
+    # Queue bookkeeping
+    priority = Column(Integer, default=0)
+    available_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    lease_owner = Column(String(255), nullable=True)  # Worker ID holding the lease
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    job = relationship("ComputationJob")
+    steps = relationship("ComputationTask", backref=backref("parent", remote_side=[id]))
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_task_queue', 'status', 'available_at'),
+        Index('idx_task_lease', 'status', 'lease_expires_at'),
+        Index('idx_task_job', 'job_id'),
+        Index('idx_task_parent', 'parent_id'),
+    )
+
+class ComputationResult(Base, BaseModelMixin):
+    """Result produced by a completed computation task."""
+    __tablename__ = "computation_results"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    task_id = Column(UUID(as_uuid=True), ForeignKey("computation_tasks.id"), nullable=False)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("computation_jobs.id"), nullable=True)
+    
+    result_type = Column(String(100), nullable=False)  # "success", "feature_values", ...
+    data = Column(JSON, nullable=True)
+    
+    # Relationships
+    task = relationship("ComputationTask")
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_result_task', 'task_id'),
+        Index('idx_result_job', 'job_id'),
+    )
+
+class JobResourceSample(Base):
+    """CPU and memory in use by a computation job over one sampling interval."""
+    __tablename__ = "job_resource_samples"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("computation_jobs.id"), nullable=False)
+    organization_id = Column(String(36), nullable=False)
+    sampled_at = Column(DateTime, nullable=False)
+    cpu_cores = Column(Float, nullable=False)  # Cores kept busy over the interval
+    memory_gb = Column(Float, nullable=False)  # Resident memory across the job's processes
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_resource_sample_job', 'job_id', 'sampled_at'),
+    )
+
+class SchedulerLease(Base, TimestampMixin):
+    """Time-limited leadership lease so only one replica runs a singleton loop."""
+    __tablename__ = "scheduler_leases"
+    
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(255), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
 class DataSource(Base, BaseModelMixin):
     """Data source configuration model."""
     __tablename__ = "data_sources"
@@ -203,6 +289,7 @@ class FeatureComputationResponse(PydanticBaseModel):
     is_active: bool
     last_run_at: Optional[datetime]
     next_run_at: Optional[datetime]
+    watermarks: Optional[Dict[str, Any]] = None
     created_at: datetime
     updated_at: datetime
 
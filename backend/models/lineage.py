@@ -53,7 +53,7 @@ class FeatureLineage(Base, BaseModelMixin):
     verification_method = Column(String(100), nullable=True)
     
     # Additional context
-    metadata = Column(JSON, nullable=True)  # Additional lineage metadata
+    lineage_metadata = Column("metadata", JSON, nullable=True)  # Additional lineage metadata; "metadata" is reserved on declarative models
     tags = Column(JSON, default=list)
     
     # Relationships
@@ -64,6 +64,8 @@ class FeatureLineage(Base, BaseModelMixin):
     __table_args__ = (
         Index('idx_lineage_source', 'source_type', 'source_id'),
         Index('idx_lineage_target', 'target_type', 'target_id'),
+        Index('idx_lineage_source_name', 'source_type', 'source_name'),
+        Index('idx_lineage_target_name', 'target_type', 'target_name'),
         Index('idx_lineage_type', 'lineage_type'),
         Index('idx_lineage_status', 'status'),
         Index('idx_lineage_confidence', 'confidence_score'),
@@ -135,9 +137,6 @@ class ModelLineage(Base, BaseModelMixin):
     deployment_environment = Column(String(100), nullable=True)
     deployment_timestamp = Column(DateTime, nullable=True)
     
-    # Relationships
-    feature_lineages = relationship("FeatureLineage", backref="model_lineage")
-    
     # Indexes
     __table_args__ = (
         Index('idx_model_lineage_name', 'model_name', 'model_version'),
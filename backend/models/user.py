@@ -23,6 +23,7 @@ class PermissionType(str, Enum):
     READ = "read"
     WRITE = "write"
     DELETE = "delete"
+    EXECUTE = "execute"
     ADMIN = "admin"
 
 class ResourceType(str, Enum):
@@ -33,6 +34,7 @@ class ResourceType(str, Enum):
     USER = "user"
     MONITORING = "monitoring"
     COMPUTATION = "computation"
+    LINEAGE = "lineage"
 
 class Organization(Base, BaseModelMixin):
     """Organization model for multi-tenancy."""
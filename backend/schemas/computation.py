@@ -71,6 +71,16 @@ class ComputationJobResponse(BaseModel):
         from_attributes = True
 
 
+class JobResourceSampleResponse(BaseModel):
+    """Schema for one interval of a job's resource usage."""
+    sampled_at: datetime
+    cpu_cores: float
+    memory_gb: float
+
+    class Config:
+        from_attributes = True
+
+
 class ComputationPipelineCreate(BaseModel):
     """Schema for creating a computation pipeline."""
     name: str = Field(..., description="Pipeline name")
@@ -93,6 +103,9 @@ class ComputationPipelineCreate(BaseModel):
                 raise ValueError('Each step must be a dictionary')
             if 'name' not in step or 'type' not in step:
                 raise ValueError('Each step must have name and type')
+        names = [step['name'] for step in v]
+        if len(names) != len(set(names)):
+            raise ValueError('Step names must be unique')
         return v
 
 
@@ -0,0 +1,92 @@
+"""
+Coalesced user activity timestamps.
+
+Requests authenticated with an API key used to commit ``last_activity_at``
+on every request. They now only record the time in memory. Every
+``ACTIVITY_FLUSH_SECONDS`` a background task writes the latest timestamp of
+each active user with one bulk ``UPDATE``. A user making thousands of
+requests between flushes therefore costs one row update per interval. If a
+flush fails, its timestamps are kept and written with the next one, unless a
+newer one has been recorded meanwhile. Whatever is pending is flushed on
+shutdown.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+import asyncio
+import structlog
+from sqlalchemy import update
+
+from api.config import settings
+from api.database import AsyncSessionLocal
+from models.user import User
+
+logger = structlog.get_logger()
+
+
+class ActivityRecorder:
+    """Buffers ``last_activity_at`` per user and writes them in batches."""
+
+    def __init__(self, flush_seconds: Optional[float] = None):
+        self.flush_seconds = flush_seconds or settings.ACTIVITY_FLUSH_SECONDS
+        self.pending: Dict[Any, datetime] = {}  # user id -> latest activity
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def record(self, user_id: Any, at: Optional[datetime] = None):
+        """Record activity for a user; written on the next flush."""
+        self.pending[user_id] = at or datetime.utcnow()
+        self._ensure_flush()
+
+    def _ensure_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._flush_loop())
+            except RuntimeError:
+                pass
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Activity flush failed", error=str(e))
+
+    async def flush(self):
+        """Write every pending timestamp with one bulk update."""
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        # Sorted by id so that concurrent flushes from several processes lock rows in the same order
+        rows = [
+            {"id": user_id, "last_activity_at": at}
+            for user_id, at in sorted(pending.items(), key=lambda item: str(item[0]))
+        ]
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(update(User), rows)
+                await db.commit()
+        except Exception:
+            for user_id, at in pending.items():
+                self.pending.setdefault(user_id, at)
+            raise
+
+    async def close(self):
+        """Stop the flush task and write what is pending."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning("Final activity flush failed", error=str(e), users=len(self.pending))
+
+
+# Shared recorder; one flush task per process
+activity_recorder = ActivityRecorder()
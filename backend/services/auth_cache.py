@@ -0,0 +1,174 @@
+"""
+Per-process cache for request authentication.
+
+Without it, every authenticated request decodes its JWT, loads the ``User``
+and, for routes that need the organization context, loads the
+``Organization``. Each API process now keeps four small LRU maps:
+
+* verified token claims, keyed by the raw token. An entry expires after
+  ``AUTH_CACHE_TTL_SECONDS`` or when the token itself expires, whichever
+  comes first;
+* users and organizations, keyed by id, for ``AUTH_CACHE_TTL_SECONDS``.
+  Records are detached from the session that loaded them, so one instance can
+  be shared by concurrent requests. Only column attributes are available on
+  them;
+* API keys, keyed by their HMAC (``AuthService.hash_api_key``), mapped to
+  the user id. ``User.api_key`` only ever holds that HMAC, and only the HMAC
+  of the presented key is compared with it, so the stored value is not itself
+  a key. A hit is confirmed against the cached user's ``api_key``, so a
+  rotated key stops matching as soon as the user is evicted.
+
+The user's status is still checked on every request, against the cached
+record. A commit in this process that changes a user or an organization
+evicts it through session hooks. Activity timestamps are the exception:
+those writes happen on every login and API-key request and change nothing
+auth depends on. Changes committed by other processes are picked up once the
+TTL runs out.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import hmac
+import time
+import structlog
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from api.config import settings
+from models.user import Organization, User
+
+logger = structlog.get_logger()
+
+# Written on every login and API-key request; they do not affect authentication
+ACTIVITY_COLUMNS = {"last_login_at", "last_activity_at", "updated_at"}
+
+
+class AuthCache:
+    """Verified token claims and user/organization records, cached for a short TTL."""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_size: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.AUTH_CACHE_TTL_SECONDS
+        self.max_size = max_size or settings.AUTH_CACHE_SIZE
+        self.claims: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.users: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+        self.organizations: "OrderedDict[str, Tuple[Organization, float]]" = OrderedDict()
+        self.api_keys: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()  # key hash -> user id
+
+    def _get(self, entries: OrderedDict, key: str) -> Any:
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.time() >= expires_at:
+            del entries[key]
+            return None
+        entries.move_to_end(key)
+        return value
+
+    def _put(self, entries: OrderedDict, key: str, value: Any, expires_at: float):
+        entries[key] = (value, expires_at)
+        entries.move_to_end(key)
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
+
+    def get_claims(self, token: str) -> Optional[Dict[str, Any]]:
+        """Claims of a token verified earlier, if still cached."""
+        return self._get(self.claims, token)
+
+    def set_claims(self, token: str, payload: Dict[str, Any]):
+        """Cache the claims of a verified token, never past its own expiry."""
+        expires_at = time.time() + self.ttl_seconds
+        if payload.get("exp") is not None:
+            expires_at = min(expires_at, float(payload["exp"]))
+        self._put(self.claims, token, payload, expires_at)
+
+    async def get_user(self, db: AsyncSession, user_id: str) -> Optional[User]:
+        """A user by id, from the cache or the database."""
+        user = self._get(self.users, str(user_id))
+        if user is None:
+            result = await db.execute(select(User).where(User.id == user_id))
+            user = result.scalar_one_or_none()
+            if user is not None:
+                db.expunge(user)
+                self._put(self.users, str(user_id), user, time.time() + self.ttl_seconds)
+        return user
+
+    async def get_api_key_user(self, db: AsyncSession, key_hash: str) -> Optional[User]:
+        """The user whose stored API key hash is ``key_hash``, from the cache or the database."""
+        user_id = self._get(self.api_keys, key_hash)
+        if user_id is not None:
+            user = await self.get_user(db, user_id)
+            if user is not None and user.api_key is not None and hmac.compare_digest(user.api_key, key_hash):
+                return user
+            self.api_keys.pop(key_hash, None)
+
+        result = await db.execute(select(User).where(User.api_key == key_hash))
+        user = result.scalar_one_or_none()
+        if user is not None:
+            db.expunge(user)
+            expires_at = time.time() + self.ttl_seconds
+            self._put(self.users, str(user.id), user, expires_at)
+            self._put(self.api_keys, key_hash, str(user.id), expires_at)
+        return user
+
+    async def get_organization(self, db: AsyncSession, organization_id: str) -> Optional[Organization]:
+        """An organization by id, from the cache or the database."""
+        organization = self._get(self.organizations, str(organization_id))
+        if organization is None:
+            result = await db.execute(select(Organization).where(Organization.id == organization_id))
+            organization = result.scalar_one_or_none()
+            if organization is not None:
+                db.expunge(organization)
+                self._put(self.organizations, str(organization_id), organization, time.time() + self.ttl_seconds)
+        return organization
+
+    def invalidate_user(self, user_id: str):
+        self.users.pop(str(user_id), None)
+
+    def invalidate_organization(self, organization_id: str):
+        self.organizations.pop(str(organization_id), None)
+
+    def clear(self):
+        self.claims.clear()
+        self.users.clear()
+        self.organizations.clear()
+        self.api_keys.clear()
+
+
+# Shared cache; entries live for AUTH_CACHE_TTL_SECONDS
+auth_cache = AuthCache()
+
+
+def _changes_auth(obj: Any) -> bool:
+    state = inspect(obj)
+    return any(
+        state.attrs[attr.key].history.has_changes()
+        for attr in state.mapper.column_attrs
+        if attr.key not in ACTIVITY_COLUMNS
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_auth_changes(session: Session, flush_context):
+    """Record users and organizations changed by a flush; they are evicted once committed."""
+    changed = session.info.setdefault("auth_changes", set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and (obj in session.deleted or _changes_auth(obj)):
+            changed.add(("user", str(obj.id)))
+        elif isinstance(obj, Organization) and (obj in session.deleted or _changes_auth(obj)):
+            changed.add(("organization", str(obj.id)))
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_auth_changes(session: Session):
+    for kind, key in session.info.pop("auth_changes", set()):
+        if kind == "user":
+            auth_cache.invalidate_user(key)
+        else:
+            auth_cache.invalidate_organization(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_auth_changes(session: Session):
+    session.info.pop("auth_changes", None)
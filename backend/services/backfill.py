@@ -0,0 +1,232 @@
+"""
+Checkpointed, resumable backfills for ``JobType.BACKFILL`` computations.
+
+The ``start``/``end`` range in the job spec is split into shards of
+``shard_hours`` (default ``BACKFILL_SHARD_HOURS``). Up to
+``max_parallel_shards`` shards are computed at a time on the local compute
+engine. Each shard's feature values are committed in the same transaction
+that records the shard in ``ComputationJob.checkpoint_data``::
+
+    {
+        "range": ["2026-01-01T00:00:00", "2026-02-12T16:00:00"],
+        "shard_hours": 1,
+        "shards": {
+            "2026-01-01T00:00:00": {"status": "completed", "records_output": 812},
+            "2026-02-07T11:00:00": {"status": "failed", "error": "..."}
+        }
+    }
+
+Each shard reads only its own time range: the range is pushed down to the
+source as filters, so Parquet row groups outside it are never read and memory
+grows with the shard, not with the source.
+
+A failing shard fails the attempt once the other shards have finished. When
+the task queue retries the job, or it is resumed after a crash, completed
+shards are skipped, so a failure at hour 900 of a 1,000-hour backfill only
+reruns what is left. Shards are not retried in place; the queue retries the
+job up to its ``max_retries`` with backoff, and ``retry_count`` records the
+attempt that is running.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import time
+import pandas as pd
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.config import settings
+from models.computation import ComputationJob, FeatureComputation, JobStatus
+from .local_executor import (
+    LocalComputeEngine, SUPPORTED_ENGINES, accumulate_usage, finish_job, load_input,
+    local_engine, new_usage_totals, resolve_input
+)
+
+logger = structlog.get_logger()
+
+
+def _naive_utc(value: Any) -> pd.Timestamp:
+    """Timestamps are stored as naive UTC; convert aware values to match."""
+    value = pd.Timestamp(value)
+    return value.tz_convert(None) if value.tzinfo else value
+
+
+def plan_shards(start: datetime, end: datetime, shard_hours: int) -> List[Tuple[datetime, datetime]]:
+    """Split ``[start, end)`` into consecutive shards of ``shard_hours``."""
+    if end <= start:
+        raise ValueError("Backfill end must be after start")
+    if shard_hours < 1:
+        raise ValueError("Backfill shard_hours must be at least 1")
+
+    step = timedelta(hours=shard_hours)
+    shards = []
+    shard_start = start
+    while shard_start < end:
+        shards.append((shard_start, min(shard_start + step, end)))
+        shard_start += step
+    return shards
+
+
+class BackfillRunner:
+    """Runs backfill jobs shard by shard, checkpointing each completed shard."""
+
+    def __init__(
+        self,
+        engine: Optional[LocalComputeEngine] = None,
+        max_parallel_shards: Optional[int] = None
+    ):
+        self.engine = engine or local_engine
+        self.max_parallel_shards = max_parallel_shards or settings.BACKFILL_MAX_PARALLEL_SHARDS
+
+    def load_checkpoint(self, job: ComputationJob, spec_range: List[str], shard_hours: int) -> Dict[str, Any]:
+        """Reuse the job's checkpoint if it describes the same range and sharding."""
+        checkpoint = job.checkpoint_data or {}
+        if checkpoint.get("range") == spec_range and checkpoint.get("shard_hours") == shard_hours:
+            return {**checkpoint, "shards": dict(checkpoint.get("shards") or {})}
+        return {"range": spec_range, "shard_hours": shard_hours, "shards": {}}
+
+    async def run(
+        self,
+        db: AsyncSession,
+        job: ComputationJob,
+        computation: FeatureComputation,
+        overrides: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Run the shards of ``job`` that have not completed yet."""
+        if computation.compute_engine not in SUPPORTED_ENGINES:
+            raise ValueError(f"Local executor does not support engine: {computation.compute_engine}")
+
+        spec = {**(computation.config or {}), **(job.input_data or {}), **(overrides or {})}
+        for key in ("entity_column", "timestamp_column", "start", "end"):
+            if key not in spec:
+                raise ValueError(f"Backfill config requires '{key}'")
+
+        start = _naive_utc(spec["start"]).to_pydatetime()
+        end = _naive_utc(spec["end"]).to_pydatetime()
+        shard_hours = int(spec.get("shard_hours", settings.BACKFILL_SHARD_HOURS))
+        shards = plan_shards(start, end, shard_hours)
+
+        checkpoint = self.load_checkpoint(job, [start.isoformat(), end.isoformat()], shard_hours)
+        pending = [
+            (shard_start, shard_end) for shard_start, shard_end in shards
+            if checkpoint["shards"].get(shard_start.isoformat(), {}).get("status") != "completed"
+        ]
+
+        spec = await resolve_input(db, computation.organization_id, spec)
+        started = time.monotonic()
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        job.checkpoint_data = checkpoint
+        job.progress_percentage = 100.0 * (len(shards) - len(pending)) / len(shards)
+        await db.commit()
+
+        logger.info(
+            "Backfill started",
+            job_id=job.job_id,
+            total_shards=len(shards),
+            pending_shards=len(pending)
+        )
+
+        totals = new_usage_totals()
+        if pending:
+            # One session is shared by all shards, so writes and checkpoints are serialized
+            write_lock = asyncio.Lock()
+            slots = asyncio.Semaphore(self.max_parallel_shards)
+
+            async def run_shard(shard_start: datetime, shard_end: datetime):
+                async with slots:
+                    await self._run_shard(
+                        db, job, computation, spec, checkpoint, totals, write_lock,
+                        shard_start, shard_end, len(shards)
+                    )
+
+            outcomes = await asyncio.gather(
+                *(run_shard(shard_start, shard_end) for shard_start, shard_end in pending),
+                return_exceptions=True
+            )
+            failed = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+            if failed:
+                raise RuntimeError(
+                    f"{len(failed)} of {len(shards)} backfill shards failed; "
+                    f"completed shards are checkpointed. First error: {failed[0]}"
+                )
+
+        totals["partitions"] = len(shards)
+        totals["records_output"] = sum(
+            shard.get("records_output", 0) for shard in checkpoint["shards"].values()
+        )
+        finish_job(db, job, computation, totals, time.monotonic() - started)
+        job.output_data = {
+            **job.output_data,
+            "shards": len(shards),
+            "shards_run": len(pending),
+            "shards_resumed": len(shards) - len(pending),
+        }
+        await db.commit()
+
+        logger.info("Backfill completed", job_id=job.job_id, shards=len(shards), shards_run=len(pending))
+        return job.output_data
+
+    async def _run_shard(
+        self,
+        db: AsyncSession,
+        job: ComputationJob,
+        computation: FeatureComputation,
+        spec: Dict[str, Any],
+        checkpoint: Dict[str, Any],
+        totals: Dict[str, Any],
+        write_lock: asyncio.Lock,
+        shard_start: datetime,
+        shard_end: datetime,
+        total_shards: int
+    ):
+        """Load, compute, write and checkpoint one shard; record it as failed if that raises."""
+        key = shard_start.isoformat()
+        timestamp_column = spec["timestamp_column"]
+        filters = [(timestamp_column, ">=", shard_start), (timestamp_column, "<", shard_end)]
+
+        try:
+            shard_frame = await asyncio.get_running_loop().run_in_executor(None, load_input, spec, filters)
+            results = []
+            if len(shard_frame):
+                async for result, stats, _, _ in self.engine.compute(shard_frame, computation, spec):
+                    results.append((result, stats))
+
+            async with write_lock:
+                try:
+                    written = 0
+                    for result, _ in results:
+                        written += await self.engine.write_values(db, result, computation, spec)
+
+                    checkpoint["shards"][key] = {
+                        "status": "completed",
+                        "records_output": written,
+                        "completed_at": datetime.utcnow().isoformat(),
+                    }
+                    completed = sum(1 for s in checkpoint["shards"].values() if s["status"] == "completed")
+                    # Reassign so the JSON column is flagged as modified
+                    job.checkpoint_data = {**checkpoint, "shards": dict(checkpoint["shards"])}
+                    job.progress_percentage = 100.0 * completed / total_shards
+                    await db.commit()
+                except Exception:
+                    # Rollback expires loaded objects; reload them before anything else reads them
+                    await db.rollback()
+                    await db.refresh(job)
+                    await db.refresh(computation)
+                    raise
+
+            for _, stats in results:
+                accumulate_usage(totals, stats)
+
+        except Exception as e:
+            logger.warning("Backfill shard failed", job_id=job.job_id, shard=key, error=str(e))
+            async with write_lock:
+                checkpoint["shards"][key] = {"status": "failed", "error": str(e)}
+                job.checkpoint_data = {**checkpoint, "shards": dict(checkpoint["shards"])}
+                await db.commit()
+            raise
+
+
+# Shared runner used by the task handlers
+backfill_runner = BackfillRunner()
@@ -0,0 +1,221 @@
+"""
+Cron expression parsing and fire-time calculation.
+
+Supports standard five-field expressions (minute, hour, day of month, month,
+day of week) with ``*``, ranges, steps, lists, month/day names and the
+``@hourly``-style aliases. Parsed schedules are cached, and the next fire time
+is found by jumping whole months, days and hours that cannot match instead of
+testing every minute, so evaluating thousands of schedules per scheduler tick
+stays cheap. The previous fire time is found the same way, walking backwards,
+so catching up on the most recent missed fires costs the same after a long
+outage as after a short one. All times are naive UTC, like the rest of the
+models.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional
+
+ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+MONTH_NAMES = {
+    name: i + 1
+    for i, name in enumerate(["jan", "feb", "mar", "apr", "may", "jun",
+                              "jul", "aug", "sep", "oct", "nov", "dec"])
+}
+DAY_NAMES = {name: i for i, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])}
+
+# Give up on expressions that can never fire (e.g. "0 0 30 2 *")
+MAX_SEARCH_YEARS = 5
+
+
+class CronError(ValueError):
+    """Raised for invalid or unsatisfiable cron expressions."""
+    pass
+
+
+def _parse_value(value: str, names: dict) -> int:
+    value = value.lower()
+    if value in names:
+        return names[value]
+    if not value.isdigit():
+        raise CronError(f"Invalid cron value: {value}")
+    return int(value)
+
+
+def _parse_field(field: str, low: int, high: int, names: Optional[dict] = None) -> List[int]:
+    """Expand one cron field into the sorted list of values it matches."""
+    names = names or {}
+    values = set()
+
+    for part in field.split(","):
+        base, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if step < 1:
+            raise CronError(f"Invalid cron step: {part}")
+
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start, end = (_parse_value(v, names) for v in base.split("-", 1))
+        else:
+            start = _parse_value(base, names)
+            end = high if "/" in part else start
+
+        if high == 7 and end == 7:
+            # Sunday may be written as 0 or 7
+            values.add(0)
+            end = 6
+        if start < low or end > high or start > end:
+            raise CronError(f"Cron field out of range: {part}")
+        values.update(range(start, end + 1, step))
+
+    return sorted(values)
+
+
+class CronSchedule:
+    """A parsed cron expression."""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise CronError(f"Cron expression must have 5 fields: {expression}")
+
+        minute, hour, dom, month, dow = fields
+        self.minutes = _parse_field(minute, 0, 59)
+        self.hours = _parse_field(hour, 0, 23)
+        self.days = set(_parse_field(dom, 1, 31))
+        self.months = _parse_field(month, 1, 12, MONTH_NAMES)
+        self.weekdays = set(_parse_field(dow, 0, 7, DAY_NAMES))
+
+        # Vixie cron: when both day fields are restricted, either may match
+        self._dom_restricted = dom != "*"
+        self._dow_restricted = dow != "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        in_days = moment.day in self.days
+        # Python's Monday is 0, cron's Sunday is 0
+        in_weekdays = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._dom_restricted and self._dow_restricted:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+    def next_after(self, after: datetime) -> datetime:
+        """First fire time strictly after ``after``."""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        last_year = moment.year + MAX_SEARCH_YEARS
+
+        while moment.year <= last_year:
+            if moment.month not in self.months:
+                i = bisect_left(self.months, moment.month)
+                if i == len(self.months):
+                    moment = datetime(moment.year + 1, self.months[0], 1)
+                else:
+                    moment = datetime(moment.year, self.months[i], 1)
+                continue
+
+            if not self._day_matches(moment):
+                moment = datetime(moment.year, moment.month, moment.day) + timedelta(days=1)
+                continue
+
+            if moment.hour not in self.hours:
+                i = bisect_left(self.hours, moment.hour)
+                if i == len(self.hours):
+                    moment = datetime(moment.year, moment.month, moment.day) + timedelta(days=1)
+                else:
+                    moment = moment.replace(hour=self.hours[i], minute=0)
+                continue
+
+            if moment.minute not in self.minutes:
+                i = bisect_left(self.minutes, moment.minute)
+                if i == len(self.minutes):
+                    moment = moment.replace(minute=0) + timedelta(hours=1)
+                else:
+                    moment = moment.replace(minute=self.minutes[i])
+                continue
+
+            return moment
+
+        raise CronError(f"Cron expression never fires: {self.expression}")
+
+    def previous_before(self, before: datetime) -> datetime:
+        """Last fire time strictly before ``before``."""
+        moment = (before - timedelta(microseconds=1)).replace(second=0, microsecond=0)
+        first_year = moment.year - MAX_SEARCH_YEARS
+
+        while moment.year >= first_year:
+            if moment.month not in self.months:
+                i = bisect_right(self.months, moment.month) - 1
+                if i < 0:
+                    moment = _month_end(moment.year - 1, self.months[-1])
+                else:
+                    moment = _month_end(moment.year, self.months[i])
+                continue
+
+            if not self._day_matches(moment):
+                moment = datetime(moment.year, moment.month, moment.day) - timedelta(minutes=1)
+                continue
+
+            if moment.hour not in self.hours:
+                i = bisect_right(self.hours, moment.hour) - 1
+                if i < 0:
+                    moment = datetime(moment.year, moment.month, moment.day) - timedelta(minutes=1)
+                else:
+                    moment = moment.replace(hour=self.hours[i], minute=59)
+                continue
+
+            if moment.minute not in self.minutes:
+                i = bisect_right(self.minutes, moment.minute) - 1
+                if i < 0:
+                    moment = moment.replace(minute=0) - timedelta(minutes=1)
+                else:
+                    moment = moment.replace(minute=self.minutes[i])
+                continue
+
+            return moment
+
+        raise CronError(f"Cron expression never fires: {self.expression}")
+
+    def fires_between(self, start: datetime, end: datetime, keep_last: Optional[int] = None) -> List[datetime]:
+        """Fire times in ``[start, end]``, optionally keeping only the most recent ``keep_last``."""
+        start = start.replace(second=0, microsecond=0)
+        if keep_last is not None:
+            # Walk back from the end, so only the fires that are kept are computed
+            fires = []
+            moment = end + timedelta(microseconds=1)
+            while len(fires) < keep_last:
+                moment = self.previous_before(moment)
+                if moment < start:
+                    break
+                fires.append(moment)
+            return fires[::-1]
+
+        fires = []
+        moment = self.next_after(start - timedelta(minutes=1))
+        while moment <= end:
+            fires.append(moment)
+            moment = self.next_after(moment)
+        return fires
+
+
+def _month_end(year: int, month: int) -> datetime:
+    """The last minute of a month."""
+    if month == 12:
+        return datetime(year + 1, 1, 1) - timedelta(minutes=1)
+    return datetime(year, month + 1, 1) - timedelta(minutes=1)
+
+
+@lru_cache(maxsize=4096)
+def parse_cron(expression: str) -> CronSchedule:
+    """Parse a cron expression, reusing previously parsed schedules."""
+    return CronSchedule(expression)
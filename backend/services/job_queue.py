@@ -0,0 +1,371 @@
+"""
+Durable, table-backed queue for computation tasks.
+
+Tasks are rows in ``computation_tasks``. Workers lease pending rows with
+``SELECT ... FOR UPDATE SKIP LOCKED`` on PostgreSQL. SQLite has no row locks,
+so there a lease is claimed with a conditional ``UPDATE`` that only matches
+rows that are still pending; whichever worker's update lands first wins.
+
+Tasks are dispatched by effective priority: the requested priority plus one
+level for every ``TASK_PRIORITY_AGING_SECONDS`` spent waiting, so low priority
+work is eventually leased even under a steady stream of urgent tasks. Each
+organization may hold at most ``TASK_ORG_MAX_CONCURRENT`` running tasks; the
+quota is checked when leasing, so concurrent workers can briefly overshoot it
+by at most one lease batch.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, update, and_, func, cast, literal, DateTime, Integer
+from sqlalchemy.ext.asyncio import AsyncSession
+from prometheus_client import Gauge, Histogram
+import structlog
+
+from api.config import settings
+from models.computation import ComputationTask, JobStatus
+
+logger = structlog.get_logger()
+
+# Prometheus metrics
+QUEUE_DEPTH = Gauge(
+    'computation_queue_depth',
+    'Runnable computation tasks waiting to be leased',
+    ['task_type']
+)
+
+QUEUE_WAIT = Histogram(
+    'computation_queue_wait_seconds',
+    'Time tasks spent runnable before being leased',
+    ['task_type'],
+    buckets=(0.5, 1, 5, 15, 30, 60, 300, 900, 1800, 3600, 7200)
+)
+
+# Candidates fetched per requested lease, so quota-blocked rows can be skipped
+LEASE_CANDIDATE_FACTOR = 4
+
+
+class JobQueue:
+    """Lease-based queue over ``ComputationTask`` rows."""
+
+    def __init__(
+        self,
+        lease_seconds: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_backoff_seconds: Optional[int] = None,
+        aging_seconds: Optional[int] = None,
+        org_max_concurrent: Optional[int] = None
+    ):
+        self.lease_seconds = lease_seconds or settings.TASK_LEASE_SECONDS
+        self.max_attempts = max_attempts or settings.TASK_MAX_ATTEMPTS
+        self.retry_backoff_seconds = retry_backoff_seconds or settings.TASK_RETRY_BACKOFF_SECONDS
+        self.aging_seconds = aging_seconds or settings.TASK_PRIORITY_AGING_SECONDS
+        self.org_max_concurrent = org_max_concurrent or settings.TASK_ORG_MAX_CONCURRENT
+
+    @staticmethod
+    def supports_skip_locked(session: AsyncSession) -> bool:
+        """Whether the session's database supports ``FOR UPDATE SKIP LOCKED``."""
+        return session.get_bind().dialect.name == "postgresql"
+
+    def effective_priority(self, session: AsyncSession, now: datetime):
+        """SQL expression for priority raised by one level per aging interval waited."""
+        now = literal(now, DateTime)
+        if session.get_bind().dialect.name == "postgresql":
+            waited = func.extract("epoch", now - ComputationTask.available_at)
+        else:
+            waited = (func.julianday(now) - func.julianday(ComputationTask.available_at)) * 86400
+        return func.coalesce(ComputationTask.priority, 0) + cast(waited / self.aging_seconds, Integer)
+
+    async def running_by_organization(self, session: AsyncSession) -> Dict[str, int]:
+        """Count leased top-level tasks per organization."""
+        result = await session.execute(
+            select(ComputationTask.organization_id, func.count(ComputationTask.id))
+            .where(
+                and_(
+                    ComputationTask.status == JobStatus.RUNNING,
+                    ComputationTask.parent_id.is_(None)
+                )
+            )
+            .group_by(ComputationTask.organization_id)
+        )
+        return dict(result.all())
+
+    def retry_delay(self, attempts: int) -> timedelta:
+        """Exponential backoff delay before the next attempt."""
+        return timedelta(seconds=self.retry_backoff_seconds * (2 ** max(attempts - 1, 0)))
+
+    async def enqueue(
+        self,
+        session: AsyncSession,
+        task: ComputationTask,
+        priority: Optional[int] = None,
+        delay_seconds: int = 0,
+        commit: bool = True
+    ) -> ComputationTask:
+        """
+        Persist a task as pending so any worker can lease it.
+
+        With ``commit=False`` the task is only added to the session, letting
+        callers enqueue many tasks in a single transaction.
+        """
+        task.status = JobStatus.PENDING
+        task.available_at = datetime.utcnow() + timedelta(seconds=delay_seconds)
+        if priority is not None:
+            task.priority = priority
+        if task.max_attempts is None:
+            task.max_attempts = self.max_attempts
+
+        session.add(task)
+        if not commit:
+            return task
+        await session.commit()
+        await session.refresh(task)
+
+        logger.info("Task enqueued", task_id=str(task.id), task_type=task.task_type)
+        return task
+
+    async def lease(
+        self,
+        session: AsyncSession,
+        worker_id: str,
+        limit: int = 1,
+        task_types: Optional[List[str]] = None
+    ) -> List[ComputationTask]:
+        """Lease up to ``limit`` runnable tasks for ``worker_id``."""
+        now = datetime.utcnow()
+
+        running = await self.running_by_organization(session)
+        headroom = {org: self.org_max_concurrent - count for org, count in running.items()}
+        saturated = [org for org, free in headroom.items() if free <= 0]
+
+        # Pipeline steps are driven by their parent task, never leased directly
+        query = select(ComputationTask.id, ComputationTask.organization_id).where(
+            and_(
+                ComputationTask.status == JobStatus.PENDING,
+                ComputationTask.available_at <= now,
+                ComputationTask.parent_id.is_(None)
+            )
+        )
+        if task_types:
+            query = query.where(ComputationTask.task_type.in_(task_types))
+        if saturated:
+            query = query.where(ComputationTask.organization_id.notin_(saturated))
+
+        query = query.order_by(
+            self.effective_priority(session, now).desc(),
+            ComputationTask.available_at
+        ).limit(limit * LEASE_CANDIDATE_FACTOR)
+
+        if self.supports_skip_locked(session):
+            query = query.with_for_update(skip_locked=True)
+
+        candidate_ids = []
+        for task_id, org in (await session.execute(query)).all():
+            free = headroom.get(org, self.org_max_concurrent)
+            if free > 0:
+                candidate_ids.append(task_id)
+                headroom[org] = free - 1
+            if len(candidate_ids) >= limit:
+                break
+
+        if not candidate_ids:
+            await session.commit()
+            return []
+
+        await session.execute(
+            update(ComputationTask)
+            .where(
+                and_(
+                    ComputationTask.id.in_(candidate_ids),
+                    ComputationTask.status == JobStatus.PENDING
+                )
+            )
+            .values(
+                status=JobStatus.RUNNING,
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                heartbeat_at=now,
+                started_at=now,
+                attempts=ComputationTask.attempts + 1
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+        result = await session.execute(
+            select(ComputationTask).where(
+                and_(
+                    ComputationTask.id.in_(candidate_ids),
+                    ComputationTask.status == JobStatus.RUNNING,
+                    ComputationTask.lease_owner == worker_id
+                )
+            )
+            # The bulk update bypassed the session, so tasks it already holds are stale
+            .execution_options(populate_existing=True)
+        )
+        tasks = list(result.scalars().all())
+        for task in tasks:
+            QUEUE_WAIT.labels(task_type=task.task_type).observe(
+                max((now - task.available_at).total_seconds(), 0)
+            )
+        return tasks
+
+    async def queue_depth(self, session: AsyncSession) -> Dict[str, int]:
+        """Count runnable tasks per task type and publish them as a gauge."""
+        result = await session.execute(
+            select(ComputationTask.task_type, func.count(ComputationTask.id))
+            .where(
+                and_(
+                    ComputationTask.status == JobStatus.PENDING,
+                    ComputationTask.available_at <= datetime.utcnow(),
+                    ComputationTask.parent_id.is_(None)
+                )
+            )
+            .group_by(ComputationTask.task_type)
+        )
+        depth = dict(result.all())
+        for task_type in set(depth) | {"job", "pipeline"}:
+            QUEUE_DEPTH.labels(task_type=task_type).set(depth.get(task_type, 0))
+        return depth
+
+    async def heartbeat(self, session: AsyncSession, task_id: Any, worker_id: str) -> bool:
+        """Extend a lease. Returns False if the worker no longer holds it."""
+        now = datetime.utcnow()
+        result = await session.execute(
+            update(ComputationTask)
+            .where(
+                and_(
+                    ComputationTask.id == task_id,
+                    ComputationTask.status == JobStatus.RUNNING,
+                    ComputationTask.lease_owner == worker_id
+                )
+            )
+            .values(
+                heartbeat_at=now,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        return result.rowcount == 1
+
+    async def complete(
+        self,
+        session: AsyncSession,
+        task_id: Any,
+        worker_id: str,
+        result: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Mark a leased task completed. Caller commits."""
+        outcome = await session.execute(
+            update(ComputationTask)
+            .where(
+                and_(
+                    ComputationTask.id == task_id,
+                    ComputationTask.status == JobStatus.RUNNING,
+                    ComputationTask.lease_owner == worker_id
+                )
+            )
+            .values(
+                status=JobStatus.COMPLETED,
+                completed_at=datetime.utcnow(),
+                result=result,
+                error_message=None,
+                lease_owner=None,
+                lease_expires_at=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if outcome.rowcount != 1:
+            logger.warning("Completed task whose lease was lost", task_id=str(task_id), worker_id=worker_id)
+            return False
+        return True
+
+    async def fail(
+        self,
+        session: AsyncSession,
+        task: ComputationTask,
+        worker_id: str,
+        error: str
+    ) -> JobStatus:
+        """Release a failed task for retry, or fail it once attempts are exhausted."""
+        now = datetime.utcnow()
+        held = and_(
+            ComputationTask.id == task.id,
+            ComputationTask.status == JobStatus.RUNNING,
+            ComputationTask.lease_owner == worker_id
+        )
+
+        retried = await session.execute(
+            update(ComputationTask)
+            .where(and_(held, ComputationTask.attempts < ComputationTask.max_attempts))
+            .values(
+                status=JobStatus.PENDING,
+                available_at=now + self.retry_delay(task.attempts or 1),
+                error_message=error,
+                lease_owner=None,
+                lease_expires_at=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if retried.rowcount == 1:
+            await session.commit()
+            return JobStatus.PENDING
+
+        await session.execute(
+            update(ComputationTask)
+            .where(held)
+            .values(
+                status=JobStatus.FAILED,
+                completed_at=now,
+                error_message=error,
+                lease_owner=None,
+                lease_expires_at=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        return JobStatus.FAILED
+
+    async def reap_expired_leases(self, session: AsyncSession) -> int:
+        """Return tasks whose worker stopped heartbeating to the queue."""
+        now = datetime.utcnow()
+        expired = and_(
+            ComputationTask.status == JobStatus.RUNNING,
+            ComputationTask.lease_expires_at < now,
+            ComputationTask.parent_id.is_(None)
+        )
+
+        requeued = await session.execute(
+            update(ComputationTask)
+            .where(and_(expired, ComputationTask.attempts < ComputationTask.max_attempts))
+            .values(
+                status=JobStatus.PENDING,
+                available_at=now,
+                error_message="Worker lease expired",
+                lease_owner=None,
+                lease_expires_at=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+        exhausted = await session.execute(
+            update(ComputationTask)
+            .where(expired)
+            .values(
+                status=JobStatus.TIMEOUT,
+                completed_at=now,
+                error_message="Worker lease expired",
+                lease_owner=None,
+                lease_expires_at=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+        count = requeued.rowcount + exhausted.rowcount
+        if count:
+            logger.warning("Reaped expired task leases", requeued=requeued.rowcount, timed_out=exhausted.rowcount)
+        return count
+
+
+# Shared queue instance used by the API and workers
+job_queue = JobQueue()
@@ -0,0 +1,540 @@
+"""
+In-memory lineage graph for impact analysis and tracing.
+
+Edges come from three tables, and data flows from source to target:
+
+* ``FeatureLineage``: ``{source_type}:{source_name}`` to
+  ``{target_type}:{target_name}``. Nodes are keyed by name because
+  ``source_id`` can only reference data sources; a feature is a source by
+  name. Ids are kept as aliases of the named node;
+* ``DataLineage``: ``dataset:{source_table}`` (or the source system) to
+  ``dataset:{dataset_name}``;
+* ``ModelLineage``: each entry of ``feature_dependencies``
+  (``feature:{id}``) and of ``training_data_sources`` (``dataset:{name}``) to
+  ``model:{model_name}:{model_version}``. Feature ids resolve through the
+  aliases, so feature lineage is loaded first.
+
+Each organization's graph is loaded once into adjacency maps, with three
+queries. Upstream and downstream closures are computed by BFS and cached per
+node, so impact analysis and traces never issue per-hop queries. Committed
+lineage writes in this process patch the index through session hooks. An
+edge change only invalidates cached closures that contain its endpoints.
+Indexes are rebuilt after ``LINEAGE_INDEX_TTL_SECONDS`` to pick up writes
+made by other processes.
+
+For lineage too large to hold in memory, ``LINEAGE_TRAVERSAL = "sql"``
+switches to ``traverse``. It walks ``feature_lineage`` with a single
+recursive CTE and builds a throwaway index of just the subgraph it returns.
+"""
+
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import time
+import uuid
+import structlog
+from sqlalchemy import String, and_, any_, event, func, literal, not_, select
+from sqlalchemy.dialects.postgresql import ARRAY, array
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from api.config import settings
+from models.lineage import DataLineage, FeatureLineage, LineageStatus, LineageType, ModelLineage
+
+logger = structlog.get_logger()
+
+UPSTREAM = "upstream"
+DOWNSTREAM = "downstream"
+DATASET_TYPES = {"dataset", "data_source", "table"}
+
+Edge = Tuple[str, str, str]  # source, target, edge type
+
+
+def node_key(node_type: str, node_id: Any) -> str:
+    return f"{node_type}:{node_id}"
+
+
+def _value(value: Any) -> Any:
+    return value.value if hasattr(value, "value") else value
+
+
+def _node_info(node_type: str, name: str, entity_id: Any = None) -> Dict[str, str]:
+    info = {"type": node_type, "name": name}
+    if entity_id is not None:
+        info["entity_id"] = str(entity_id)
+    return info
+
+
+def _feature_lineage_edge(key: str, row: Any) -> Tuple[str, Edge, Dict[str, Dict[str, str]]]:
+    source = node_key(row.source_type, row.source_name)
+    target = node_key(row.target_type, row.target_name)
+    info = {
+        source: _node_info(row.source_type, row.source_name, row.source_id),
+        target: _node_info(row.target_type, row.target_name, row.target_id),
+    }
+    return key, (source, target, _value(row.lineage_type)), info
+
+
+def record_edges(record: Any) -> Tuple[str, List[Tuple[str, Edge, Dict[str, Dict[str, str]]]]]:
+    """
+    Edges contributed by one lineage row.
+
+    Returns the record key and ``(edge_id, edge, node_info)`` for each edge.
+    Inactive and deleted rows contribute none.
+    """
+    if isinstance(record, FeatureLineage):
+        key = f"feature_lineage:{record.id}"
+        if record.is_deleted or _value(record.status) not in (None, LineageStatus.ACTIVE.value):
+            return key, []
+        return key, [_feature_lineage_edge(key, record)]
+
+    if isinstance(record, DataLineage):
+        key = f"data_lineage:{record.id}"
+        upstream_name = record.source_table or record.source_system
+        if record.is_deleted or not upstream_name:
+            return key, []
+        source = node_key("dataset", upstream_name)
+        target = node_key("dataset", record.dataset_name)
+        info = {
+            source: {"type": "dataset", "name": upstream_name},
+            target: {"type": "dataset", "name": record.dataset_name},
+        }
+        return key, [(key, (source, target, "derived_from"), info)]
+
+    if isinstance(record, ModelLineage):
+        key = f"model_lineage:{record.id}"
+        if record.is_deleted:
+            return key, []
+        model = node_key("model", f"{record.model_name}:{record.model_version}")
+        model_info = {"type": "model", "name": f"{record.model_name} {record.model_version}"}
+        edges = []
+        for index, feature_id in enumerate(record.feature_dependencies or []):
+            source = node_key("feature", feature_id)
+            edges.append((
+                f"{key}:f{index}", (source, model, "consumed_by"),
+                {source: {"type": "feature", "name": str(feature_id)}, model: model_info}
+            ))
+        for index, dataset in enumerate(record.training_data_sources or []):
+            source = node_key("dataset", dataset)
+            edges.append((
+                f"{key}:d{index}", (source, model, "consumed_by"),
+                {source: {"type": "dataset", "name": str(dataset)}, model: model_info}
+            ))
+        return key, edges
+
+    raise TypeError(f"Not a lineage record: {type(record).__name__}")
+
+
+class LineageIndex:
+    """Adjacency index of one organization's lineage graph with cached closures."""
+
+    def __init__(self, closure_cache_size: Optional[int] = None):
+        self.nodes: Dict[str, Dict[str, str]] = {}
+        self.edges: Dict[str, Edge] = {}
+        self.downstream: Dict[str, Dict[str, Set[str]]] = defaultdict(dict)  # node -> {neighbor: edge ids}
+        self.upstream: Dict[str, Dict[str, Set[str]]] = defaultdict(dict)
+        self.record_edge_ids: Dict[str, List[str]] = {}
+        self.aliases: Dict[str, str] = {}  # "{type}:{entity id}" -> named node
+        self.closure_cache_size = closure_cache_size or settings.LINEAGE_CLOSURE_CACHE_SIZE
+        self._closures: "OrderedDict[Tuple[str, str], Dict[str, int]]" = OrderedDict()
+        self.built_at = time.monotonic()
+
+    def apply(self, record: Any):
+        """Add, replace or drop the edges of one lineage row."""
+        self.set_record(*record_edges(record))
+
+    def set_record(self, key: str, edges: List[Tuple[str, Edge, Dict[str, Dict[str, str]]]]):
+        self.remove_record(key)
+        for edge_id, (source, target, edge_type), info in edges:
+            for node, node_info in info.items():
+                if "entity_id" in node_info:
+                    self.aliases[node_key(node_info["type"], node_info["entity_id"])] = node
+                if self.aliases.get(node, node) == node:
+                    self.nodes.setdefault(node, {"id": node, **node_info})
+            self.add_edge(edge_id, (self.aliases.get(source, source), self.aliases.get(target, target), edge_type))
+        if edges:
+            self.record_edge_ids[key] = [edge_id for edge_id, _, _ in edges]
+
+    def merge(self, other: "LineageIndex"):
+        """Add every record of ``other`` that this index does not have yet."""
+        for key, edge_ids in other.record_edge_ids.items():
+            if key not in self.record_edge_ids:
+                self.set_record(key, [
+                    (edge_id, other.edges[edge_id], {node: other.nodes[node] for node in other.edges[edge_id][:2]})
+                    for edge_id in edge_ids
+                ])
+
+    def remove_record(self, key: str):
+        for edge_id in self.record_edge_ids.pop(key, []):
+            self.remove_edge(edge_id)
+
+    def add_edge(self, edge_id: str, edge: Edge):
+        source, target, _ = edge
+        self.edges[edge_id] = edge
+        self.downstream[source].setdefault(target, set()).add(edge_id)
+        self.upstream[target].setdefault(source, set()).add(edge_id)
+        self._invalidate(source, target)
+
+    def remove_edge(self, edge_id: str):
+        edge = self.edges.pop(edge_id, None)
+        if edge is None:
+            return
+        source, target, _ = edge
+        for adjacency, node, neighbor in ((self.downstream, source, target), (self.upstream, target, source)):
+            edge_ids = adjacency[node].get(neighbor)
+            if edge_ids is not None:
+                edge_ids.discard(edge_id)
+                if not edge_ids:
+                    del adjacency[node][neighbor]
+        self._invalidate(source, target)
+
+    def _invalidate(self, source: str, target: str):
+        """Drop cached closures an edge between ``source`` and ``target`` can change."""
+        stale = [
+            cache_key for cache_key, reached in self._closures.items()
+            if (cache_key[0] == DOWNSTREAM and (cache_key[1] == source or source in reached))
+            or (cache_key[0] == UPSTREAM and (cache_key[1] == target or target in reached))
+        ]
+        for cache_key in stale:
+            del self._closures[cache_key]
+
+    def resolve(self, node_type: str, node_ref: str) -> Optional[str]:
+        """The node for a name or entity id, if it is in the graph."""
+        node = node_key(node_type, node_ref)
+        node = self.aliases.get(node, node)
+        return node if node in self.nodes else None
+
+    def _follows(self, edge_ids: Set[str], lineage_types: Optional[Set[str]]) -> bool:
+        return lineage_types is None or any(self.edges[edge_id][2] in lineage_types for edge_id in edge_ids)
+
+    def closure(self, node: str, direction: str, lineage_types: Optional[Set[str]] = None) -> Dict[str, int]:
+        """
+        Every node reachable from ``node`` in ``direction``, with its distance in hops.
+
+        Only unfiltered closures are cached; a ``lineage_types`` filter walks the graph again.
+        """
+        cache_key = (direction, node)
+        if lineage_types is None:
+            reached = self._closures.get(cache_key)
+            if reached is not None:
+                self._closures.move_to_end(cache_key)
+                return reached
+
+        adjacency = self.downstream if direction == DOWNSTREAM else self.upstream
+        reached = {}
+        frontier = deque([(node, 0)])
+        while frontier:
+            current, depth = frontier.popleft()
+            for neighbor, edge_ids in adjacency.get(current, {}).items():
+                if neighbor != node and neighbor not in reached and self._follows(edge_ids, lineage_types):
+                    reached[neighbor] = depth + 1
+                    frontier.append((neighbor, depth + 1))
+
+        if lineage_types is not None:
+            return reached
+        self._closures[cache_key] = reached
+        while len(self._closures) > self.closure_cache_size:
+            self._closures.popitem(last=False)
+        return reached
+
+    def subgraph(self, nodes: Iterable[str], lineage_types: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """Nodes and the edges among them, in API shape."""
+        nodes = set(nodes)
+        edges = []
+        for source in nodes:
+            for target, edge_ids in self.downstream.get(source, {}).items():
+                if target in nodes:
+                    for edge_id in edge_ids:
+                        if lineage_types is not None and self.edges[edge_id][2] not in lineage_types:
+                            continue
+                        edges.append({"id": edge_id, "source": source, "target": target,
+                                      "type": self.edges[edge_id][2]})
+        return {
+            "nodes": [self.nodes.get(node, {"id": node}) for node in sorted(nodes)],
+            "edges": edges,
+        }
+
+    def neighborhood(
+        self,
+        node: str,
+        direction: str = "both",
+        max_depth: Optional[int] = None,
+        lineage_types: Optional[Set[str]] = None
+    ) -> Dict[str, Any]:
+        """Subgraph of ``node`` and everything within ``max_depth`` hops in ``direction``."""
+        included = {node}
+        for side in ((UPSTREAM, DOWNSTREAM) if direction == "both" else (direction,)):
+            included.update(
+                other for other, depth in self.closure(node, side, lineage_types).items()
+                if max_depth is None or depth <= max_depth
+            )
+        return self.subgraph(included, lineage_types)
+
+    def impact(
+        self, node: str, max_depth: Optional[int] = None, lineage_types: Optional[Set[str]] = None
+    ) -> Dict[str, Any]:
+        """Everything downstream of ``node``, grouped by kind."""
+        reached = {
+            other: depth for other, depth in self.closure(node, DOWNSTREAM, lineage_types).items()
+            if max_depth is None or depth <= max_depth
+        }
+        grouped: Dict[str, List[Dict[str, Any]]] = {"feature": [], "dataset": [], "model": [], "other": []}
+        for other, depth in sorted(reached.items(), key=lambda item: (item[1], item[0])):
+            node_type = self.nodes.get(other, {}).get("type", other.split(":", 1)[0])
+            group = "dataset" if node_type in DATASET_TYPES else node_type if node_type in grouped else "other"
+            grouped[group].append({**self.nodes.get(other, {"id": other}), "depth": depth})
+
+        total = len(reached)
+        impact_level = "none" if total == 0 else "low" if total < 5 else "medium" if total < 20 else "high"
+        return {
+            "node_id": node,
+            "impacted_features": grouped["feature"],
+            "impacted_datasets": grouped["dataset"],
+            "impacted_models": grouped["model"],
+            "impacted_other": grouped["other"],
+            "impact_level": impact_level,
+            "total_impacted": total,
+        }
+
+    def trace(
+        self, node: str, max_depth: Optional[int] = None, lineage_types: Optional[Set[str]] = None
+    ) -> Dict[str, Any]:
+        """Everything upstream of ``node``: nodes nearest first, and the edges between them."""
+        reached = {
+            other: depth for other, depth in self.closure(node, UPSTREAM, lineage_types).items()
+            if max_depth is None or depth <= max_depth
+        }
+        ordered = sorted(reached.items(), key=lambda item: (item[1], item[0]))
+        included = set(reached) | {node}
+        steps = []
+        for target in [node] + [other for other, _ in ordered]:
+            for source, edge_ids in self.upstream.get(target, {}).items():
+                if source in included:
+                    for edge_id in edge_ids:
+                        if lineage_types is not None and self.edges[edge_id][2] not in lineage_types:
+                            continue
+                        steps.append({"source": source, "target": target, "type": self.edges[edge_id][2],
+                                      "depth": reached.get(source)})
+        return {
+            "node_id": node,
+            "trace_path": [{**self.nodes.get(other, {"id": other}), "depth": depth} for other, depth in ordered],
+            "steps": steps,
+        }
+
+
+class LineageGraphService:
+    """Per-organization lineage indexes, loaded on demand and patched on writes."""
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.LINEAGE_INDEX_TTL_SECONDS
+        self._indexes: Dict[str, LineageIndex] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def get_index(self, db: AsyncSession, organization_id: str) -> LineageIndex:
+        """The organization's index, building it if missing or older than the TTL."""
+        index = self._indexes.get(organization_id)
+        if index is not None and time.monotonic() - index.built_at < self.ttl_seconds:
+            return index
+
+        async with self._locks[organization_id]:
+            index = self._indexes.get(organization_id)
+            if index is None or time.monotonic() - index.built_at >= self.ttl_seconds:
+                index = await self.build_index(db, organization_id)
+                self._indexes[organization_id] = index
+        return index
+
+    async def build_index(self, db: AsyncSession, organization_id: str) -> LineageIndex:
+        started = time.monotonic()
+        index = LineageIndex()
+        for model in (FeatureLineage, DataLineage, ModelLineage):
+            result = await db.execute(
+                select(model).where(
+                    and_(model.organization_id == organization_id, model.is_deleted.is_(False))
+                )
+            )
+            for record in result.scalars().all():
+                index.apply(record)
+
+        logger.info(
+            "Lineage index built",
+            organization_id=organization_id,
+            nodes=len(index.nodes),
+            edges=len(index.edges),
+            duration=time.monotonic() - started
+        )
+        return index
+
+    def apply(self, organization_id: str, key: str, edges: List[Tuple[str, Edge, Dict[str, Dict[str, str]]]]):
+        """Patch a loaded index with a committed lineage write; no edges removes the record."""
+        index = self._indexes.get(organization_id)
+        if index is not None:
+            index.set_record(key, edges)
+
+    def invalidate(self, organization_id: Optional[str] = None):
+        if organization_id is None:
+            self._indexes.clear()
+        else:
+            self._indexes.pop(organization_id, None)
+
+
+def walk_statement(
+    organization_id: str,
+    node_type: str,
+    node_ref: str,
+    direction: str,
+    max_depth: Optional[int] = None,
+    lineage_types: Optional[Set[str]] = None
+):
+    """
+    One recursive CTE over ``feature_lineage`` from a node, nearest edges first.
+
+    ``node_ref`` is a name or an entity id. An id is resolved to its name
+    inside the same statement through ``idx_lineage_target`` /
+    ``idx_lineage_source``. Hops join on ``(type, name)``; the id columns of
+    the two sides reference different tables and never match each other.
+    Each row carries its path, and an edge that returns to a node already on
+    the path is kept but not followed.
+    """
+    max_depth = min(max_depth or settings.LINEAGE_MAX_DEPTH, settings.LINEAGE_MAX_DEPTH)
+    lineage = FeatureLineage.__table__
+    near, far = ("source", "target") if direction == DOWNSTREAM else ("target", "source")
+
+    def column(side: str, name: str):
+        return lineage.c[f"{side}_{name}"]
+
+    def key(side: str):
+        return column(side, "type") + literal(":") + column(side, "name")
+
+    edge_filter = [
+        lineage.c.organization_id == organization_id,
+        lineage.c.is_deleted.is_(False),
+        lineage.c.status == LineageStatus.ACTIVE,
+    ]
+    if lineage_types:
+        edge_filter.append(lineage.c.lineage_type.in_([LineageType(value) for value in sorted(lineage_types)]))
+
+    start_name: Any = node_ref
+    try:
+        entity_id = uuid.UUID(node_ref)
+    except ValueError:
+        pass
+    else:
+        def name_for(side: str):
+            return select(column(side, "name")).where(
+                and_(
+                    lineage.c.organization_id == organization_id,
+                    column(side, "type") == node_type,
+                    column(side, "id") == entity_id
+                )
+            ).limit(1).scalar_subquery()
+
+        start_name = func.coalesce(name_for("target"), name_for("source"), node_ref)
+
+    fields = [
+        lineage.c.id, lineage.c.lineage_type,
+        lineage.c.source_type, lineage.c.source_name, lineage.c.source_id,
+        lineage.c.target_type, lineage.c.target_name, lineage.c.target_id,
+    ]
+    walk = select(
+        *fields,
+        literal(1).label("depth"),
+        array([key(near), key(far)], type_=String).label("path"),
+        (key(near) == key(far)).label("is_cycle")
+    ).where(
+        and_(column(near, "type") == node_type, column(near, "name") == start_name, *edge_filter)
+    ).cte("lineage_walk", recursive=True)
+
+    walk = walk.union_all(
+        select(
+            *fields,
+            walk.c.depth + 1,
+            func.array_append(walk.c.path, key(far), type_=ARRAY(String)),
+            key(far) == any_(walk.c.path)
+        ).select_from(
+            lineage.join(
+                walk,
+                and_(
+                    column(near, "type") == walk.c[f"{far}_type"],
+                    column(near, "name") == walk.c[f"{far}_name"]
+                )
+            )
+        ).where(
+            and_(walk.c.depth < max_depth, not_(walk.c.is_cycle), *edge_filter)
+        )
+    )
+
+    return select(walk).order_by(walk.c.depth).limit(settings.LINEAGE_TRAVERSAL_MAX_ROWS)
+
+
+async def traverse(
+    db: AsyncSession,
+    organization_id: str,
+    node_type: str,
+    node_ref: str,
+    direction: str,
+    max_depth: Optional[int] = None,
+    lineage_types: Optional[Set[str]] = None
+) -> Tuple[str, LineageIndex]:
+    """
+    Walk a node's lineage in one round trip.
+
+    Returns the start node and an index of the subgraph. The index serves
+    ``impact``, ``trace`` and ``neighborhood`` like the in-memory one.
+    """
+    result = await db.execute(
+        walk_statement(organization_id, node_type, node_ref, direction, max_depth, lineage_types)
+    )
+    rows = result.all()
+    near = "source" if direction == DOWNSTREAM else "target"
+
+    index = LineageIndex()
+    for row in rows:
+        record_key = f"feature_lineage:{row.id}"
+        if record_key not in index.record_edge_ids:
+            index.set_record(record_key, [_feature_lineage_edge(record_key, row)])
+
+    if len(rows) >= settings.LINEAGE_TRAVERSAL_MAX_ROWS:
+        logger.warning(
+            "Lineage traversal truncated",
+            organization_id=organization_id,
+            node_type=node_type,
+            node_ref=node_ref,
+            rows=len(rows)
+        )
+
+    start = index.resolve(node_type, node_ref)
+    if start is None and rows:
+        # An id only recorded on the far side of other edges; every first hop starts at the node
+        start = node_key(getattr(rows[0], f"{near}_type"), getattr(rows[0], f"{near}_name"))
+    return start or node_key(node_type, node_ref), index
+
+
+# Shared service; indexes live for the life of the process
+lineage_graph = LineageGraphService()
+
+LINEAGE_MODELS = (FeatureLineage, DataLineage, ModelLineage)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_lineage_changes(session: Session, flush_context):
+    """Snapshot flushed lineage edges; objects are expired by the time the commit lands."""
+    changes = session.info.setdefault("lineage_changes", {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, LINEAGE_MODELS):
+            key, edges = record_edges(obj)
+            changes[key] = (obj.organization_id, edges)
+    for obj in session.deleted:
+        if isinstance(obj, LINEAGE_MODELS):
+            key, _ = record_edges(obj)
+            changes[key] = (obj.organization_id, [])
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_lineage_changes(session: Session):
+    for key, (organization_id, edges) in session.info.pop("lineage_changes", {}).items():
+        lineage_graph.apply(organization_id, key, edges)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_lineage_changes(session: Session):
+    session.info.pop("lineage_changes", None)
@@ -0,0 +1,451 @@
+"""
+Local multiprocess compute engine for ``ComputeEngine.PYTHON`` and ``ComputeEngine.SQL``.
+
+Input rows are hash-partitioned by entity so every entity lands in exactly one
+partition, partitions run in a ``ProcessPoolExecutor`` sized to the node's
+cores, and each finished partition is bulk-inserted into ``feature_values``
+while the remaining partitions are still computing. Partitions run within the
+computation's ``memory_gb`` and ``timeout_minutes`` and report their CPU time,
+peak RSS and resource samples (see ``resource_monitor``).
+
+The computation's ``config`` (optionally overridden per execution) describes
+the work::
+
+    {
+        "input_source": "transactions",  # a file DataSource of the organization
+        "entity_column": "user_id",
+        "entity_type": "user",
+        "timestamp_column": "event_time",
+        # PYTHON engine: vectorized pandas expression + optional aggregation
+        "expression": "amount * quantity",
+        "aggregation": "sum",
+        # SQL engine: query over the partition, exposed as table ``input``
+        "sql": "SELECT user_id AS entity_id, SUM(amount) AS value FROM input GROUP BY user_id"
+    }
+
+Config is written by tenants, so input files are only reachable through the
+organization's active file ``DataSource`` rows (``resolve_input``). A path
+given directly in the config is rejected.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy import and_, delete, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import os
+import sqlite3
+import time
+import pandas as pd
+import structlog
+
+from api.config import settings
+from models.computation import ComputationJob, DataSource, FeatureComputation, ComputeEngine, JobStatus
+from models.feature import FeatureValue, DataType
+from .resource_monitor import build_samples, limits_for, merge_samples, track_usage
+
+logger = structlog.get_logger()
+
+SUPPORTED_ENGINES = (ComputeEngine.PYTHON, ComputeEngine.SQL)
+FILE_FORMATS = ("parquet", "csv")
+
+
+def apply_filters(frame: pd.DataFrame, filters: List[Tuple[str, str, Any]]) -> pd.DataFrame:
+    """Apply pyarrow-style ``(column, op, value)`` filters to a loaded frame."""
+    for column, op, value in filters:
+        values = frame[column]
+        if isinstance(value, (datetime, pd.Timestamp)):
+            values = pd.to_datetime(values)
+            if values.dt.tz is not None and pd.Timestamp(value).tzinfo is None:
+                # Timestamps are compared as naive UTC
+                values = values.dt.tz_convert(None)
+        if op == "in":
+            mask = values.isin(value)
+        elif op == ">":
+            mask = values > value
+        elif op == ">=":
+            mask = values >= value
+        elif op == "<":
+            mask = values < value
+        elif op == "<=":
+            mask = values <= value
+        elif op == "==":
+            mask = values == value
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        frame = frame[mask]
+    return frame
+
+
+def load_input(spec: Dict[str, Any], filters: Optional[List[Tuple[str, str, Any]]] = None) -> pd.DataFrame:
+    """
+    Load the input frame described by ``spec["source"]`` or inline ``spec["records"]``.
+
+    ``filters`` are pushed down to the Parquet reader so skipped row groups are
+    never read; other formats are filtered after loading.
+    """
+    if "records" in spec:
+        frame = pd.DataFrame.from_records(spec["records"])
+        return apply_filters(frame, filters) if filters else frame
+
+    source = spec.get("source")
+    if not source:
+        raise ValueError("Computation config requires 'source' or 'records'")
+
+    source_format = source.get("format", "parquet")
+    if source_format == "parquet":
+        return pd.read_parquet(source["path"], columns=source.get("columns"), filters=filters or None)
+    if source_format == "csv":
+        frame = pd.read_csv(source["path"], usecols=source.get("columns"))
+        return apply_filters(frame, filters) if filters else frame
+    raise ValueError(f"Unsupported source format: {source_format}")
+
+
+async def resolve_input(db: AsyncSession, organization_id: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Return ``spec`` with ``source`` filled in from the organization's ``input_source`` data source."""
+    if "source" in spec:
+        raise ValueError("Computation config may not set 'source' directly; name a data source with 'input_source'")
+    if "records" in spec:
+        return spec
+
+    name = spec.get("input_source")
+    if not name:
+        raise ValueError("Computation config requires 'input_source' or 'records'")
+
+    result = await db.execute(
+        select(DataSource).where(
+            and_(
+                DataSource.organization_id == organization_id,
+                DataSource.name == name,
+                DataSource.is_active.is_(True)
+            )
+        )
+    )
+    data_source = result.scalar_one_or_none()
+    if data_source is None:
+        raise ValueError(f"Data source not found: {name}")
+
+    config = data_source.connection_config or {}
+    source_format = config.get("format", "parquet")
+    if data_source.source_type != "file" or source_format not in FILE_FORMATS or "path" not in config:
+        raise ValueError(f"Data source {name} is not a local Parquet/CSV file")
+    data_source.last_accessed_at = datetime.utcnow()
+    return {**spec, "source": {"format": source_format, "path": config["path"], "columns": config.get("columns")}}
+
+
+def to_naive_utc(values: pd.Series) -> pd.Series:
+    """Timestamps are stored as naive UTC; parse strings and convert aware values to match."""
+    return pd.to_datetime(values, utc=True).dt.tz_localize(None)
+
+
+def partition_by_entity(frame: pd.DataFrame, entity_column: str, num_partitions: int) -> List[pd.DataFrame]:
+    """Split ``frame`` into hash partitions keyed on ``entity_column``."""
+    if num_partitions <= 1 or len(frame) == 0:
+        return [frame]
+
+    buckets = pd.util.hash_pandas_object(frame[entity_column], index=False) % num_partitions
+    return [part for _, part in frame.groupby(buckets.values, sort=False)]
+
+
+def _run_python(frame: pd.DataFrame, spec: Dict[str, Any]) -> pd.DataFrame:
+    """Vectorized pandas transformation over one partition."""
+    entity_column = spec["entity_column"]
+    timestamp_column = spec.get("timestamp_column")
+
+    if spec.get("expression"):
+        values = frame.eval(spec["expression"])
+    else:
+        values = frame[spec.get("value_column", "value")]
+    frame = frame.assign(__value=values)
+
+    aggregation = spec.get("aggregation")
+    if aggregation and spec.get("window") and timestamp_column:
+        # Tumbling windows: one value per entity per window, stamped with the window start
+        frame = frame.assign(effective_timestamp=pd.to_datetime(frame[timestamp_column]).dt.floor(spec["window"]))
+        grouped = frame.groupby([entity_column, "effective_timestamp"], sort=False)
+        result = grouped["__value"].agg(aggregation).rename("value").reset_index()
+    elif aggregation:
+        grouped = frame.groupby(entity_column, sort=False)
+        result = grouped["__value"].agg(aggregation).rename("value").to_frame()
+        if timestamp_column:
+            result["effective_timestamp"] = grouped[timestamp_column].max()
+        result = result.reset_index()
+    else:
+        columns = [entity_column, "__value"] + ([timestamp_column] if timestamp_column else [])
+        result = frame[columns].rename(columns={"__value": "value"})
+        if timestamp_column:
+            result = result.rename(columns={timestamp_column: "effective_timestamp"})
+
+    return result.rename(columns={entity_column: "entity_id"})
+
+
+def _run_sql(frame: pd.DataFrame, spec: Dict[str, Any]) -> pd.DataFrame:
+    """Run the computation's SQL over one partition in an in-memory SQLite database."""
+    with sqlite3.connect(":memory:") as conn:
+        frame.to_sql("input", conn, index=False)
+        return pd.read_sql_query(spec["sql"], conn)
+
+
+def compute_partition(
+    engine: str,
+    frame: pd.DataFrame,
+    spec: Dict[str, Any],
+    limits: Optional[Dict[str, Optional[int]]] = None
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Process-pool entry point: transform one partition within ``limits`` and measure the work."""
+    with track_usage(limits) as stats:
+        if engine == ComputeEngine.SQL.value:
+            result = _run_sql(frame, spec)
+        else:
+            result = _run_python(frame, spec)
+
+    stats["input_rows"] = len(frame)
+    stats["output_rows"] = len(result)
+    return result, stats
+
+
+def merge_keys(result: pd.DataFrame, spec: Dict[str, Any]) -> List[str]:
+    """
+    Columns identifying the stored values a merge replaces.
+
+    Row-level values and windowed aggregates are point in time, so they are
+    keyed by entity and effective timestamp. Recomputed windows then overwrite
+    their previous value, and older values are kept. A plain aggregate is one
+    current value per entity, stamped with its latest input. It is keyed by
+    entity alone, so each run replaces the entity's value instead of adding a
+    row at the new timestamp.
+    """
+    if "effective_timestamp" in result.columns and (spec.get("window") or not spec.get("aggregation")):
+        return ["entity_id", "effective_timestamp"]
+    return ["entity_id"]
+
+
+def new_usage_totals() -> Dict[str, Any]:
+    """Empty accumulator for per-partition stats."""
+    return {
+        "partitions": 0,
+        "records_processed": 0,
+        "records_output": 0,
+        "cpu_seconds": 0.0,
+        "peak_rss_by_pid": {},
+        "samples": {},
+    }
+
+
+def accumulate_usage(totals: Dict[str, Any], stats: Dict[str, Any]):
+    """Add one partition's stats to ``totals``."""
+    totals["records_processed"] += stats["input_rows"]
+    totals["cpu_seconds"] += stats["cpu_seconds"]
+    peaks = totals["peak_rss_by_pid"]
+    peaks[stats["pid"]] = max(peaks.get(stats["pid"], 0), stats["peak_rss_bytes"])
+    merge_samples(totals["samples"], stats["pid"], stats.get("samples") or [])
+
+
+def finish_job(
+    db: AsyncSession,
+    job: ComputationJob,
+    computation: FeatureComputation,
+    totals: Dict[str, Any],
+    duration: float
+):
+    """Mark ``job`` completed and record its measured resource usage and samples."""
+    job.status = JobStatus.COMPLETED
+    job.completed_at = datetime.utcnow()
+    job.duration_seconds = int(round(duration))
+    job.records_processed = totals["records_processed"]
+    job.records_output = totals["records_output"]
+    job.progress_percentage = 100.0
+    # Average number of cores kept busy over the job's wall time
+    job.cpu_usage = totals["cpu_seconds"] / duration if duration > 0 else 0.0
+    job.memory_usage_gb = sum(totals["peak_rss_by_pid"].values()) / (1024 ** 3)
+    job.output_data = {
+        "partitions": totals["partitions"],
+        "records_processed": totals["records_processed"],
+        "records_output": totals["records_output"],
+        "cpu_seconds": totals["cpu_seconds"],
+    }
+    computation.last_run_at = job.completed_at
+    db.add_all(build_samples(job, totals["samples"]))
+
+
+class LocalComputeEngine:
+    """Runs PYTHON and SQL feature computations across all local cores."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.COMPUTATION_PROCESSES or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def shutdown(self):
+        """Shut down the process pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def run(
+        self,
+        db: AsyncSession,
+        job: ComputationJob,
+        computation: FeatureComputation,
+        overrides: Optional[Dict[str, Any]] = None,
+        frame: Optional[pd.DataFrame] = None,
+        merge: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Execute ``job`` and record its measured resource usage.
+
+        ``frame`` replaces loading the configured source (e.g. with only the
+        rows an incremental run needs), and ``merge`` replaces previously
+        computed values for the same keys instead of appending.
+        """
+        if computation.compute_engine not in SUPPORTED_ENGINES:
+            raise ValueError(f"Local executor does not support engine: {computation.compute_engine}")
+
+        spec = {**(computation.config or {}), **(job.input_data or {}), **(overrides or {})}
+        if "entity_column" not in spec:
+            raise ValueError("Computation config requires 'entity_column'")
+
+        started = time.monotonic()
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        job.progress_percentage = 0.0
+        if frame is None:
+            spec = await resolve_input(db, computation.organization_id, spec)
+        await db.commit()
+
+        if frame is None:
+            frame = await asyncio.get_running_loop().run_in_executor(None, load_input, spec)
+        write = self.merge_values if merge else self.write_values
+        totals = new_usage_totals()
+
+        # Stream each partition into the store as soon as it finishes
+        async for result, stats, done, total in self.compute(frame, computation, spec):
+            totals["records_output"] += await write(db, result, computation, spec)
+            accumulate_usage(totals, stats)
+            totals["partitions"] = total
+
+            job.records_processed = totals["records_processed"]
+            job.records_output = totals["records_output"]
+            job.progress_percentage = 100.0 * done / total
+            await db.commit()
+
+        duration = time.monotonic() - started
+        finish_job(db, job, computation, totals, duration)
+        await db.commit()
+
+        logger.info(
+            "Local computation completed",
+            job_id=job.job_id,
+            engine=computation.compute_engine,
+            partitions=totals["partitions"],
+            records_processed=totals["records_processed"],
+            duration=duration
+        )
+        return job.output_data
+
+    async def compute(
+        self,
+        frame: pd.DataFrame,
+        computation: FeatureComputation,
+        spec: Dict[str, Any]
+    ) -> AsyncIterator[Tuple[pd.DataFrame, Dict[str, Any], int, int]]:
+        """Compute ``frame`` across the process pool, yielding ``(result, stats, done, total)`` per partition."""
+        partitions = partition_by_entity(frame, spec["entity_column"], self.max_workers)
+
+        loop = asyncio.get_running_loop()
+        engine = ComputeEngine(computation.compute_engine).value
+        limits = limits_for(computation)
+        futures = [
+            loop.run_in_executor(self.executor, compute_partition, engine, part, spec, limits)
+            for part in partitions
+        ]
+        del partitions
+
+        try:
+            for done, future in enumerate(asyncio.as_completed(futures), start=1):
+                result, stats = await future
+                yield result, stats, done, len(futures)
+        finally:
+            # On failure or timeout, partitions that have not started yet never run
+            for future in futures:
+                future.cancel()
+
+    async def write_values(
+        self,
+        db: AsyncSession,
+        result: pd.DataFrame,
+        computation: FeatureComputation,
+        spec: Dict[str, Any]
+    ) -> int:
+        """Bulk insert a partition's results into ``feature_values``."""
+        if result.empty:
+            return 0
+
+        if "effective_timestamp" in result.columns:
+            result = result.assign(effective_timestamp=to_naive_utc(result["effective_timestamp"]))
+        else:
+            result = result.assign(effective_timestamp=datetime.utcnow())
+
+        value_type = DataType(spec.get("value_type", DataType.FLOAT.value))
+        entity_type = spec.get("entity_type", "entity")
+        rows = [
+            {
+                "feature_id": computation.feature_id,
+                "version_id": computation.version_id,
+                "entity_id": str(record["entity_id"]),
+                "entity_type": entity_type,
+                "value": record["value"],
+                "value_type": value_type,
+                "effective_timestamp": record["effective_timestamp"],
+                "source": f"computation:{computation.id}",
+                "organization_id": computation.organization_id,
+            }
+            for record in result[["entity_id", "value", "effective_timestamp"]].to_dict("records")
+        ]
+
+        batch_size = settings.FEATURE_BATCH_SIZE
+        for start in range(0, len(rows), batch_size):
+            await db.execute(insert(FeatureValue), rows[start:start + batch_size])
+
+        return len(rows)
+
+    async def merge_values(
+        self,
+        db: AsyncSession,
+        result: pd.DataFrame,
+        computation: FeatureComputation,
+        spec: Dict[str, Any]
+    ) -> int:
+        """Replace this computation's stored values for the keys in ``result`` (see ``merge_keys``)."""
+        if result.empty:
+            return 0
+
+        keyed_by_time = "effective_timestamp" in merge_keys(result, spec)
+        owned = and_(
+            FeatureValue.feature_id == computation.feature_id,
+            FeatureValue.version_id == computation.version_id,
+            FeatureValue.source == f"computation:{computation.id}"
+        )
+
+        batch_size = settings.FEATURE_BATCH_SIZE
+        for start in range(0, len(result), batch_size):
+            batch = result.iloc[start:start + batch_size]
+            entity_ids = batch["entity_id"].astype(str)
+            if keyed_by_time:
+                keys = list(zip(entity_ids, to_naive_utc(batch["effective_timestamp"]).dt.to_pydatetime()))
+                match = tuple_(FeatureValue.entity_id, FeatureValue.effective_timestamp).in_(keys)
+            else:
+                match = FeatureValue.entity_id.in_(entity_ids.unique().tolist())
+            await db.execute(delete(FeatureValue).where(and_(owned, match)))
+
+        return await self.write_values(db, result, computation, spec)
+
+
+# Shared engine; the process pool is created on first use
+local_engine = LocalComputeEngine()
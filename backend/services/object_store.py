@@ -0,0 +1,238 @@
+"""
+Object storage for computation outputs too large to keep in database rows.
+
+``OBJECT_STORE_BACKEND`` selects the backend: ``"local"`` writes files under
+``OBJECT_STORE_LOCAL_PATH``, and ``"minio"`` uses the ``MINIO_*`` bucket
+(any S3-compatible endpoint). Both expose the same async ``put``/``get``/
+``delete`` on byte strings. Blocking client calls run in a thread.
+
+``offload`` and ``load`` sit on top of it for JSON payloads. A payload whose
+serialized form is larger than ``RESULT_INLINE_MAX_BYTES`` is gzip-compressed
+into the store, and the row keeps only a pointer and a summary::
+
+    {
+        "offloaded": {"key": "org/results/<id>.json.gz", "size_bytes": 5242880,
+                      "compressed_bytes": 611234, "sha256": "..."},
+        "summary": {"records_output": 120000, "rows": "<list of 120000 items>"}
+    }
+
+Rows stay small, so list queries cost the same whatever the result size. The
+full payload is fetched only when someone asks for it. Serializing and
+compressing run in a thread, off the event loop. A pointer passed to
+``offload`` again is returned as is, so rows that share a payload share its
+object. ``delete_offloaded`` removes the objects behind pointers; it is called
+when their job is deleted.
+"""
+
+from abc import ABC, abstractmethod
+from io import BytesIO
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import structlog
+
+from api.config import settings
+
+logger = structlog.get_logger()
+
+POINTER_KEY = "offloaded"
+
+
+class ObjectStore(ABC):
+    """Byte-oriented object storage."""
+
+    @abstractmethod
+    async def put(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        """Store ``data`` under ``key``, replacing any existing object."""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes:
+        """Return the object stored under ``key``."""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Remove the object under ``key``, if any."""
+
+
+class LocalObjectStore(ObjectStore):
+    """Objects as files under a root directory."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = os.path.abspath(root or settings.OBJECT_STORE_LOCAL_PATH)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    def _write(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so readers never see a partial object
+        temporary = f"{path}.tmp-{os.getpid()}"
+        with open(temporary, "wb") as handle:
+            handle.write(data)
+        os.replace(temporary, path)
+
+    def _read(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as handle:
+            return handle.read()
+
+    def _remove(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    async def put(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        await asyncio.get_running_loop().run_in_executor(None, self._write, key, data)
+
+    async def get(self, key: str) -> bytes:
+        return await asyncio.get_running_loop().run_in_executor(None, self._read, key)
+
+    async def delete(self, key: str):
+        await asyncio.get_running_loop().run_in_executor(None, self._remove, key)
+
+
+class MinioObjectStore(ObjectStore):
+    """Objects in a MinIO / S3-compatible bucket."""
+
+    def __init__(self, bucket: Optional[str] = None):
+        from minio import Minio
+
+        self.bucket = bucket or settings.MINIO_BUCKET
+        self.client = Minio(
+            settings.MINIO_ENDPOINT,
+            access_key=settings.MINIO_ACCESS_KEY,
+            secret_key=settings.MINIO_SECRET_KEY,
+            secure=settings.MINIO_SECURE
+        )
+        self._bucket_checked = False
+
+    def _write(self, key: str, data: bytes, content_type: str):
+        if not self._bucket_checked:
+            if not self.client.bucket_exists(self.bucket):
+                self.client.make_bucket(self.bucket)
+            self._bucket_checked = True
+        self.client.put_object(self.bucket, key, BytesIO(data), len(data), content_type=content_type)
+
+    def _read(self, key: str) -> bytes:
+        response = self.client.get_object(self.bucket, key)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    async def put(self, key: str, data: bytes, content_type: str = "application/octet-stream"):
+        await asyncio.get_running_loop().run_in_executor(None, self._write, key, data, content_type)
+
+    async def get(self, key: str) -> bytes:
+        return await asyncio.get_running_loop().run_in_executor(None, self._read, key)
+
+    async def delete(self, key: str):
+        await asyncio.get_running_loop().run_in_executor(None, self.client.remove_object, self.bucket, key)
+
+
+_store: Optional[ObjectStore] = None
+
+
+def get_object_store() -> ObjectStore:
+    """The configured object store, created on first use."""
+    global _store
+    if _store is None:
+        backend = settings.OBJECT_STORE_BACKEND
+        if backend == "local":
+            _store = LocalObjectStore()
+        elif backend == "minio":
+            _store = MinioObjectStore()
+        else:
+            raise ValueError(f"Unsupported object store backend: {backend}")
+    return _store
+
+
+def is_offloaded(data: Any) -> bool:
+    return isinstance(data, dict) and isinstance(data.get(POINTER_KEY), dict)
+
+
+def summarize(payload: Any) -> Any:
+    """Keep scalar top-level fields; describe containers by their size."""
+    if not isinstance(payload, dict):
+        return {"type": type(payload).__name__, "items": len(payload) if hasattr(payload, "__len__") else None}
+
+    summary = {}
+    for key, value in payload.items():
+        if isinstance(value, (list, tuple)):
+            summary[key] = f"<list of {len(value)} items>"
+        elif isinstance(value, dict):
+            summary[key] = f"<object with {len(value)} keys>"
+        elif isinstance(value, str) and len(value) > 256:
+            summary[key] = value[:256] + "..."
+        else:
+            summary[key] = value
+    return summary
+
+
+def _encode(payload: Any, threshold: int) -> Optional[Tuple[bytes, bytes, str]]:
+    """Serialized size, gzip and digest of ``payload``; ``None`` if it fits inline."""
+    raw = json.dumps(payload, default=str).encode()
+    if len(raw) <= threshold:
+        return None
+    return raw, gzip.compress(raw, compresslevel=6), hashlib.sha256(raw).hexdigest()
+
+
+async def offload(
+    payload: Any,
+    key: str,
+    store: Optional[ObjectStore] = None,
+    threshold: Optional[int] = None
+) -> Any:
+    """Return ``payload`` unchanged if small, else store it and return a pointer and summary."""
+    if payload is None or is_offloaded(payload):
+        return payload
+
+    threshold = threshold if threshold is not None else settings.RESULT_INLINE_MAX_BYTES
+    encoded = await asyncio.get_running_loop().run_in_executor(None, _encode, payload, threshold)
+    if encoded is None:
+        return payload
+
+    raw, compressed, digest = encoded
+    await (store or get_object_store()).put(key, compressed, content_type="application/gzip")
+    logger.info("Offloaded large result", key=key, size_bytes=len(raw), compressed_bytes=len(compressed))
+    return {
+        POINTER_KEY: {
+            "key": key,
+            "size_bytes": len(raw),
+            "compressed_bytes": len(compressed),
+            "sha256": digest,
+        },
+        "summary": summarize(payload),
+    }
+
+
+def _decode(compressed: bytes, pointer: Dict[str, Any]) -> Any:
+    raw = gzip.decompress(compressed)
+    if hashlib.sha256(raw).hexdigest() != pointer["sha256"]:
+        raise ValueError(f"Offloaded result is corrupt: {pointer['key']}")
+    return json.loads(raw)
+
+
+async def load(data: Any, store: Optional[ObjectStore] = None) -> Any:
+    """Return the full payload, downloading it if it was offloaded."""
+    if not is_offloaded(data):
+        return data
+
+    pointer = data[POINTER_KEY]
+    compressed = await (store or get_object_store()).get(pointer["key"])
+    return await asyncio.get_running_loop().run_in_executor(None, _decode, compressed, pointer)
+
+
+async def delete_offloaded(*payloads: Any, store: Optional[ObjectStore] = None):
+    """Remove the objects behind any offloaded ``payloads``; inline payloads are skipped."""
+    keys = {payload[POINTER_KEY]["key"] for payload in payloads if is_offloaded(payload)}
+    for key in keys:
+        await (store or get_object_store()).delete(key)
@@ -0,0 +1,78 @@
+"""
+Redis-backed online store for the latest value of streaming features.
+
+Each entity's current value lives under ``feature:{feature_id}:{entity_id}``
+as JSON ``{"value": ..., "timestamp": ...}``. Writes are pipelined, so a batch
+of window results costs one round trip. ``ONLINE_STORE_TTL_SECONDS`` expires
+entities that stop receiving events.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import aioredis
+
+from api.config import settings
+
+
+def online_key(feature_id: Any, entity_id: Any) -> str:
+    return f"feature:{feature_id}:{entity_id}"
+
+
+class OnlineStore:
+    """Latest feature values per entity, for low-latency serving."""
+
+    def __init__(self, url: Optional[str] = None, ttl_seconds: Optional[int] = None):
+        self.url = url or settings.REDIS_URL
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.ONLINE_STORE_TTL_SECONDS
+        self.redis = None
+
+    async def get_redis(self):
+        """Get Redis connection."""
+        if self.redis is None:
+            self.redis = await aioredis.from_url(
+                self.url,
+                password=settings.REDIS_PASSWORD,
+                encoding="utf-8",
+                decode_responses=True
+            )
+        return self.redis
+
+    async def write(self, feature_id: Any, rows: List[Dict[str, Any]]) -> int:
+        """Store ``entity_id``/``value``/``effective_timestamp`` rows in one pipeline."""
+        if not rows:
+            return 0
+
+        redis = await self.get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for row in rows:
+                timestamp = row["effective_timestamp"]
+                payload = {
+                    "value": row["value"],
+                    "timestamp": timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp,
+                }
+                pipe.set(online_key(feature_id, row["entity_id"]), json.dumps(payload), ex=self.ttl_seconds or None)
+            await pipe.execute()
+        return len(rows)
+
+    async def read(self, feature_id: Any, entity_ids: Iterable[Any]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Latest value per entity; ``None`` for entities without one."""
+        entity_ids = [str(entity_id) for entity_id in entity_ids]
+        if not entity_ids:
+            return {}
+
+        redis = await self.get_redis()
+        values = await redis.mget([online_key(feature_id, entity_id) for entity_id in entity_ids])
+        return {
+            entity_id: json.loads(value) if value is not None else None
+            for entity_id, value in zip(entity_ids, values)
+        }
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
+
+# Shared store; the connection is opened on first use
+online_store = OnlineStore()
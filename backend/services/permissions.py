@@ -0,0 +1,175 @@
+"""
+Compiled RBAC permission sets.
+
+A user's grants (every ``Permission`` of their active roles) are loaded with
+one query and compiled into a ``PermissionSet``: a frozenset of
+``(resource_type, permission_type)`` pairs. A check is then a set lookup.
+``admin`` on a resource type implies every other permission on it.
+
+Each API process caches compiled sets per user for ``AUTH_CACHE_TTL_SECONDS``.
+Every set records the permission version it was compiled at. There is one
+version per organization, bumped whenever a commit changes one of its roles,
+role grants or role assignments, and one global version for the
+organization-independent ``Permission`` rows. A set whose version is behind
+is recompiled on the next check, so a role change takes effect immediately
+in this process, and after the TTL in the others.
+
+With ``AUTH_PERMISSION_CLAIMS`` on, access tokens carry the compiled set as a
+``perms`` claim (``["feature:read", "monitoring:admin"]``), and requests
+authenticated with such a token skip the lookup altogether. Those grants
+then stay fixed for the life of the token.
+
+Routes name permissions as ``"resource:action"``. A plural resource
+(``feature_values``) refers to its resource type (``feature_value``).
+"""
+
+from collections import OrderedDict
+from contextvars import ContextVar
+from enum import Enum
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+import time
+import structlog
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from api.config import settings
+from api.database import AsyncSessionLocal
+from models.user import Permission, PermissionType, ResourceType, Role, RolePermission, UserRole
+
+logger = structlog.get_logger()
+
+PermissionKey = Tuple[str, str]
+
+RESOURCE_TYPES = {resource_type.value for resource_type in ResourceType}
+
+# Grants carried by the current request's access token, as (user id, set)
+token_permissions: ContextVar[Optional[Tuple[str, "PermissionSet"]]] = ContextVar(
+    "token_permissions", default=None
+)
+
+
+def _value(member: Any) -> str:
+    return member.value if isinstance(member, Enum) else str(member)
+
+
+def parse_permission(name: str) -> PermissionKey:
+    """Split a ``"resource:action"`` permission name into a permission key."""
+    resource_type, _, permission_type = name.partition(":")
+    if resource_type not in RESOURCE_TYPES and resource_type.endswith("s") and resource_type[:-1] in RESOURCE_TYPES:
+        resource_type = resource_type[:-1]
+    return resource_type, permission_type
+
+
+class PermissionSet:
+    """A user's compiled grants."""
+
+    __slots__ = ("grants",)
+
+    def __init__(self, grants: Iterable[Tuple[Any, Any]] = ()):
+        self.grants: FrozenSet[PermissionKey] = frozenset(
+            (_value(resource_type), _value(permission_type)) for resource_type, permission_type in grants
+        )
+
+    def allows(self, resource_type: Any, permission_type: Any) -> bool:
+        resource_type = _value(resource_type)
+        return (
+            (resource_type, _value(permission_type)) in self.grants
+            or (resource_type, PermissionType.ADMIN.value) in self.grants
+        )
+
+    def to_claims(self) -> List[str]:
+        """Compact token claim: sorted ``"resource:action"`` names."""
+        return sorted(f"{resource_type}:{permission_type}" for resource_type, permission_type in self.grants)
+
+    @classmethod
+    def from_claims(cls, claims: Iterable[str]) -> "PermissionSet":
+        return cls(name.split(":", 1) for name in claims if ":" in name)
+
+
+async def load_permissions(db: AsyncSession, user_id: str) -> PermissionSet:
+    """Compile a user's grants through their active roles with one query."""
+    result = await db.execute(
+        select(Permission.resource_type, Permission.permission_type)
+        .join(RolePermission, RolePermission.permission_id == Permission.id)
+        .join(Role, Role.id == RolePermission.role_id)
+        .join(UserRole, UserRole.role_id == Role.id)
+        .where(UserRole.user_id == user_id, Role.is_active == True)
+        .distinct()
+    )
+    return PermissionSet(result.all())
+
+
+class PermissionCache:
+    """Compiled permission sets per user, invalidated by version."""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_size: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.AUTH_CACHE_TTL_SECONDS
+        self.max_size = max_size or settings.AUTH_CACHE_SIZE
+        self.sets: "OrderedDict[str, Tuple[PermissionSet, Tuple[int, int], float]]" = OrderedDict()
+        self.versions: Dict[str, int] = {}  # organization -> version
+        self.global_version = 0
+
+    def version(self, organization_id: Any) -> Tuple[int, int]:
+        return self.global_version, self.versions.get(str(organization_id), 0)
+
+    def bump(self, organization_id: Optional[Any] = None):
+        """Outdate the cached sets of one organization, or of all with no organization."""
+        if organization_id is None:
+            self.global_version += 1
+        else:
+            key = str(organization_id)
+            self.versions[key] = self.versions.get(key, 0) + 1
+
+    async def get(self, user_id: Any, organization_id: Any, db: Optional[AsyncSession] = None) -> PermissionSet:
+        """A user's permission set, compiled again if missing, expired or outdated."""
+        key = str(user_id)
+        version = self.version(organization_id)
+        entry = self.sets.get(key)
+        if entry is not None and entry[1] == version and time.time() < entry[2]:
+            self.sets.move_to_end(key)
+            return entry[0]
+
+        if db is not None:
+            permissions = await load_permissions(db, key)
+        else:
+            async with AsyncSessionLocal() as session:
+                permissions = await load_permissions(session, key)
+
+        # Stored under the version read before loading; a change committed meanwhile outdates it
+        self.sets[key] = (permissions, version, time.time() + self.ttl_seconds)
+        self.sets.move_to_end(key)
+        while len(self.sets) > self.max_size:
+            self.sets.popitem(last=False)
+        return permissions
+
+    def clear(self):
+        self.sets.clear()
+
+
+# Shared cache; compiled sets live for AUTH_CACHE_TTL_SECONDS
+permission_cache = PermissionCache()
+
+ROLE_MODELS = (Role, RolePermission, UserRole)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_permission_changes(session: Session, flush_context):
+    """Record organizations whose roles or grants a flush changed; bumped once committed."""
+    changed = session.info.setdefault("permission_changes", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, ROLE_MODELS):
+            changed.add(str(obj.organization_id))
+        elif isinstance(obj, Permission):
+            changed.add(None)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_permission_versions(session: Session):
+    for organization_id in session.info.pop("permission_changes", set()):
+        permission_cache.bump(organization_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_permission_changes(session: Session):
+    session.info.pop("permission_changes", None)
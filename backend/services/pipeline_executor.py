@@ -0,0 +1,144 @@
+"""
+DAG executor for computation pipelines.
+
+Steps are scheduled as soon as all of their dependencies have succeeded, with
+at most ``max_concurrency`` steps in flight, so independent branches run
+side by side and a pipeline finishes in roughly its critical-path time. Each
+step receives its dependencies' outputs in memory. When a step fails, only
+the steps downstream of it are cancelled; unrelated branches keep running.
+If the execution itself is cancelled, the steps in flight are cancelled too.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import structlog
+
+from models.computation import JobStatus
+
+logger = structlog.get_logger()
+
+StepRunner = Callable[[str, Dict[str, Any]], Awaitable[Any]]
+
+
+class PipelineGraphError(ValueError):
+    """Raised when step dependencies do not form a valid DAG."""
+    pass
+
+
+def topological_order(dependencies: Dict[str, List[str]]) -> List[str]:
+    """Order steps so every step comes after its dependencies (Kahn's algorithm)."""
+    for step, deps in dependencies.items():
+        unknown = [d for d in deps if d not in dependencies]
+        if unknown:
+            raise PipelineGraphError(f"Step {step} depends on unknown steps: {', '.join(unknown)}")
+
+    remaining = {step: len(set(deps)) for step, deps in dependencies.items()}
+    dependents = downstream_map(dependencies)
+    ready = [step for step, count in remaining.items() if count == 0]
+    order = []
+
+    while ready:
+        step = ready.pop(0)
+        order.append(step)
+        for child in sorted(dependents[step]):
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                ready.append(child)
+
+    if len(order) != len(dependencies):
+        cyclic = sorted(step for step in dependencies if step not in order)
+        raise PipelineGraphError(f"Pipeline steps contain a cycle: {', '.join(cyclic)}")
+    return order
+
+
+def downstream_map(dependencies: Dict[str, List[str]]) -> Dict[str, Set[str]]:
+    """Invert a dependency map into step -> direct dependents."""
+    dependents: Dict[str, Set[str]] = {step: set() for step in dependencies}
+    for step, deps in dependencies.items():
+        for dep in deps:
+            dependents[dep].add(step)
+    return dependents
+
+
+def descendants(dependents: Dict[str, Set[str]], step: str) -> Set[str]:
+    """All steps transitively downstream of ``step``."""
+    found: Set[str] = set()
+    stack = list(dependents[step])
+    while stack:
+        child = stack.pop()
+        if child not in found:
+            found.add(child)
+            stack.extend(dependents[child])
+    return found
+
+
+class PipelineExecutor:
+    """Runs a dependency graph of steps with bounded concurrency."""
+
+    def __init__(self, run_step: StepRunner, max_concurrency: int = 1):
+        self.run_step = run_step
+        self.max_concurrency = max(1, max_concurrency)
+
+    async def execute(
+        self,
+        dependencies: Dict[str, List[str]],
+        completed: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Execute every step and return ``{step: {"status", "output", "error"}}``.
+
+        ``completed`` maps steps that already succeeded (e.g. in an earlier
+        attempt) to their outputs; those steps are not run again.
+        """
+        order = topological_order(dependencies)
+        dependents = downstream_map(dependencies)
+        outcomes: Dict[str, Dict[str, Any]] = {
+            step: {"status": JobStatus.COMPLETED, "output": output, "error": None}
+            for step, output in (completed or {}).items()
+        }
+        waiting = {
+            step: {d for d in dependencies[step] if d not in outcomes}
+            for step in order if step not in outcomes
+        }
+        running: Dict[asyncio.Task, str] = {}
+
+        def launch_ready():
+            for step in order:
+                if len(running) >= self.max_concurrency:
+                    return
+                if step in waiting and not waiting[step]:
+                    del waiting[step]
+                    inputs = {dep: outcomes[dep]["output"] for dep in dependencies[step]}
+                    running[asyncio.create_task(self.run_step(step, inputs))] = step
+
+        try:
+            launch_ready()
+            while running:
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    step = running.pop(finished)
+                    try:
+                        outcomes[step] = {"status": JobStatus.COMPLETED, "output": finished.result(), "error": None}
+                        for child in dependents[step]:
+                            if child in waiting:
+                                waiting[child].discard(step)
+                    except Exception as e:
+                        outcomes[step] = {"status": JobStatus.FAILED, "output": None, "error": str(e)}
+                        logger.warning("Pipeline step failed", step=step, error=str(e))
+                        for child in descendants(dependents, step):
+                            if child in waiting:
+                                del waiting[child]
+                                outcomes[child] = {
+                                    "status": JobStatus.CANCELLED,
+                                    "output": None,
+                                    "error": f"Upstream step {step} failed"
+                                }
+                launch_ready()
+        finally:
+            # Cancelled (lease lost or worker stopping): stop the steps still in flight
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return outcomes
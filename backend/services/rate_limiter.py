@@ -0,0 +1,249 @@
+"""
+Per-organization rate limiting with local token buckets.
+
+Every API process keeps one token bucket per organization, sized by the
+organization's plan (``RATE_LIMIT_FREE_TIER`` / ``PRO`` / ``ENTERPRISE``,
+requests per minute). A request takes a token from the local bucket: a dict
+lookup and some arithmetic, with no network hop.
+
+Every ``RATE_LIMIT_SYNC_SECONDS`` a background task reconciles the buckets
+across processes. It sends each organization's locally spent tokens to a
+shared bucket in Redis with one atomic Lua script, and caps the local bucket
+at the tokens left globally. Between syncs each process refills on its own,
+so a burst can overshoot the limit by at most about one sync interval's
+refill per process. If Redis is unavailable, each process keeps enforcing
+the limit locally.
+
+The plans of all organizations are loaded in one query in the background
+and reloaded every ``RATE_LIMIT_PLAN_CACHE_SECONDS``, so a request never
+triggers a lookup of its own. The organization comes from an unauthenticated
+header; once the plans are loaded, IDs that name no organization share the
+free-tier ``default`` bucket, so made-up IDs add no state. Until the first
+load finishes, each organization gets its own free-tier bucket.
+"""
+
+from typing import Dict, Optional, Tuple
+import asyncio
+import time
+import aioredis
+import structlog
+from sqlalchemy import select
+
+from api.config import settings
+from api.database import AsyncSessionLocal
+from models.user import Organization
+
+logger = structlog.get_logger()
+
+# Bucket shared by requests without a known organization
+DEFAULT_BUCKET = "default"
+
+# Applies the tokens a process spent since its last sync to the shared bucket
+# and returns what is left, possibly negative.
+SYNC_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local spent = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate) - spent
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(tokens)
+"""
+
+
+def tier_limit(plan_type: Optional[str]) -> int:
+    """Requests per minute for a plan."""
+    if plan_type == "enterprise":
+        return settings.RATE_LIMIT_ENTERPRISE_TIER
+    if plan_type == "pro":
+        return settings.RATE_LIMIT_PRO_TIER
+    return settings.RATE_LIMIT_FREE_TIER
+
+
+class TokenBucket:
+    """Token bucket refilled continuously up to ``capacity``."""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated", "spent")
+
+    def __init__(self, limit_per_minute: int, now: float):
+        self.capacity = float(limit_per_minute)
+        self.rate = limit_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = now
+        self.spent = 0  # taken since the last sync
+
+    def refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def take(self, now: float) -> bool:
+        self.refill(now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        self.spent += 1
+        return True
+
+    def retry_after(self) -> float:
+        """Seconds until the next token."""
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def resize(self, limit_per_minute: int):
+        scale = limit_per_minute / self.capacity
+        self.capacity = float(limit_per_minute)
+        self.rate = limit_per_minute / 60.0
+        self.tokens = min(self.capacity, self.tokens * scale)
+
+
+class RateLimiter:
+    """Local token buckets keyed by organization, reconciled through Redis."""
+
+    def __init__(self, sync_seconds: Optional[float] = None, plan_cache_seconds: Optional[float] = None):
+        self.sync_seconds = sync_seconds or settings.RATE_LIMIT_SYNC_SECONDS
+        self.plan_cache_seconds = plan_cache_seconds or settings.RATE_LIMIT_PLAN_CACHE_SECONDS
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.plans: Dict[str, str] = {}  # organization -> plan, for every organization
+        self.plans_loaded_at: Optional[float] = None
+        self.redis = None
+        self._script = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self._plans_task: Optional[asyncio.Task] = None
+        self._plans_attempted_at: Optional[float] = None
+
+    async def get_redis(self):
+        """Get Redis connection."""
+        if self.redis is None:
+            self.redis = await aioredis.from_url(
+                settings.REDIS_URL,
+                password=settings.REDIS_PASSWORD,
+                encoding="utf-8",
+                decode_responses=True
+            )
+            self._script = self.redis.register_script(SYNC_SCRIPT)
+        return self.redis
+
+    def allow(self, organization_id: str) -> Tuple[bool, float]:
+        """Take a token for one request; returns whether it may proceed and, if not, the seconds to wait."""
+        now = time.monotonic()
+        self._ensure_sync()
+        self._ensure_plans(now)
+
+        key = self._bucket_key(organization_id)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(tier_limit(self.plans.get(key)), now)
+
+        if bucket.take(now):
+            return True, 0.0
+        return False, bucket.retry_after()
+
+    def _bucket_key(self, organization_id: str) -> str:
+        if self.plans_loaded_at is None or organization_id in self.plans:
+            return organization_id
+        return DEFAULT_BUCKET
+
+    def set_plan(self, organization_id: str, plan_type: Optional[str]):
+        """Record an organization's plan and resize its bucket if the tier changed."""
+        plan_type = plan_type or "free"
+        self.plans[organization_id] = plan_type
+        bucket = self.buckets.get(organization_id)
+        limit = tier_limit(plan_type)
+        if bucket is not None and bucket.capacity != limit:
+            bucket.resize(limit)
+
+    def set_plans(self, plans: Dict[str, Optional[str]]):
+        """Replace the plans of all organizations; organizations not listed no longer exist."""
+        self.plans = {}
+        for organization_id, plan_type in plans.items():
+            self.set_plan(organization_id, plan_type)
+        self.plans_loaded_at = self._plans_attempted_at = time.monotonic()
+
+    def _ensure_plans(self, now: float):
+        """Reload the plans in the background once they are older than the cache period."""
+        if self._plans_task is not None and not self._plans_task.done():
+            return
+        if self._plans_attempted_at is not None and now - self._plans_attempted_at <= self.plan_cache_seconds:
+            return
+        try:
+            self._plans_task = asyncio.get_running_loop().create_task(self.load_plans())
+        except RuntimeError:
+            return
+        self._plans_attempted_at = now
+
+    async def load_plans(self):
+        """Load every organization's plan in one query."""
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(select(Organization.id, Organization.plan_type))
+                self.set_plans({str(organization_id): plan_type for organization_id, plan_type in result.all()})
+        except Exception as e:
+            # Keep the current plans and retry once the cache expires, not on every request
+            logger.warning("Rate limit plan lookup failed", error=str(e))
+
+    def _ensure_sync(self):
+        if self._sync_task is None or self._sync_task.done():
+            try:
+                self._sync_task = asyncio.get_running_loop().create_task(self._sync_loop())
+            except RuntimeError:
+                pass
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.sync_seconds)
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Rate limit sync failed", error=str(e))
+
+    async def sync(self):
+        """Push locally spent tokens to the shared buckets and cap local buckets at what is left."""
+        await self.get_redis()
+        now = time.time()
+        monotonic_now = time.monotonic()
+        for organization_id, bucket in list(self.buckets.items()):
+            spent, bucket.spent = bucket.spent, 0
+            try:
+                remaining = float(await self._script(
+                    keys=[f"rate_limit:{organization_id}"],
+                    args=[bucket.capacity, bucket.rate, now, spent]
+                ))
+            except Exception:
+                bucket.spent += spent
+                raise
+            bucket.refill(monotonic_now)
+            bucket.tokens = min(bucket.tokens, remaining)
+
+            # Forget organizations idle long enough to have refilled completely, and
+            # buckets made before the plans showed that their organization does not exist
+            idle = spent == 0 and bucket.tokens >= bucket.capacity
+            if idle or self._bucket_key(organization_id) != organization_id:
+                del self.buckets[organization_id]
+
+    async def close(self):
+        """Stop syncing and close the Redis connection."""
+        task, self._sync_task = self._sync_task, None
+        if task is not None:
+            loop = task.get_loop()
+            if loop is asyncio.get_running_loop():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+            elif not loop.is_closed():
+                # A task can only be cancelled and awaited on its own loop
+                loop.call_soon_threadsafe(task.cancel)
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
+
+# Shared limiter; buckets live for the life of the process
+rate_limiter = RateLimiter()
@@ -0,0 +1,231 @@
+"""
+Per-job resource accounting and limits for computation workers.
+
+Work runs inside ``track_usage``, in the worker process that does it. The
+block:
+
+* watches RSS every ``WATCHDOG_SECONDS`` and raises ``MemoryError`` in the
+  work once it passes the computation's ``memory_gb``, so an oversized
+  partition fails instead of starving the node. RSS is used rather than
+  ``RLIMIT_AS`` because address space overstates what pandas and Arrow
+  actually touch;
+* lowers the soft ``RLIMIT_CPU`` to the computation's timeout, so a runaway
+  partition stops once the whole job's time budget is gone. The kernel sends
+  ``SIGXCPU`` and the partition raises ``TimeoutError``, which leaves the
+  worker process alive;
+* resets the kernel's peak-RSS counter (``/proc/self/clear_refs``), so the peak
+  reported for the block is its own and not the largest one the process has
+  ever seen;
+* samples CPU time and RSS from ``/proc/self`` every
+  ``RESOURCE_SAMPLE_SECONDS`` on a background thread.
+
+The CPU limit and signal handlers are restored afterwards, because pool
+processes are shared by every job on the worker. ``merge_samples`` folds the
+samples of concurrently running partitions into one time series per job, and
+``build_samples`` turns that series into ``JobResourceSample`` rows.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+import os
+import resource
+import signal
+import threading
+import time
+
+from api.config import settings
+from models.computation import ComputationJob, FeatureComputation, JobResourceSample
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = resource.getpagesize()
+WATCHDOG_SECONDS = 0.25
+
+
+def limits_for(computation: FeatureComputation) -> Dict[str, Optional[int]]:
+    """Per-process limits derived from the computation's resource settings."""
+    return {
+        "memory_bytes": computation.memory_gb * 1024 ** 3 if computation.memory_gb else None,
+        "cpu_seconds": computation.timeout_minutes * 60 if computation.timeout_minutes else None,
+    }
+
+
+def read_proc_usage(pid: str = "self") -> Optional[Dict[str, float]]:
+    """CPU seconds and current RSS of a process from ``/proc``; ``None`` without procfs."""
+    try:
+        with open(f"/proc/{pid}/stat") as stat_file:
+            # Fields after the parenthesized command name; utime and stime are 14 and 15
+            fields = stat_file.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as statm_file:
+            resident_pages = int(statm_file.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return {
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+        "rss_bytes": resident_pages * PAGE_SIZE,
+    }
+
+
+def reset_peak_rss():
+    """Restart the process's peak-RSS (``VmHWM``) tracking, where the kernel allows it."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_bytes() -> int:
+    """Peak RSS since the last ``reset_peak_rss``, or for the process lifetime without procfs."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # ru_maxrss is KiB on Linux
+
+
+def _raise_timeout(signum, frame):
+    raise TimeoutError("Computation exceeded its timeout")
+
+
+def _raise_memory_error(signum, frame):
+    raise MemoryError("Computation exceeded its memory limit")
+
+
+@contextmanager
+def _cpu_limit(seconds: Optional[int]) -> Iterator[None]:
+    """Temporarily lower the soft ``RLIMIT_CPU``; the hard limit is never touched."""
+    if not seconds:
+        yield
+        return
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    # RLIMIT_CPU counts the process's lifetime CPU, so the budget starts from what it has used
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    limit = int(usage.ru_utime + usage.ru_stime) + seconds + 1
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    if soft != resource.RLIM_INFINITY and soft <= limit:
+        yield
+        return
+
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+class _Sampler(threading.Thread):
+    """
+    Background thread that records ``[timestamp, cpu_seconds_delta, rss_bytes]``
+    samples and interrupts the main thread once RSS passes ``memory_limit``.
+    """
+
+    def __init__(self, interval: float, memory_limit: Optional[int] = None):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.memory_limit = memory_limit
+        self.samples: List[List[float]] = []
+        self.exceeded = False
+        self._stop_event = threading.Event()
+        self._last = read_proc_usage()
+        self._next_sample = time.monotonic() + interval
+
+    def sample(self, usage: Optional[Dict[str, float]]):
+        if usage is None or self._last is None:
+            return
+        self.samples.append([time.time(), usage["cpu_seconds"] - self._last["cpu_seconds"], usage["rss_bytes"]])
+        self._last = usage
+        self._next_sample = time.monotonic() + self.interval
+
+    def run(self):
+        if self._last is None:
+            return  # no procfs
+        while not self._stop_event.wait(WATCHDOG_SECONDS):
+            usage = read_proc_usage()
+            if usage is None:
+                continue
+            if self.memory_limit and usage["rss_bytes"] > self.memory_limit and not self.exceeded:
+                self.exceeded = True
+                signal.pthread_kill(threading.main_thread().ident, signal.SIGUSR1)
+            if time.monotonic() >= self._next_sample:
+                self.sample(usage)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        # Always close with a sample so short blocks still report one
+        self.sample(read_proc_usage())
+
+
+@contextmanager
+def track_usage(limits: Optional[Dict[str, Optional[int]]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Measure and limit the enclosed work in this process.
+
+    Yields a dict that is filled on exit with ``pid``, ``cpu_seconds``,
+    ``peak_rss_bytes`` and ``samples``. Limits are enforced only when called
+    on the main thread, which is where signals are delivered.
+    """
+    limits = limits or {}
+    stats: Dict[str, Any] = {"pid": os.getpid()}
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    reset_peak_rss()
+
+    enforce = threading.current_thread() is threading.main_thread()
+    memory_limit = limits.get("memory_bytes") if enforce else None
+    if enforce:
+        previous_handlers = (
+            signal.signal(signal.SIGXCPU, _raise_timeout),
+            signal.signal(signal.SIGUSR1, _raise_memory_error),
+        )
+    sampler = _Sampler(settings.RESOURCE_SAMPLE_SECONDS, memory_limit)
+    sampler.start()
+    try:
+        with _cpu_limit(limits.get("cpu_seconds") if enforce else None):
+            try:
+                yield stats
+            except MemoryError:
+                if memory_limit:
+                    raise MemoryError(f"Computation exceeded its memory limit of {memory_limit / 1024 ** 3:g} GB")
+                raise
+    finally:
+        sampler.stop()
+        if enforce:
+            signal.signal(signal.SIGXCPU, previous_handlers[0])
+            signal.signal(signal.SIGUSR1, previous_handlers[1])
+
+        usage_after = resource.getrusage(resource.RUSAGE_SELF)
+        stats["cpu_seconds"] = (
+            (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+        )
+        stats["peak_rss_bytes"] = peak_rss_bytes()
+        stats["samples"] = sampler.samples
+
+
+def merge_samples(series: Dict[int, Dict[str, Any]], pid: int, samples: List[List[float]]):
+    """Fold one process's samples into a job's series of ``RESOURCE_SAMPLE_SECONDS`` buckets."""
+    interval = settings.RESOURCE_SAMPLE_SECONDS
+    for timestamp, cpu_seconds, rss_bytes in samples:
+        bucket = series.setdefault(int(timestamp // interval * interval), {"cpu_seconds": 0.0, "rss_by_pid": {}})
+        bucket["cpu_seconds"] += cpu_seconds
+        bucket["rss_by_pid"][pid] = max(bucket["rss_by_pid"].get(pid, 0), rss_bytes)
+
+
+def build_samples(job: ComputationJob, series: Dict[int, Dict[str, Any]]) -> List[JobResourceSample]:
+    """Rows for a job's resource series: cores busy and memory in use per bucket."""
+    interval = settings.RESOURCE_SAMPLE_SECONDS
+    return [
+        JobResourceSample(
+            job_id=job.id,
+            organization_id=job.organization_id,
+            sampled_at=datetime.utcfromtimestamp(bucket),
+            cpu_cores=values["cpu_seconds"] / interval,
+            memory_gb=sum(values["rss_by_pid"].values()) / (1024 ** 3)
+        )
+        for bucket, values in sorted(series.items())
+    ]
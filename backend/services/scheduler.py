@@ -0,0 +1,265 @@
+"""
+Cron scheduler for feature computations.
+
+Every API replica runs a ``ComputationScheduler``, but only the replica that
+holds the ``scheduler_leases`` row acts: leadership is a time-limited lease
+renewed on each tick, so if the leader dies another replica takes over once
+the lease expires. The leader polls computations whose ``next_run_at`` has
+passed (served by ``idx_computation_schedule``), enqueues a job for each due
+fire time according to ``SCHEDULER_CATCHUP_POLICY`` and advances
+``next_run_at``:
+
+* ``skip``: run the latest missed fire only if it is within
+  ``SCHEDULER_MISFIRE_GRACE_SECONDS``; older fires are dropped.
+* ``latest``: run once for the most recent missed fire.
+* ``all``: run every missed fire, up to ``SCHEDULER_MAX_CATCHUP_RUNS``.
+
+Job IDs are derived from the computation and fire time, so a fire can never be
+enqueued twice even if two replicas briefly both believe they lead.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional
+import asyncio
+import os
+import socket
+import uuid
+from sqlalchemy import select, update, and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from prometheus_client import Counter
+import structlog
+
+from api.config import settings
+from api.database import AsyncSessionLocal
+from models.computation import (
+    FeatureComputation, ComputationJob, ComputationTask, SchedulerLease, JobStatus
+)
+from .cron import CronError, parse_cron
+from .job_queue import JobQueue, job_queue
+
+logger = structlog.get_logger()
+
+SCHEDULED_RUNS = Counter(
+    'computation_scheduled_runs_total',
+    'Scheduled computation fires by outcome',
+    ['outcome']
+)
+
+LEASE_NAME = "computation-scheduler"
+CATCHUP_POLICIES = ("skip", "latest", "all")
+
+
+class ComputationScheduler:
+    """Leader-elected loop that enqueues due scheduled computations."""
+
+    def __init__(
+        self,
+        instance_id: Optional[str] = None,
+        queue: Optional[JobQueue] = None,
+        session_factory=AsyncSessionLocal,
+        catchup_policy: Optional[str] = None
+    ):
+        self.instance_id = instance_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.queue = queue or job_queue
+        self.session_factory = session_factory
+        self.poll_interval = settings.SCHEDULER_POLL_SECONDS
+        self.lease_seconds = settings.SCHEDULER_LEASE_SECONDS
+        self.batch_size = settings.SCHEDULER_BATCH_SIZE
+        self.catchup_policy = catchup_policy or settings.SCHEDULER_CATCHUP_POLICY
+        if self.catchup_policy not in CATCHUP_POLICIES:
+            raise ValueError(f"Unknown catch-up policy: {self.catchup_policy}")
+
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def start(self):
+        """Start the scheduler loop on the running event loop."""
+        self._stopping.clear()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        """Stop the loop and hand leadership to another replica."""
+        self._stopping.set()
+        if self._task:
+            await self._task
+            self._task = None
+        async with self.session_factory() as session:
+            await self.release_leadership(session)
+
+    async def run(self):
+        logger.info("Scheduler started", instance_id=self.instance_id)
+        while not self._stopping.is_set():
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Scheduler tick failed: {e}", instance_id=self.instance_id)
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def acquire_leadership(self, session: AsyncSession) -> bool:
+        """Take or renew the leader lease. Returns True if this instance leads."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+
+        renewed = await session.execute(
+            update(SchedulerLease)
+            .where(
+                and_(
+                    SchedulerLease.name == LEASE_NAME,
+                    or_(SchedulerLease.holder == self.instance_id, SchedulerLease.expires_at < now)
+                )
+            )
+            .values(holder=self.instance_id, expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        if renewed.rowcount == 1:
+            await session.commit()
+            return True
+
+        # No row yet, or another live holder; the primary key settles races
+        try:
+            session.add(SchedulerLease(name=LEASE_NAME, holder=self.instance_id, expires_at=expires_at))
+            await session.commit()
+            logger.info("Acquired scheduler leadership", instance_id=self.instance_id)
+            return True
+        except IntegrityError:
+            await session.rollback()
+            return False
+
+    async def release_leadership(self, session: AsyncSession):
+        """Expire our lease so another replica can take over immediately."""
+        await session.execute(
+            update(SchedulerLease)
+            .where(and_(SchedulerLease.name == LEASE_NAME, SchedulerLease.holder == self.instance_id))
+            .values(expires_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+    def due_fires(self, schedule: str, next_run_at: datetime, now: datetime) -> List[datetime]:
+        """Fire times to run now for a computation due since ``next_run_at``."""
+        cron = parse_cron(schedule)
+        if self.catchup_policy == "all":
+            return cron.fires_between(next_run_at, now, keep_last=settings.SCHEDULER_MAX_CATCHUP_RUNS)
+
+        latest = cron.fires_between(next_run_at, now, keep_last=1)
+        if not latest:
+            return []
+        if self.catchup_policy == "skip":
+            if (now - latest[0]).total_seconds() > settings.SCHEDULER_MISFIRE_GRACE_SECONDS:
+                return []
+        return latest
+
+    async def tick(self) -> int:
+        """Enqueue due computations if this instance is the leader. Returns runs enqueued."""
+        async with self.session_factory() as session:
+            if not await self.acquire_leadership(session):
+                return 0
+            await self._initialize_schedules(session)
+            return await self._enqueue_due(session)
+
+    async def _initialize_schedules(self, session: AsyncSession):
+        """Give newly scheduled computations their first ``next_run_at``."""
+        now = datetime.utcnow()
+        result = await session.execute(
+            select(FeatureComputation)
+            .where(
+                and_(
+                    FeatureComputation.is_active.is_(True),
+                    FeatureComputation.schedule.isnot(None),
+                    FeatureComputation.next_run_at.is_(None)
+                )
+            )
+            .limit(self.batch_size)
+        )
+        for computation in result.scalars().all():
+            try:
+                computation.next_run_at = parse_cron(computation.schedule).next_after(now)
+            except CronError as e:
+                logger.warning("Invalid computation schedule", computation_id=str(computation.id), error=str(e))
+        await session.commit()
+
+    async def _enqueue_due(self, session: AsyncSession) -> int:
+        now = datetime.utcnow()
+        query = (
+            select(FeatureComputation)
+            .where(
+                and_(
+                    FeatureComputation.next_run_at <= now,
+                    FeatureComputation.is_active.is_(True),
+                    FeatureComputation.schedule.isnot(None)
+                )
+            )
+            .order_by(FeatureComputation.next_run_at)
+            .limit(self.batch_size)
+        )
+        if self.queue.supports_skip_locked(session):
+            query = query.with_for_update(skip_locked=True)
+
+        enqueued = 0
+        for computation in (await session.execute(query)).scalars().all():
+            try:
+                fires = self.due_fires(computation.schedule, computation.next_run_at, now)
+                computation.next_run_at = parse_cron(computation.schedule).next_after(now)
+            except CronError as e:
+                logger.warning("Invalid computation schedule", computation_id=str(computation.id), error=str(e))
+                computation.next_run_at = None
+                continue
+
+            if not fires:
+                SCHEDULED_RUNS.labels(outcome="skipped").inc()
+            for fire in fires:
+                if await self._enqueue_fire(session, computation, fire):
+                    enqueued += 1
+
+        try:
+            await session.commit()
+        except IntegrityError:
+            # Another leader already enqueued one of these fires; retry next tick
+            await session.rollback()
+            logger.warning("Scheduled runs already enqueued", instance_id=self.instance_id)
+            return 0
+
+        SCHEDULED_RUNS.labels(outcome="enqueued").inc(enqueued)
+        if enqueued:
+            logger.info("Enqueued scheduled computations", runs=enqueued)
+        return enqueued
+
+    async def _enqueue_fire(self, session: AsyncSession, computation: FeatureComputation, fire: datetime) -> bool:
+        """Enqueue one fire in its own savepoint; returns False if that run already exists."""
+        job = ComputationJob(
+            computation_id=computation.id,
+            job_id=f"scheduled-{computation.id}-{fire:%Y%m%dT%H%M}",
+            job_name=f"Scheduled run at {fire:%Y-%m-%d %H:%M}",
+            status=JobStatus.PENDING,
+            input_data={"scheduled_for": fire.isoformat()},
+            created_by="scheduler",
+            organization_id=computation.organization_id
+        )
+        task = ComputationTask(
+            job=job,
+            name=job.job_name,
+            task_type="job",
+            created_by="scheduler",
+            organization_id=computation.organization_id
+        )
+        try:
+            # A duplicate run must not roll back the rest of the batch or its next_run_at advances
+            async with session.begin_nested():
+                session.add(job)
+                await self.queue.enqueue(session, task, commit=False)
+                # The queue's attempts are the job's retries
+                job.max_retries = task.max_attempts - 1
+        except IntegrityError:
+            SCHEDULED_RUNS.labels(outcome="duplicate").inc()
+            logger.info("Scheduled run already enqueued", computation_id=str(computation.id), fire=fire.isoformat())
+            return False
+        return True
+
+
+# Shared scheduler instance started by the API lifespan
+computation_scheduler = ComputationScheduler()
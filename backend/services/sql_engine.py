@@ -0,0 +1,274 @@
+"""
+Embedded SQL engine for ``transformation_type="sql"`` features.
+
+A feature version's SQL runs on a single node over the organization's file
+``DataSource`` inputs (``connection_config = {"path": ..., "format":
+"parquet" | "csv"}``). Every source referenced after ``FROM``/``JOIN`` is
+exposed as a table of the same name. The query must return ``entity_id`` and
+``value`` columns, plus ``effective_timestamp`` if it is not "now".
+
+DuckDB is used when installed: each feature version gets a cached plan, which
+is a connection holding its sources as tables and a ``PREPARE``d statement.
+Later runs skip parsing and binding and just ``EXECUTE`` it. The plan key
+includes each file's size and modification time, so a changed source compiles
+a fresh plan. Results stream back as Arrow record batches and are written to
+the store batch by batch. Without DuckDB, the sources are loaded into
+in-memory SQLite and rows are fetched in batches of the same size.
+
+Feature SQL is written by tenants, so it only sees the tables it was given.
+Table functions (``read_csv_auto(...)``) are rejected up front. Once its
+sources are loaded, a DuckDB connection has external access disabled and its
+configuration locked before the query is prepared, so a query cannot read
+files, attach databases or load extensions. SQLite connections deny
+``ATTACH`` and ``PRAGMA``.
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import pandas as pd
+import structlog
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - optional dependency
+    duckdb = None
+
+from api.config import settings
+from models.computation import ComputationJob, DataSource, FeatureComputation, JobStatus
+from models.feature import FeatureVersion
+from .local_executor import LocalComputeEngine, finish_job, local_engine, new_usage_totals
+
+logger = structlog.get_logger()
+
+TABLE_REFERENCE = re.compile(r"\b(?:from|join)\s+\"?([A-Za-z_][A-Za-z0-9_]*)\"?(\s*\()?", re.IGNORECASE)
+FILE_FORMATS = ("parquet", "csv")
+
+# Statements feature SQL may not run against the SQLite fallback
+SQLITE_DENIED_ACTIONS = {sqlite3.SQLITE_ATTACH, sqlite3.SQLITE_DETACH, sqlite3.SQLITE_PRAGMA}
+
+
+def referenced_tables(sql: str) -> List[str]:
+    """Table names the query reads, in order of first use. Table functions are rejected."""
+    names = []
+    for name, call in TABLE_REFERENCE.findall(sql):
+        if call:
+            raise ValueError(f"SQL transformations may only read their data sources, not table functions: {name}")
+        names.append(name)
+    return list(OrderedDict.fromkeys(names))
+
+
+def _sqlite_authorizer(action: int, *args) -> int:
+    return sqlite3.SQLITE_DENY if action in SQLITE_DENIED_ACTIONS else sqlite3.SQLITE_OK
+
+
+def _quote_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+class CompiledPlan:
+    """A feature version's query bound to its sources and prepared for execution."""
+
+    def __init__(self, key: Tuple[str, ...], sql: str, sources: Dict[str, Dict[str, Any]]):
+        self.key = key
+        self.sql = sql
+        self.sources = sources
+        self.lock = threading.Lock()
+        self.connection = None
+
+        if duckdb is not None:
+            self.connection = duckdb.connect(":memory:")
+            try:
+                for name, config in sources.items():
+                    reader = "read_parquet" if config["format"] == "parquet" else "read_csv_auto"
+                    self.connection.execute(
+                        f'CREATE TABLE "{name}" AS SELECT * FROM {reader}({_quote_literal(config["path"])})'
+                    )
+                # From here on the query sees only the tables above
+                self.connection.execute("SET enable_external_access = false")
+                self.connection.execute("SET lock_configuration = true")
+                # Parse, bind and plan once; runs only EXECUTE
+                self.connection.execute(f"PREPARE feature_plan AS {sql}")
+            except Exception:
+                self.connection.close()
+                raise
+
+    def batches(self, batch_rows: int) -> Iterator[pd.DataFrame]:
+        """Execute the plan, yielding result batches. Blocking; run in a thread."""
+        with self.lock:
+            if self.connection is not None:
+                reader = self.connection.execute("EXECUTE feature_plan").fetch_record_batch(batch_rows)
+                for batch in reader:
+                    yield batch.to_pandas()
+                return
+
+            with sqlite3.connect(":memory:") as conn:
+                for name, config in self.sources.items():
+                    if config["format"] == "parquet":
+                        frame = pd.read_parquet(config["path"])
+                    else:
+                        frame = pd.read_csv(config["path"])
+                    frame.to_sql(name, conn, index=False)
+
+                conn.set_authorizer(_sqlite_authorizer)
+                cursor = conn.execute(self.sql)
+                columns = [column[0] for column in cursor.description]
+                while True:
+                    rows = cursor.fetchmany(batch_rows)
+                    if not rows:
+                        return
+                    yield pd.DataFrame.from_records(rows, columns=columns)
+
+    def close(self):
+        """Release the DuckDB connection once any in-flight run finishes."""
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+class SQLTransformationEngine:
+    """Materializes SQL feature transformations with cached plans."""
+
+    def __init__(
+        self,
+        engine: Optional[LocalComputeEngine] = None,
+        batch_rows: Optional[int] = None,
+        plan_cache_size: Optional[int] = None
+    ):
+        self.engine = engine or local_engine
+        self.batch_rows = batch_rows or settings.SQL_ENGINE_BATCH_ROWS
+        self.plan_cache_size = plan_cache_size or settings.SQL_ENGINE_PLAN_CACHE_SIZE
+        self._plans: "OrderedDict[Tuple[str, ...], CompiledPlan]" = OrderedDict()
+        self._plans_lock = threading.Lock()
+
+    async def resolve_sources(
+        self,
+        db: AsyncSession,
+        organization_id: str,
+        sql: str
+    ) -> Dict[str, Dict[str, Any]]:
+        """Map table names used by ``sql`` to the organization's file data sources."""
+        names = referenced_tables(sql)
+        if not names:
+            return {}
+
+        result = await db.execute(
+            select(DataSource).where(
+                and_(
+                    DataSource.organization_id == organization_id,
+                    DataSource.name.in_(names),
+                    DataSource.is_active.is_(True)
+                )
+            )
+        )
+        sources = {}
+        for source in result.scalars().all():
+            config = source.connection_config or {}
+            source_format = config.get("format", "parquet")
+            if source.source_type != "file" or source_format not in FILE_FORMATS or "path" not in config:
+                raise ValueError(f"Data source {source.name} is not a local Parquet/CSV file")
+            sources[source.name] = {"path": config["path"], "format": source_format}
+            source.last_accessed_at = datetime.utcnow()
+        return sources
+
+    def get_plan(self, version_id: Any, sql: str, sources: Dict[str, Dict[str, Any]]) -> CompiledPlan:
+        """Return the cached plan for this version, compiling it on first use."""
+        # Sources are copied into the plan, so a changed file needs a new one
+        files = []
+        for name, config in sorted(sources.items()):
+            stat = os.stat(config["path"])
+            files.append((name, config["path"], config["format"], stat.st_size, stat.st_mtime_ns))
+        signature = hashlib.sha256(repr((sql, files)).encode()).hexdigest()
+        key = (str(version_id), signature)
+
+        with self._plans_lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                return plan
+
+        plan = CompiledPlan(key, sql, sources)
+        evicted = []
+        with self._plans_lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.plan_cache_size:
+                evicted.append(self._plans.popitem(last=False)[1])
+        for old_plan in evicted:
+            old_plan.close()
+        return plan
+
+    async def run(
+        self,
+        db: AsyncSession,
+        job: ComputationJob,
+        computation: FeatureComputation,
+        version: FeatureVersion,
+        overrides: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Materialize ``version.transformation`` into ``feature_values``."""
+        spec = {**(computation.config or {}), **(job.input_data or {}), **(overrides or {})}
+        sql = version.transformation.strip().rstrip(";")
+
+        started = time.monotonic()
+        cpu_started = time.process_time()
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        job.progress_percentage = 0.0
+        sources = await self.resolve_sources(db, computation.organization_id, sql)
+        await db.commit()
+
+        loop = asyncio.get_running_loop()
+        plan = await loop.run_in_executor(None, self.get_plan, version.id, sql, sources)
+        batches = plan.batches(self.batch_rows)
+        totals = new_usage_totals()
+
+        # Pull each batch on a thread so the event loop keeps serving while the engine scans
+        try:
+            while True:
+                batch = await loop.run_in_executor(None, next, batches, None)
+                if batch is None:
+                    break
+                missing = {"entity_id", "value"} - set(batch.columns)
+                if missing:
+                    raise ValueError(f"SQL transformation must return columns: {', '.join(sorted(missing))}")
+
+                written = await self.engine.write_values(db, batch, computation, spec)
+                totals["partitions"] += 1
+                totals["records_processed"] += len(batch)
+                totals["records_output"] += written
+                job.records_processed = totals["records_processed"]
+                job.records_output = totals["records_output"]
+                await db.commit()
+        finally:
+            # Releases the plan for the next run even if we stopped early
+            batches.close()
+
+        totals["cpu_seconds"] = time.process_time() - cpu_started
+        duration = time.monotonic() - started
+        finish_job(db, job, computation, totals, duration)
+        job.output_data = {**job.output_data, "engine": "duckdb" if duckdb is not None else "sqlite"}
+        await db.commit()
+
+        logger.info(
+            "SQL transformation completed",
+            job_id=job.job_id,
+            version_id=str(version.id),
+            sources=list(sources),
+            records_output=totals["records_output"],
+            duration=duration
+        )
+        return job.output_data
+
+
+# Shared engine; plans are cached for the life of the process
+sql_engine = SQLTransformationEngine()
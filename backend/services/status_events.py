@@ -0,0 +1,201 @@
+"""
+Live status events for computation jobs and tasks.
+
+Whenever a commit changes a job's ``status`` or ``progress_percentage``, or a
+task's ``status``, an event is published to the Redis channel
+``STATUS_EVENTS_CHANNEL``. ORM changes are picked up by session hooks, and the
+worker publishes the queue's bulk lease/complete/fail updates itself. Events
+look like this::
+
+    {"type": "job", "id": "...", "organization_id": "...", "status": "running",
+     "progress_percentage": 42.0, "records_processed": 1200, "error_message": null,
+     "at": "2026-01-01T00:00:00"}
+
+Each API process keeps a single Redis subscription and fans events out to
+in-memory subscriber queues keyed by ``(type, id)``. Any number of clients
+watching a job therefore cost no database queries once they are connected.
+Subscriber queues are bounded, and a slow client loses its oldest events
+first. When Redis is unavailable, events are still delivered to subscribers
+in the publishing process.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+import asyncio
+import json
+import aioredis
+import structlog
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from api.config import settings
+from models.computation import ComputationJob, ComputationTask, JobStatus
+
+logger = structlog.get_logger()
+
+TERMINAL_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED, JobStatus.TIMEOUT}
+
+
+def _status_value(status: Any) -> Optional[str]:
+    return status.value if isinstance(status, JobStatus) else status
+
+
+def job_event(job: ComputationJob) -> Dict[str, Any]:
+    """Status event for a computation job."""
+    return {
+        "type": "job",
+        "id": str(job.id),
+        "organization_id": job.organization_id,
+        "status": _status_value(job.status),
+        "progress_percentage": job.progress_percentage,
+        "records_processed": job.records_processed,
+        "error_message": job.error_message,
+        "at": datetime.utcnow().isoformat(),
+    }
+
+
+def task_event(task: ComputationTask, status: Optional[JobStatus] = None, error: Optional[str] = None) -> Dict[str, Any]:
+    """Status event for a queued task; ``status`` overrides the loaded value after bulk updates."""
+    return {
+        "type": "task",
+        "id": str(task.id),
+        "organization_id": task.organization_id,
+        "status": _status_value(status or task.status),
+        "job_id": str(task.job_id) if task.job_id else None,
+        "error_message": error if error is not None else task.error_message,
+        "at": datetime.utcnow().isoformat(),
+    }
+
+
+def is_terminal(event_data: Dict[str, Any]) -> bool:
+    return event_data.get("status") in {status.value for status in TERMINAL_STATUSES}
+
+
+class StatusBroker:
+    """Publishes status events and fans them out to local subscribers."""
+
+    def __init__(self, channel: Optional[str] = None, queue_size: Optional[int] = None):
+        self.channel = channel or settings.STATUS_EVENTS_CHANNEL
+        self.queue_size = queue_size or settings.STATUS_STREAM_QUEUE_SIZE
+        self.redis = None
+        self._subscribers: Dict[Tuple[str, str], Set[asyncio.Queue]] = defaultdict(set)
+        self._listener: Optional[asyncio.Task] = None
+        self._publishing: Set[asyncio.Task] = set()
+
+    async def get_redis(self):
+        """Get Redis connection."""
+        if self.redis is None:
+            self.redis = await aioredis.from_url(
+                settings.REDIS_URL,
+                password=settings.REDIS_PASSWORD,
+                encoding="utf-8",
+                decode_responses=True
+            )
+        return self.redis
+
+    def deliver(self, event_data: Dict[str, Any]):
+        """Hand an event to every local subscriber of its job or task."""
+        for queue in self._subscribers.get((event_data["type"], event_data["id"]), ()):
+            if queue.full():
+                # Drop the oldest event; the newest status is what matters
+                queue.get_nowait()
+            queue.put_nowait(event_data)
+
+    async def publish(self, event_data: Dict[str, Any]):
+        """Publish to every API process, falling back to this process's subscribers."""
+        try:
+            redis = await self.get_redis()
+            await redis.publish(self.channel, json.dumps(event_data))
+        except Exception as e:
+            logger.warning("Status event publish failed", error=str(e), type=event_data["type"], id=event_data["id"])
+            self.deliver(event_data)
+
+    def publish_nowait(self, event_data: Dict[str, Any]):
+        """Publish from synchronous code running on the event loop, such as session hooks."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        publishing = loop.create_task(self.publish(event_data))
+        self._publishing.add(publishing)
+        publishing.add_done_callback(self._publishing.discard)
+
+    async def subscribe(self, kind: str, object_id: str) -> asyncio.Queue:
+        """Start receiving events for one job or task; pair with ``unsubscribe``."""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[(kind, object_id)].add(queue)
+        return queue
+
+    def unsubscribe(self, kind: str, object_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get((kind, object_id))
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[(kind, object_id)]
+
+    async def _listen(self):
+        """Relay the Redis channel to local subscribers, reconnecting on errors."""
+        while True:
+            try:
+                redis = await self.get_redis()
+                pubsub = redis.pubsub()
+                await pubsub.subscribe(self.channel)
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.deliver(json.loads(message["data"]))
+                finally:
+                    await pubsub.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Status event subscription lost, reconnecting", error=str(e))
+                await asyncio.sleep(1)
+
+    async def close(self):
+        """Stop the Redis subscription and close the connection."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
+
+# Shared broker; one Redis subscription per process
+status_broker = StatusBroker()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_status_events(session: Session, flush_context):
+    """Record status changes as they are flushed; they are published once committed."""
+    pending = session.info.setdefault("status_events", {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, ComputationJob):
+            state = inspect(obj)
+            if obj in session.new or any(
+                state.attrs[name].history.has_changes() for name in ("status", "progress_percentage")
+            ):
+                pending[("job", str(obj.id))] = job_event(obj)
+        elif isinstance(obj, ComputationTask):
+            if obj in session.new or inspect(obj).attrs.status.history.has_changes():
+                pending[("task", str(obj.id))] = task_event(obj)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_status_events(session: Session):
+    for event_data in session.info.pop("status_events", {}).values():
+        status_broker.publish_nowait(event_data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_status_events(session: Session):
+    session.info.pop("status_events", None)
@@ -0,0 +1,284 @@
+"""
+Streaming feature computations (``JobType.STREAMING``).
+
+Events are consumed from the Kafka topic ``{KAFKA_TOPIC_PREFIX}.{topic}`` as
+JSON objects and aggregated incrementally by a ``WindowAggregator``. The
+computation config describes the stream::
+
+    {
+        "topic": "payments",
+        "entity_column": "user_id",
+        "timestamp_column": "event_time",
+        "value_column": "amount",
+        "aggregation": "sum",
+        "window": {"type": "sliding", "size": "1h", "slide": "1m"}
+    }
+
+Every emitted window goes to the online store right away, unless the store
+already holds a newer window for its entity: a late event re-emits an older
+window, and that correction must not replace the value being served. Every
+``STREAM_SNAPSHOT_SECONDS``, all emitted windows, re-emissions included, are
+merged into ``feature_values`` (one row per entity and window end) in the same
+transaction that saves the aggregator state and the next Kafka offset of each
+partition in ``ComputationJob.checkpoint_data``. After a restart, the state is
+restored and partitions are rewound to those offsets, so events are neither
+lost nor counted twice. The consumer group offsets are committed after the
+checkpoint, for monitoring only.
+
+Every poll advances the watermark, including polls that return no events. A
+topic that stays quiet for ``STREAM_IDLE_TIMEOUT_SECONDS`` lets its watermark
+follow the clock, so its last windows still close.
+
+The job runs until it is cancelled, or for ``max_runtime_seconds`` if set.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import time
+import pandas as pd
+import structlog
+from prometheus_client import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.config import settings
+from models.computation import ComputationJob, FeatureComputation, JobStatus
+from .local_executor import LocalComputeEngine, local_engine
+from .online_store import OnlineStore, online_store
+from .window_aggregation import WindowAggregator, WindowSpec
+
+logger = structlog.get_logger()
+
+STREAM_EVENTS = Counter(
+    'streaming_events_total',
+    'Events consumed by streaming feature computations',
+    ['outcome']
+)
+
+
+class KafkaEventSource:
+    """Polls JSON events from a Kafka topic, rewinding to checkpointed offsets."""
+
+    def __init__(self, topic: str, group_id: str, offsets: Optional[Dict[str, int]] = None,
+                 batch_size: Optional[int] = None):
+        self.topic = f"{settings.KAFKA_TOPIC_PREFIX}.{topic}"
+        self.group_id = group_id
+        self.offsets = dict(offsets or {})
+        self.batch_size = batch_size or settings.STREAM_BATCH_SIZE
+        self._consumer = None
+
+    @property
+    def consumer(self):
+        if self._consumer is None:
+            from kafka import ConsumerRebalanceListener, KafkaConsumer
+
+            source = self
+
+            class SeekToCheckpoint(ConsumerRebalanceListener):
+                def on_partitions_revoked(self, revoked):
+                    pass
+
+                def on_partitions_assigned(self, assigned):
+                    for partition in assigned:
+                        offset = source.offsets.get(str(partition.partition))
+                        if offset is not None:
+                            source._consumer.seek(partition, offset)
+
+            self._consumer = KafkaConsumer(
+                bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS.split(","),
+                group_id=self.group_id,
+                enable_auto_commit=False,
+                auto_offset_reset="earliest",
+                value_deserializer=lambda value: json.loads(value)
+            )
+            self._consumer.subscribe([self.topic], listener=SeekToCheckpoint())
+        return self._consumer
+
+    def poll(self, timeout_ms: int = 1000) -> List[Dict[str, Any]]:
+        """Next batch of events. Blocking; run in a thread."""
+        events = []
+        for partition, records in self.consumer.poll(timeout_ms=timeout_ms, max_records=self.batch_size).items():
+            for record in records:
+                events.append(record.value)
+            if records:
+                self.offsets[str(partition.partition)] = records[-1].offset + 1
+        return events
+
+    def commit(self):
+        """Commit the consumed offsets to the consumer group."""
+        if self._consumer is not None:
+            self._consumer.commit()
+
+    def close(self):
+        if self._consumer is not None:
+            self._consumer.close()
+            self._consumer = None
+
+
+class StreamingFeatureRunner:
+    """Runs streaming computations with windowed aggregation and periodic checkpoints."""
+
+    def __init__(
+        self,
+        engine: Optional[LocalComputeEngine] = None,
+        store: Optional[OnlineStore] = None,
+        snapshot_seconds: Optional[int] = None
+    ):
+        self.engine = engine or local_engine
+        self.store = store or online_store
+        self.snapshot_seconds = snapshot_seconds or settings.STREAM_SNAPSHOT_SECONDS
+
+    def build_aggregator(self, spec: Dict[str, Any]) -> WindowAggregator:
+        window = spec.get("window")
+        if not isinstance(window, dict):
+            raise ValueError("Streaming config requires a 'window' object")
+        return WindowAggregator(
+            WindowSpec.from_config(window),
+            spec.get("aggregation", "count"),
+            max_out_of_orderness=spec.get(
+                "max_out_of_orderness", settings.STREAM_MAX_OUT_OF_ORDERNESS_SECONDS
+            ),
+            allowed_lateness=spec.get("allowed_lateness", settings.STREAM_ALLOWED_LATENESS_SECONDS),
+            idle_timeout=spec.get("idle_timeout", settings.STREAM_IDLE_TIMEOUT_SECONDS)
+        )
+
+    async def run(
+        self,
+        db: AsyncSession,
+        job: ComputationJob,
+        computation: FeatureComputation,
+        overrides: Optional[Dict[str, Any]] = None,
+        source: Optional[KafkaEventSource] = None
+    ) -> Dict[str, Any]:
+        """Consume the computation's topic until the job is cancelled or times out."""
+        spec = {**(computation.config or {}), **(job.input_data or {}), **(overrides or {})}
+        for key in ("topic", "entity_column", "timestamp_column"):
+            if key not in spec:
+                raise ValueError(f"Streaming config requires '{key}'")
+
+        aggregator = self.build_aggregator(spec)
+        checkpoint = job.checkpoint_data or {}
+        if checkpoint.get("state"):
+            aggregator.restore(checkpoint["state"])
+        source = source or KafkaEventSource(
+            spec["topic"], f"computation-{computation.id}", checkpoint.get("offsets")
+        )
+
+        job.status = JobStatus.RUNNING
+        job.started_at = job.started_at or datetime.utcnow()
+        await db.commit()
+
+        logger.info("Streaming computation started", job_id=job.job_id, topic=source.topic)
+
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        deadline = started + spec["max_runtime_seconds"] if spec.get("max_runtime_seconds") else None
+        next_snapshot = started + self.snapshot_seconds
+        pending: Dict[tuple, Dict[str, Any]] = {}
+        # Newest window end per entity in the online store; restored windows were written before the restart
+        online_ends = {
+            entity: datetime.utcfromtimestamp(end) for entity, end in aggregator.last_emitted.items()
+        }
+        processed = job.records_processed or 0
+        output = job.records_output or 0
+
+        try:
+            while True:
+                events = await loop.run_in_executor(None, source.poll)
+                late_before = aggregator.late_events
+                emitted = aggregator.process(
+                    events, spec["entity_column"], spec["timestamp_column"], spec.get("value_column")
+                )
+                processed += len(events)
+                STREAM_EVENTS.labels(outcome="late").inc(aggregator.late_events - late_before)
+                STREAM_EVENTS.labels(outcome="processed").inc(len(events) - (aggregator.late_events - late_before))
+
+                if emitted:
+                    # Re-emitted windows replace the pending value for the same key
+                    for row in emitted:
+                        pending[(row["entity_id"], row["effective_timestamp"])] = row
+                    latest = self._latest(emitted, online_ends)
+                    if latest:
+                        try:
+                            await self.store.write(computation.feature_id, latest)
+                            online_ends.update((row["entity_id"], row["effective_timestamp"]) for row in latest)
+                        except Exception as e:
+                            # feature_values stays authoritative; serving catches up on the next window
+                            logger.warning("Online store write failed", job_id=job.job_id, error=str(e))
+
+                now = time.monotonic()
+                finished = deadline is not None and now >= deadline
+                if now >= next_snapshot or finished:
+                    output += await self._checkpoint(db, job, computation, spec, aggregator, source, pending)
+                    job.records_processed = processed
+                    job.records_output = output
+                    await db.commit()
+                    await loop.run_in_executor(None, source.commit)
+                    pending = {}
+                    # Entities whose panes were evicted can no longer re-emit a window
+                    online_ends = {
+                        entity: end for entity, end in online_ends.items() if entity in aggregator.panes
+                    }
+                    next_snapshot = now + self.snapshot_seconds
+
+                    await db.refresh(job, ["status"])
+                    if finished or job.status == JobStatus.CANCELLED:
+                        break
+        finally:
+            source.close()
+
+        if job.status != JobStatus.CANCELLED:
+            job.status = JobStatus.COMPLETED
+        job.completed_at = datetime.utcnow()
+        job.progress_percentage = 100.0
+        job.output_data = {
+            "records_processed": processed,
+            "records_output": output,
+            "late_events": aggregator.late_events,
+            "watermark": aggregator.watermark,
+        }
+        computation.last_run_at = job.completed_at
+        await db.commit()
+
+        logger.info("Streaming computation stopped", job_id=job.job_id, **job.output_data)
+        return job.output_data
+
+    @staticmethod
+    def _latest(rows: List[Dict[str, Any]], online_ends: Dict[str, datetime]) -> List[Dict[str, Any]]:
+        """Newest window per entity, for the online store, unless it already holds a newer one."""
+        latest: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            current = latest.get(row["entity_id"])
+            if current is None or row["effective_timestamp"] >= current["effective_timestamp"]:
+                latest[row["entity_id"]] = row
+        return [
+            row for entity, row in latest.items()
+            if entity not in online_ends or row["effective_timestamp"] >= online_ends[entity]
+        ]
+
+    async def _checkpoint(
+        self,
+        db: AsyncSession,
+        job: ComputationJob,
+        computation: FeatureComputation,
+        spec: Dict[str, Any],
+        aggregator: WindowAggregator,
+        source: KafkaEventSource,
+        pending: Dict[tuple, Dict[str, Any]]
+    ) -> int:
+        """Stage pending windows and the state they came from; the caller commits."""
+        written = 0
+        if pending:
+            frame = pd.DataFrame(list(pending.values()))
+            written = await self.engine.merge_values(db, frame, computation, spec)
+        job.checkpoint_data = {
+            "state": aggregator.snapshot(),
+            "offsets": dict(source.offsets),
+            "checkpointed_at": datetime.utcnow().isoformat(),
+        }
+        return written
+
+
+# Shared runner used by the task handlers
+streaming_runner = StreamingFeatureRunner()
@@ -0,0 +1,221 @@
+"""
+Handlers that execute leased computation tasks.
+
+Each handler receives a worker-owned session and the leased task, and returns
+the result payload stored on the task. Raising marks the attempt as failed.
+"""
+
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+import asyncio
+import structlog
+
+from api.config import settings
+from api.database import AsyncSessionLocal
+from models.computation import (
+    ComputationJob, ComputationTask, ComputationResult, FeatureComputation, JobStatus, JobType
+)
+from .backfill import backfill_runner
+from .incremental import incremental_runner
+from .local_executor import local_engine
+from .object_store import offload
+from .sql_engine import sql_engine
+from .streaming import streaming_runner
+from .udf_runtime import udf_runtime
+from .pipeline_executor import PipelineExecutor
+
+logger = structlog.get_logger()
+
+TaskHandler = Callable[[AsyncSession, ComputationTask], Awaitable[Dict[str, Any]]]
+
+TASK_HANDLERS: Dict[str, TaskHandler] = {}
+
+
+def register_handler(task_type: str):
+    """Register a coroutine as the handler for ``task_type``."""
+    def decorator(func: TaskHandler) -> TaskHandler:
+        TASK_HANDLERS[task_type] = func
+        return func
+    return decorator
+
+
+def get_handler(task_type: str) -> TaskHandler:
+    """Look up the handler for a task type."""
+    handler = TASK_HANDLERS.get(task_type)
+    if handler is None:
+        raise ValueError(f"No handler registered for task type: {task_type}")
+    return handler
+
+
+async def run_computation_job(
+    db: AsyncSession,
+    job_id: Any,
+    overrides: Dict[str, Any] = None,
+    attempt: Optional[int] = None
+) -> Dict[str, Any]:
+    """Run a computation job on the engine that matches its computation; ``attempt`` counts queue retries."""
+    job = await db.execute(
+        select(ComputationJob)
+        .options(selectinload(ComputationJob.computation).selectinload(FeatureComputation.version))
+        .where(ComputationJob.id == job_id)
+    )
+    job = job.scalar_one_or_none()
+    if not job:
+        raise ValueError(f"Computation job not found: {job_id}")
+    if attempt is not None:
+        # Committed now so that a failed run, which rolls back, still records it
+        job.retry_count = attempt - 1
+        await db.commit()
+
+    computation = job.computation
+    config = computation.config or {}
+    # The feature version's transformation runs unless the computation supplies its own logic
+    version = computation.version
+    transformation_type = version.transformation_type if version is not None and version.transformation else None
+
+    async def dispatch() -> Dict[str, Any]:
+        if transformation_type == "sql" and "sql" not in config:
+            return await sql_engine.run(db, job, computation, version, overrides)
+        if transformation_type == "python" and "expression" not in config:
+            return await udf_runtime.run(db, job, computation, version, overrides)
+        if computation.job_type == JobType.STREAMING:
+            return await streaming_runner.run(db, job, computation, overrides)
+        if computation.job_type == JobType.BACKFILL:
+            return await backfill_runner.run(db, job, computation, overrides)
+        if config.get("incremental"):
+            return await incremental_runner.run(db, job, computation, overrides)
+        return await local_engine.run(db, job, computation, overrides)
+
+    # Watchdog for timeout_minutes; streaming jobs run until cancelled
+    timeout = None
+    if computation.timeout_minutes and computation.job_type != JobType.STREAMING:
+        timeout = computation.timeout_minutes * 60
+
+    try:
+        await asyncio.wait_for(dispatch(), timeout)
+    except (asyncio.TimeoutError, TimeoutError):
+        # The run may have been cut off mid-transaction
+        await db.rollback()
+        await db.refresh(job)
+        job.status = JobStatus.TIMEOUT
+        job.completed_at = datetime.utcnow()
+        job.error_message = f"Computation exceeded its timeout of {computation.timeout_minutes} minutes"
+        job.error_count = (job.error_count or 0) + 1
+        await db.commit()
+        raise
+    except Exception as e:
+        # A failed statement leaves the session unusable until it is rolled back
+        await db.rollback()
+        await db.refresh(job)
+        job.status = JobStatus.FAILED
+        job.completed_at = datetime.utcnow()
+        job.error_message = str(e)
+        job.error_count = (job.error_count or 0) + 1
+        await db.commit()
+        raise
+
+    # Large outputs move to object storage so job rows stay small
+    job.output_data = await offload(job.output_data, f"{job.organization_id}/jobs/{job.id}/output.json.gz")
+    job.artifacts = await offload(job.artifacts, f"{job.organization_id}/jobs/{job.id}/artifacts.json.gz")
+    await db.commit()
+    # Callers store this as is, so a large output is uploaded once and its pointer shared
+    return job.output_data
+
+
+@register_handler("job")
+async def execute_job_task(db: AsyncSession, task: ComputationTask) -> Dict[str, Any]:
+    """Execute a computation job."""
+    result = await run_computation_job(db, task.job_id, task.config, attempt=task.attempts)
+
+    db.add(ComputationResult(
+        task_id=task.id,
+        job_id=task.job_id,
+        result_type="success",
+        data=result,
+        created_by=task.created_by,
+        organization_id=task.organization_id
+    ))
+
+    return result
+
+
+@register_handler("pipeline")
+async def execute_pipeline_task(db: AsyncSession, task: ComputationTask) -> Dict[str, Any]:
+    """Execute a pipeline's steps as a DAG, running independent branches concurrently."""
+    steps = await db.execute(
+        select(ComputationTask)
+        .where(ComputationTask.parent_id == task.id)
+        .order_by(ComputationTask.created_at)
+    )
+    steps = {step.config["name"]: step for step in steps.scalars().all()}
+
+    dependencies = {name: step.config.get("dependencies") or [] for name, step in steps.items()}
+    # Steps that succeeded in an earlier attempt are reused rather than rerun
+    completed = {
+        name: step.result
+        for name, step in steps.items()
+        if step.status == JobStatus.COMPLETED
+    }
+
+    run_config = task.config or {}
+    if run_config.get("parallel"):
+        max_concurrency = run_config.get("max_concurrent_tasks", settings.PIPELINE_MAX_CONCURRENCY)
+    else:
+        max_concurrency = 1
+
+    async def run_step(name: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        # Concurrent steps cannot share a session, so each step gets its own
+        async with AsyncSessionLocal() as step_db:
+            step = await step_db.get(ComputationTask, steps[name].id)
+            step.status = JobStatus.RUNNING
+            step.started_at = datetime.utcnow()
+            await step_db.commit()
+
+            try:
+                step_config = step.config.get("config") or {}
+                job_id = step_config.get("job_id")
+                if job_id is None:
+                    raise ValueError(f"Pipeline step {name} has no job_id")
+
+                overrides = {
+                    **run_config.get("parameters", {}),
+                    **(step_config.get("overrides") or {}),
+                    "upstream": inputs
+                }
+                result = await run_computation_job(step_db, job_id, overrides)
+
+                step.status = JobStatus.COMPLETED
+                step.completed_at = datetime.utcnow()
+                step.result = result
+                await step_db.commit()
+                return result
+
+            except Exception as e:
+                await step_db.rollback()
+                step.status = JobStatus.FAILED
+                step.completed_at = datetime.utcnow()
+                step.error_message = str(e)
+                await step_db.commit()
+                raise
+
+    outcomes = await PipelineExecutor(run_step, max_concurrency).execute(dependencies, completed)
+
+    # Record steps skipped because an upstream step failed
+    for name, outcome in outcomes.items():
+        if outcome["status"] == JobStatus.CANCELLED:
+            steps[name].status = JobStatus.CANCELLED
+            steps[name].error_message = outcome["error"]
+    await db.commit()
+
+    failed = sorted(name for name, outcome in outcomes.items() if outcome["status"] == JobStatus.FAILED)
+    if failed:
+        raise RuntimeError(f"Pipeline steps failed: {', '.join(failed)}")
+
+    return {
+        "message": "Pipeline completed successfully",
+        "total_steps": len(steps),
+        "outputs": {name: outcome["output"] for name, outcome in outcomes.items()}
+    }
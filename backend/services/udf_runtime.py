@@ -0,0 +1,260 @@
+"""
+Vectorized runtime for ``transformation_type="python"`` features.
+
+A feature version's transformation is Python source that defines a function
+(``transform`` by default, or ``spec["udf_function"]``). The function takes a
+pandas DataFrame batch and returns one of:
+
+* a DataFrame with ``entity_id`` and ``value`` columns, and optionally
+  ``effective_timestamp``;
+* a Series aligned with the input batch; the entity comes from
+  ``entity_column``.
+
+Batches run in a dedicated process pool, under the ``track_usage`` RSS
+watchdog. A batch fails with ``MemoryError`` once its worker's resident
+memory passes ``UDF_MEMORY_LIMIT_MB`` (or the computation's ``memory_gb``, if
+lower), so a runaway UDF fails its job instead of taking down the node. RSS
+is used rather than an address-space cap, for the reason given in
+``resource_monitor``. Each worker compiles a version's source once
+and keeps the resulting function in an LRU cache, so later batches and runs
+only pay for the call. Input is split by entity, so a UDF that aggregates
+sees all rows of an entity in one batch. Throughput per UDF is reported in
+the job's ``output_data`` and in ``udf_batch_rows_per_second``, labeled by
+feature version.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import math
+import os
+import time
+import numpy as np
+import pandas as pd
+import structlog
+from prometheus_client import Histogram
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.config import settings
+from models.computation import ComputationJob, FeatureComputation, JobStatus
+from models.feature import FeatureVersion
+from .local_executor import (
+    LocalComputeEngine, accumulate_usage, finish_job, load_input, local_engine,
+    new_usage_totals, partition_by_entity, resolve_input
+)
+from .resource_monitor import limits_for, track_usage
+
+logger = structlog.get_logger()
+
+UDF_THROUGHPUT = Histogram(
+    'udf_batch_rows_per_second',
+    'Rows per second processed by Python UDF batches',
+    ['version_id'],
+    buckets=(1e2, 1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6)
+)
+
+# Per worker process: compiled UDFs keyed by version and source hash
+_UDF_CACHE: "OrderedDict[str, Callable]" = OrderedDict()
+
+
+def load_udf(cache_key: str, source: str, function_name: str) -> Callable:
+    """Compile a transformation once per process and return its UDF."""
+    udf = _UDF_CACHE.get(cache_key)
+    if udf is not None:
+        _UDF_CACHE.move_to_end(cache_key)
+        return udf
+
+    namespace = {"__name__": "feature_udf", "pd": pd, "np": np}
+    exec(compile(source, f"<udf {cache_key}>", "exec"), namespace)
+    udf = namespace.get(function_name)
+    if not callable(udf):
+        raise ValueError(f"Python transformation must define a function named '{function_name}'")
+
+    _UDF_CACHE[cache_key] = udf
+    while len(_UDF_CACHE) > settings.UDF_CODE_CACHE_SIZE:
+        _UDF_CACHE.popitem(last=False)
+    return udf
+
+
+def _normalize_output(output: Any, frame: pd.DataFrame, spec: Dict[str, Any]) -> pd.DataFrame:
+    """Coerce a UDF's return value into ``entity_id``/``value`` rows."""
+    if isinstance(output, pd.DataFrame):
+        missing = {"entity_id", "value"} - set(output.columns)
+        if missing:
+            raise ValueError(f"Python transformation must return columns: {', '.join(sorted(missing))}")
+        return output
+
+    if isinstance(output, (pd.Series, np.ndarray)):
+        entity_column = spec.get("entity_column")
+        if not entity_column:
+            raise ValueError("UDFs returning a Series require 'entity_column'")
+        if len(output) != len(frame):
+            raise ValueError("UDF Series output must align with its input batch")
+        result = pd.DataFrame({"entity_id": frame[entity_column].to_numpy(), "value": np.asarray(output)})
+        timestamp_column = spec.get("timestamp_column")
+        if timestamp_column:
+            result["effective_timestamp"] = frame[timestamp_column].to_numpy()
+        return result
+
+    raise ValueError(f"Unsupported UDF return type: {type(output).__name__}")
+
+
+def run_udf_batch(
+    cache_key: str,
+    source: str,
+    function_name: str,
+    frame: pd.DataFrame,
+    spec: Dict[str, Any],
+    limits: Optional[Dict[str, Optional[int]]] = None
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """Process-pool entry point: apply the UDF to one batch within ``limits`` and measure it."""
+    started = time.perf_counter()
+
+    udf = load_udf(cache_key, source, function_name)
+    with track_usage(limits) as stats:
+        result = _normalize_output(udf(frame), frame, spec)
+
+    stats["input_rows"] = len(frame)
+    stats["output_rows"] = len(result)
+    stats["seconds"] = time.perf_counter() - started
+    return result, stats
+
+
+def split_batches(frame: pd.DataFrame, spec: Dict[str, Any], batch_rows: int, min_batches: int) -> List[pd.DataFrame]:
+    """Split input into batches of roughly ``batch_rows``, keeping entities together when known."""
+    count = max(min_batches, math.ceil(len(frame) / batch_rows)) if len(frame) else 1
+    entity_column = spec.get("entity_column")
+    if entity_column and entity_column in frame.columns:
+        return partition_by_entity(frame, entity_column, count)
+    return [frame.iloc[start:start + batch_rows] for start in range(0, max(len(frame), 1), batch_rows)]
+
+
+class UDFRuntime:
+    """Runs Python feature transformations as vectorized UDFs in memory-limited workers."""
+
+    def __init__(
+        self,
+        engine: Optional[LocalComputeEngine] = None,
+        max_workers: Optional[int] = None,
+        memory_limit_mb: Optional[int] = None,
+        batch_rows: Optional[int] = None
+    ):
+        self.engine = engine or local_engine
+        self.max_workers = max_workers or settings.UDF_WORKERS or settings.COMPUTATION_PROCESSES or os.cpu_count() or 1
+        self.memory_limit_mb = memory_limit_mb if memory_limit_mb is not None else settings.UDF_MEMORY_LIMIT_MB
+        self.batch_rows = batch_rows or settings.UDF_BATCH_ROWS
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def limits(self, computation: FeatureComputation) -> Dict[str, Optional[int]]:
+        """The computation's limits, with memory capped at ``memory_limit_mb``."""
+        limits = limits_for(computation)
+        if self.memory_limit_mb:
+            cap = self.memory_limit_mb * 1024 * 1024
+            limits["memory_bytes"] = min(limits["memory_bytes"] or cap, cap)
+        return limits
+
+    def shutdown(self):
+        """Shut down the worker pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def load_frame(self, db: AsyncSession, computation: FeatureComputation, spec: Dict[str, Any]) -> pd.DataFrame:
+        """Load the UDF input from the organization's ``input_source`` data source or inline ``records``."""
+        spec = await resolve_input(db, computation.organization_id, spec)
+        return await asyncio.get_running_loop().run_in_executor(None, load_input, spec)
+
+    async def run(
+        self,
+        db: AsyncSession,
+        job: ComputationJob,
+        computation: FeatureComputation,
+        version: FeatureVersion,
+        overrides: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Apply ``version.transformation`` to the computation's input and store the results."""
+        spec = {**(computation.config or {}), **(job.input_data or {}), **(overrides or {})}
+        source = version.transformation
+        function_name = spec.get("udf_function", "transform")
+        cache_key = f"{version.id}:{hashlib.sha256(source.encode()).hexdigest()[:16]}"
+
+        started = time.monotonic()
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.utcnow()
+        job.progress_percentage = 0.0
+        await db.commit()
+
+        frame = await self.load_frame(db, computation, spec)
+        batches = split_batches(frame, spec, self.batch_rows, self.max_workers)
+        del frame
+
+        loop = asyncio.get_running_loop()
+        limits = self.limits(computation)
+        futures = [
+            loop.run_in_executor(self.executor, run_udf_batch, cache_key, source, function_name, batch, spec, limits)
+            for batch in batches
+        ]
+        del batches
+
+        totals = new_usage_totals()
+        udf_seconds = 0.0
+        try:
+            for done, future in enumerate(asyncio.as_completed(futures), start=1):
+                result, stats = await future
+                totals["records_output"] += await self.engine.write_values(db, result, computation, spec)
+                accumulate_usage(totals, stats)
+                udf_seconds += stats["seconds"]
+                if stats["seconds"] > 0:
+                    UDF_THROUGHPUT.labels(version_id=str(version.id)).observe(stats["input_rows"] / stats["seconds"])
+
+                job.records_processed = totals["records_processed"]
+                job.records_output = totals["records_output"]
+                job.progress_percentage = 100.0 * done / len(futures)
+                await db.commit()
+        except BrokenProcessPool:
+            # A worker died (e.g. killed by the OOM killer between watchdog checks); start a fresh pool next time
+            self._executor = None
+            raise RuntimeError("UDF worker crashed; the transformation may be using too much memory")
+        finally:
+            # On failure or timeout, batches that have not started yet never run
+            for future in futures:
+                future.cancel()
+
+        totals["partitions"] = len(futures)
+        duration = time.monotonic() - started
+        finish_job(db, job, computation, totals, duration)
+        job.output_data = {
+            **job.output_data,
+            "udf": {
+                "version_id": str(version.id),
+                "function": function_name,
+                "batches": len(futures),
+                "udf_seconds": udf_seconds,
+                "rows_per_second": totals["records_processed"] / udf_seconds if udf_seconds > 0 else None,
+            },
+        }
+        await db.commit()
+
+        logger.info(
+            "Python UDF completed",
+            job_id=job.job_id,
+            version_id=str(version.id),
+            batches=len(futures),
+            records_processed=totals["records_processed"],
+            rows_per_second=job.output_data["udf"]["rows_per_second"]
+        )
+        return job.output_data
+
+
+# Shared runtime; the worker pool is created on first use
+udf_runtime = UDFRuntime()
@@ -0,0 +1,451 @@
+"""
+Incremental window aggregation for streaming features.
+
+Windows are evaluated over *panes*: fixed slices of ``gcd(size, slide)``
+seconds. Each event updates one partial aggregate per entity and pane, and a
+window's value is the merge of its panes. Work per event is therefore
+constant, and raw events are never kept. Supported windows:
+
+* ``tumbling``: ``size`` only; windows do not overlap.
+* ``hopping``: ``size`` and ``slide``; windows overlap.
+* ``sliding``: "the last ``size``", refreshed every ``slide`` (default
+  ``size / 60``). It is a hopping window whose result is stamped with its
+  end time.
+
+Event time drives everything. The watermark trails the largest event time
+seen by ``max_out_of_orderness``. A window is emitted once the watermark
+passes its end. Events up to ``allowed_lateness`` behind the watermark still
+update their panes, and any already-emitted window containing them is
+emitted again with the corrected value. Events later than that are dropped
+and counted. With ``idle_timeout`` set, a stream that has had no events for
+that long lets its watermark follow the clock, so its last windows still
+close. ``snapshot()``/``restore()`` round-trip the full state as JSON.
+
+Windows waiting to close are kept in a heap ordered by end time, and panes in
+a heap ordered by start time. Advancing the watermark only touches the windows
+that close and the panes that expire, so its cost does not grow with the
+number of entities held in state.
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from math import gcd
+from typing import Any, Dict, List, Optional, Set, Tuple
+import base64
+import hashlib
+import heapq
+import math
+import time
+import pandas as pd
+
+
+class Aggregate(ABC):
+    """Mergeable partial aggregate."""
+
+    name = ""
+
+    @abstractmethod
+    def add(self, value: Any):
+        """Add one value."""
+
+    @abstractmethod
+    def merge(self, other: "Aggregate"):
+        """Fold another partial aggregate of the same kind into this one."""
+
+    @abstractmethod
+    def result(self) -> Any:
+        """The aggregate's current value."""
+
+    @abstractmethod
+    def to_state(self) -> Any:
+        """JSON-serializable state."""
+
+    @classmethod
+    @abstractmethod
+    def from_state(cls, state: Any) -> "Aggregate":
+        """Rebuild an aggregate from ``to_state()``."""
+
+
+class CountAggregate(Aggregate):
+    name = "count"
+
+    def __init__(self, count: int = 0):
+        self.count = count
+
+    def add(self, value: Any):
+        self.count += 1
+
+    def merge(self, other: "CountAggregate"):
+        self.count += other.count
+
+    def result(self) -> int:
+        return self.count
+
+    def to_state(self) -> int:
+        return self.count
+
+    @classmethod
+    def from_state(cls, state: int) -> "CountAggregate":
+        return cls(state)
+
+
+class SumAggregate(Aggregate):
+    name = "sum"
+
+    def __init__(self, total: float = 0.0):
+        self.total = total
+
+    def add(self, value: Any):
+        self.total += float(value)
+
+    def merge(self, other: "SumAggregate"):
+        self.total += other.total
+
+    def result(self) -> float:
+        return self.total
+
+    def to_state(self) -> float:
+        return self.total
+
+    @classmethod
+    def from_state(cls, state: float) -> "SumAggregate":
+        return cls(state)
+
+
+class MeanAggregate(Aggregate):
+    name = "mean"
+
+    def __init__(self, total: float = 0.0, count: int = 0):
+        self.total = total
+        self.count = count
+
+    def add(self, value: Any):
+        self.total += float(value)
+        self.count += 1
+
+    def merge(self, other: "MeanAggregate"):
+        self.total += other.total
+        self.count += other.count
+
+    def result(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def to_state(self) -> List[float]:
+        return [self.total, self.count]
+
+    @classmethod
+    def from_state(cls, state: List[float]) -> "MeanAggregate":
+        return cls(state[0], int(state[1]))
+
+
+class MinAggregate(Aggregate):
+    name = "min"
+
+    def __init__(self, value: Optional[float] = None):
+        self.value = value
+
+    def add(self, value: Any):
+        value = float(value)
+        if self.value is None or value < self.value:
+            self.value = value
+
+    def merge(self, other: "MinAggregate"):
+        if other.value is not None:
+            self.add(other.value)
+
+    def result(self) -> Optional[float]:
+        return self.value
+
+    def to_state(self) -> Optional[float]:
+        return self.value
+
+    @classmethod
+    def from_state(cls, state: Optional[float]) -> "MinAggregate":
+        return cls(state)
+
+
+class MaxAggregate(MinAggregate):
+    name = "max"
+
+    def add(self, value: Any):
+        value = float(value)
+        if self.value is None or value > self.value:
+            self.value = value
+
+
+class DistinctAggregate(Aggregate):
+    """Approximate distinct count (HyperLogLog, ~1.6% standard error)."""
+
+    name = "approx_distinct"
+    PRECISION = 12
+    REGISTERS = 1 << PRECISION
+    ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+
+    def __init__(self, registers: Optional[bytearray] = None):
+        self.registers = registers if registers is not None else bytearray(self.REGISTERS)
+
+    def add(self, value: Any):
+        hashed = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.PRECISION)
+        remainder = hashed & ((1 << (64 - self.PRECISION)) - 1)
+        rank = (64 - self.PRECISION) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "DistinctAggregate"):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def result(self) -> int:
+        estimate = self.ALPHA * self.REGISTERS ** 2 / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.REGISTERS and zeros:
+            # Small-range correction (linear counting)
+            estimate = self.REGISTERS * math.log(self.REGISTERS / zeros)
+        return int(round(estimate))
+
+    def to_state(self) -> str:
+        return base64.b64encode(bytes(self.registers)).decode()
+
+    @classmethod
+    def from_state(cls, state: str) -> "DistinctAggregate":
+        return cls(bytearray(base64.b64decode(state)))
+
+
+AGGREGATES = {
+    cls.name: cls
+    for cls in (CountAggregate, SumAggregate, MeanAggregate, MinAggregate, MaxAggregate, DistinctAggregate)
+}
+
+
+def _seconds(value: Any) -> int:
+    """Durations may be seconds or strings such as ``"1h"`` / ``"30s"``."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(pd.Timedelta(value).total_seconds())
+
+
+def _event_seconds(value: Any) -> float:
+    """Event timestamps may be epoch seconds, datetimes or ISO strings."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert(None)
+    return stamp.timestamp()
+
+
+class WindowSpec:
+    """Window geometry in whole seconds."""
+
+    def __init__(self, window_type: str, size: Any, slide: Optional[Any] = None):
+        self.window_type = window_type
+        self.size = _seconds(size)
+        if window_type == "tumbling":
+            self.slide = self.size
+        elif window_type == "hopping":
+            if slide is None:
+                raise ValueError("Hopping windows require 'slide'")
+            self.slide = _seconds(slide)
+        elif window_type == "sliding":
+            self.slide = _seconds(slide) if slide is not None else max(self.size // 60, 1)
+        else:
+            raise ValueError(f"Unsupported window type: {window_type}")
+
+        if self.size <= 0 or self.slide <= 0 or self.slide > self.size:
+            raise ValueError("Window size and slide must be positive with slide <= size")
+        self.pane = gcd(self.size, self.slide)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "WindowSpec":
+        return cls(config.get("type", "tumbling"), config["size"], config.get("slide"))
+
+
+class WindowAggregator:
+    """Event-time windowed aggregation with per-entity pane state."""
+
+    def __init__(
+        self,
+        window: WindowSpec,
+        aggregation: str,
+        max_out_of_orderness: Any = 0,
+        allowed_lateness: Any = 0,
+        idle_timeout: Any = None
+    ):
+        if aggregation not in AGGREGATES:
+            raise ValueError(f"Unsupported streaming aggregation: {aggregation}")
+        self.window = window
+        self.aggregate_cls = AGGREGATES[aggregation]
+        self.max_out_of_orderness = _seconds(max_out_of_orderness)
+        self.allowed_lateness = _seconds(allowed_lateness)
+        self.idle_timeout = _seconds(idle_timeout) if idle_timeout is not None else None
+
+        self.panes: Dict[str, Dict[int, Aggregate]] = {}
+        self.last_emitted: Dict[str, int] = {}
+        self.max_event_time: Optional[float] = None
+        self.last_event_at: Optional[float] = None  # wall clock of the newest event
+        self.watermark: Optional[int] = None
+        self.late_events = 0
+        self._due: List[Tuple[int, str]] = []  # heap of (window end, entity) still to close
+        self._scheduled: Set[Tuple[int, str]] = set()
+        self._pane_starts: List[Tuple[int, str]] = []  # heap of (pane start, entity)
+
+    # Windows end on multiples of ``slide`` and cover ``[end - size, end)``
+    def _windows_containing(self, pane_start: int) -> List[int]:
+        first_end = (pane_start // self.window.slide + 1) * self.window.slide
+        ends = []
+        end = first_end
+        while end - self.window.size <= pane_start:
+            ends.append(end)
+            end += self.window.slide
+        return ends
+
+    def _window_value(self, entity: str, end: int) -> Tuple[Any, bool]:
+        merged = self.aggregate_cls()
+        found = False
+        for pane_start in range(end - self.window.size, end, self.window.pane):
+            pane = self.panes.get(entity, {}).get(pane_start)
+            if pane is not None:
+                merged.merge(pane)
+                found = True
+        return merged.result(), found
+
+    def _row(self, entity: str, end: int, value: Any, found: bool) -> Dict[str, Any]:
+        if found:
+            # Only windows with data count, so the reset window is emitted once
+            self.last_emitted[entity] = max(self.last_emitted.get(entity, end), end)
+            # The next window either has data or resets the value
+            self._schedule(entity, end + self.window.slide)
+        return {"entity_id": entity, "value": value, "effective_timestamp": datetime.utcfromtimestamp(end)}
+
+    def _emit(self, entity: str, end: int) -> Dict[str, Any]:
+        return self._row(entity, end, *self._window_value(entity, end))
+
+    def _schedule(self, entity: str, end: int):
+        if (end, entity) not in self._scheduled:
+            self._scheduled.add((end, entity))
+            heapq.heappush(self._due, (end, entity))
+
+    def add(self, entity: Any, timestamp: Any, value: Any = None) -> List[Dict[str, Any]]:
+        """Add one event. Returns windows re-emitted because of a late event."""
+        entity = str(entity)
+        seconds = _event_seconds(timestamp)
+
+        if self.watermark is not None and seconds < self.watermark - self.allowed_lateness:
+            self.late_events += 1
+            return []
+
+        pane_start = int(seconds // self.window.pane) * self.window.pane
+        panes = self.panes.setdefault(entity, {})
+        if pane_start not in panes:
+            panes[pane_start] = self.aggregate_cls()
+            heapq.heappush(self._pane_starts, (pane_start, entity))
+        panes[pane_start].add(value)
+
+        if self.max_event_time is None or seconds > self.max_event_time:
+            self.max_event_time = seconds
+        self.last_event_at = time.time()
+
+        emitted = []
+        for end in self._windows_containing(pane_start):
+            if self.watermark is not None and end <= self.watermark:
+                emitted.append(self._emit(entity, end))
+            else:
+                self._schedule(entity, end)
+        return emitted
+
+    def advance(self, watermark: Optional[int] = None, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Move the watermark forward and emit every window that closed."""
+        if watermark is None:
+            if self.max_event_time is None:
+                return []
+            event_time = self.max_event_time
+            if self.idle_timeout is not None and self.last_event_at is not None:
+                # Past the idle timeout, event time moves on with the clock
+                idle = (now if now is not None else time.time()) - self.last_event_at
+                event_time += max(idle - self.idle_timeout, 0)
+            watermark = int(event_time) - self.max_out_of_orderness
+        if self.watermark is not None and watermark <= self.watermark:
+            return []
+
+        self.watermark = watermark
+        emitted = []
+        while self._due and self._due[0][0] <= watermark:
+            end, entity = heapq.heappop(self._due)
+            self._scheduled.discard((end, entity))
+            value, found = self._window_value(entity, end)
+            # Empty windows are emitted only right after an entity's data ends, so its value resets
+            if found or self.last_emitted.get(entity) == end - self.window.slide:
+                emitted.append(self._row(entity, end, value, found))
+
+        self._evict()
+        return emitted
+
+    def _evict(self):
+        """Drop panes that no window can still use, even with late events."""
+        # A slide past the last window, so the reset window is emitted before its entity goes
+        horizon = self.watermark - self.allowed_lateness - self.window.size - self.window.slide
+        while self._pane_starts and self._pane_starts[0][0] < horizon:
+            pane_start, entity = heapq.heappop(self._pane_starts)
+            panes = self.panes.get(entity)
+            if panes is None:
+                continue
+            panes.pop(pane_start, None)
+            if not panes:
+                del self.panes[entity]
+                self.last_emitted.pop(entity, None)
+
+    def process(self, events: List[Dict[str, Any]], entity_column: str, timestamp_column: str,
+                value_column: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Add a batch of events, then advance the watermark. Returns emitted windows."""
+        emitted = []
+        for event in events:
+            emitted.extend(self.add(
+                event[entity_column],
+                event[timestamp_column],
+                event.get(value_column) if value_column else None
+            ))
+        emitted.extend(self.advance())
+        return emitted
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable copy of the aggregation state."""
+        return {
+            "panes": {
+                entity: {str(start): pane.to_state() for start, pane in panes.items()}
+                for entity, panes in self.panes.items()
+            },
+            "last_emitted": dict(self.last_emitted),
+            "max_event_time": self.max_event_time,
+            "last_event_at": self.last_event_at,
+            "watermark": self.watermark,
+            "late_events": self.late_events,
+            "due": sorted(self._due),
+        }
+
+    def restore(self, snapshot: Dict[str, Any]):
+        """Load state produced by ``snapshot()``."""
+        self.panes = {
+            entity: {int(start): self.aggregate_cls.from_state(state) for start, state in panes.items()}
+            for entity, panes in (snapshot.get("panes") or {}).items()
+        }
+        self.last_emitted = dict(snapshot.get("last_emitted") or {})
+        self.max_event_time = snapshot.get("max_event_time")
+        self.last_event_at = snapshot.get("last_event_at")
+        self.watermark = snapshot.get("watermark")
+        self.late_events = snapshot.get("late_events", 0)
+
+        self._pane_starts = [(start, entity) for entity, panes in self.panes.items() for start in panes]
+        heapq.heapify(self._pane_starts)
+        self._due, self._scheduled = [], set()
+        if "due" in snapshot:
+            for end, entity in snapshot["due"]:
+                self._schedule(entity, end)
+        else:
+            # Snapshots from before the due-window index
+            for entity, panes in self.panes.items():
+                for pane_start in panes:
+                    for end in self._windows_containing(pane_start):
+                        if self.watermark is None or end > self.watermark:
+                            self._schedule(entity, end)
+            for entity, end in self.last_emitted.items():
+                self._schedule(entity, end + self.window.slide)
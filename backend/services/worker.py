@@ -0,0 +1,187 @@
+"""
+Computation worker processes.
+
+Workers run outside the API process. Each one leases tasks from the durable
+queue, heartbeats its leases while a handler runs, and completes or fails the
+task using sessions it owns. Start workers with::
+
+    python -m services.worker --processes 4 --concurrency 8
+"""
+
+from typing import Dict, Optional
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import uuid
+import structlog
+from prometheus_client import start_http_server
+
+from api.config import settings
+from api.database import AsyncSessionLocal
+from models.computation import ComputationTask, JobStatus
+from .job_queue import JobQueue, job_queue
+from .local_executor import local_engine
+from .object_store import offload
+from .status_events import status_broker, task_event
+from .task_handlers import get_handler
+from .udf_runtime import udf_runtime
+
+logger = structlog.get_logger()
+
+
+class ComputationWorker:
+    """Leases and executes computation tasks until stopped."""
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        queue: Optional[JobQueue] = None,
+        session_factory=AsyncSessionLocal
+    ):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.concurrency = concurrency or settings.COMPUTATION_WORKERS
+        self.queue = queue or job_queue
+        self.session_factory = session_factory
+        self.poll_interval = settings.WORKER_POLL_INTERVAL_SECONDS
+        self.heartbeat_interval = settings.TASK_HEARTBEAT_SECONDS
+        self._running: Dict[str, asyncio.Task] = {}
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        """Stop leasing new tasks; in-flight tasks are allowed to finish."""
+        self._stopping.set()
+
+    async def run(self):
+        """Main loop: reap expired leases, lease up to free capacity, dispatch."""
+        logger.info("Worker started", worker_id=self.worker_id, concurrency=self.concurrency)
+
+        while not self._stopping.is_set():
+            try:
+                async with self.session_factory() as session:
+                    await self.queue.reap_expired_leases(session)
+                    await self.queue.queue_depth(session)
+
+                free_slots = self.concurrency - len(self._running)
+                if free_slots > 0:
+                    async with self.session_factory() as session:
+                        tasks = await self.queue.lease(session, self.worker_id, limit=free_slots)
+                    for task in tasks:
+                        key = str(task.id)
+                        self._running[key] = asyncio.create_task(self._process(task))
+                        self._running[key].add_done_callback(lambda _, k=key: self._running.pop(k, None))
+            except Exception as e:
+                logger.error(f"Worker loop error: {e}", worker_id=self.worker_id)
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+        logger.info("Worker stopped", worker_id=self.worker_id)
+
+    async def _heartbeat(self, task_id, handler_task: asyncio.Task):
+        """Keep the lease alive; cancel the handler if the lease is lost."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            async with self.session_factory() as session:
+                if not await self.queue.heartbeat(session, task_id, self.worker_id):
+                    logger.warning("Lost task lease", task_id=str(task_id), worker_id=self.worker_id)
+                    handler_task.cancel()
+                    return
+
+    async def _process(self, task: ComputationTask):
+        """Run one leased task to completion or failure."""
+        async with self.session_factory() as session:
+            task = await session.merge(task, load=False)
+            await status_broker.publish(task_event(task, JobStatus.RUNNING))
+            heartbeat_task = None
+
+            try:
+                # Inside the try so that an unknown task type fails the task rather than leaving it leased
+                handler_task = asyncio.create_task(get_handler(task.task_type)(session, task))
+                heartbeat_task = asyncio.create_task(self._heartbeat(task.id, handler_task))
+                # Job outputs come back already offloaded, and their pointer is kept as is
+                result = await offload(await handler_task, f"{task.organization_id}/tasks/{task.id}.json.gz")
+                completed = await self.queue.complete(session, task.id, self.worker_id, result)
+                await session.commit()
+                if completed:
+                    await status_broker.publish(task_event(task, JobStatus.COMPLETED))
+                logger.info("Task completed", task_id=str(task.id), worker_id=self.worker_id)
+            except asyncio.CancelledError:
+                await session.rollback()
+                if self._stopping.is_set():
+                    raise
+            except Exception as e:
+                await session.rollback()
+                # Rolling back expires the task; reload it before reading its lease state
+                await session.refresh(task)
+                status = await self.queue.fail(session, task, self.worker_id, str(e))
+                await status_broker.publish(task_event(task, status, str(e)))
+                logger.error(
+                    "Task failed",
+                    task_id=str(task.id),
+                    worker_id=self.worker_id,
+                    error=str(e),
+                    status=status
+                )
+            finally:
+                if heartbeat_task is not None:
+                    heartbeat_task.cancel()
+
+
+def _run_worker_process(concurrency: int, metrics_port: Optional[int] = None):
+    """Entry point for a single worker process."""
+    if metrics_port:
+        start_http_server(metrics_port)
+    worker = ComputationWorker(concurrency=concurrency)
+
+    async def _main():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, worker.stop)
+        try:
+            await worker.run()
+        finally:
+            await status_broker.close()
+
+    try:
+        asyncio.run(_main())
+    finally:
+        local_engine.shutdown()
+        udf_runtime.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feature Store computation worker")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes to start")
+    parser.add_argument("--concurrency", type=int, default=settings.COMPUTATION_WORKERS,
+                        help="Concurrent tasks per process")
+    parser.add_argument("--metrics-port", type=int, default=settings.WORKER_METRICS_PORT,
+                        help="Serve Prometheus metrics from this port (one port per process)")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        _run_worker_process(args.concurrency, args.metrics_port)
+        return
+
+    processes = [
+        multiprocessing.Process(
+            target=_run_worker_process,
+            args=(args.concurrency, args.metrics_port + i if args.metrics_port else None)
+        )
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,8 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from api.main import app
-from api.database import get_db, Base
+from api.database import get_db, get_read_db, Base
+from api.profiling import install as install_profiling, violations as query_violations
 from api.auth import get_current_user
 from models.user import User
 from models.organization import Organization
@@ -22,6 +23,9 @@ test_engine = create_async_engine(
     poolclass=StaticPool,
 )
 
+# Count test queries against route budgets like the application engine's
+install_profiling(test_engine.sync_engine)
+
 # Create test session factory
 TestingSessionLocal = sessionmaker(
     test_engine, class_=AsyncSession, expire_on_commit=False
@@ -46,6 +50,14 @@ async def setup_database():
         await conn.run_sync(Base.metadata.drop_all)
 
 
+@pytest.fixture(autouse=True)
+def enforce_query_budgets():
+    """Fail a test whose requests exceed their query budget or show an N+1 pattern."""
+    query_violations.clear()
+    yield
+    assert not query_violations, "\n".join(query_violations)
+
+
 @pytest.fixture
 async def db_session() -> AsyncGenerator[AsyncSession, None]:
     """Create a test database session."""
@@ -112,6 +124,7 @@ def override_get_db(db_session: AsyncSession):
         yield db_session
     
     app.dependency_overrides[get_db] = _override_get_db
+    app.dependency_overrides[get_read_db] = _override_get_db
     yield
     app.dependency_overrides.clear()
 
@@ -0,0 +1,72 @@
+import uuid
+from datetime import datetime
+import pytest
+
+import services.activity as activity
+from services.activity import ActivityRecorder
+
+
+class FakeSession:
+    """Records bulk updates; fails while ``fail`` is set."""
+
+    updates = []
+    fail = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, rows):
+        if FakeSession.fail:
+            raise ConnectionError("database unavailable")
+        FakeSession.updates.append(rows)
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def fake_session(monkeypatch):
+    FakeSession.updates = []
+    FakeSession.fail = False
+    monkeypatch.setattr(activity, "AsyncSessionLocal", FakeSession)
+    return FakeSession
+
+
+class TestActivityRecorder:
+    """Test suite for batched last_activity_at writes."""
+
+    @pytest.mark.asyncio
+    async def test_requests_coalesce_into_one_update(self, fake_session):
+        """Test that many requests by several users are written with one bulk update of the latest times."""
+        recorder = ActivityRecorder(flush_seconds=60)
+        users = [uuid.uuid4(), uuid.uuid4()]
+        for minute in range(50):
+            for user_id in users:
+                recorder.record(user_id, datetime(2026, 1, 1, 0, minute))
+
+        await recorder.flush()
+
+        assert len(fake_session.updates) == 1
+        rows = fake_session.updates[0]
+        assert {row["id"] for row in rows} == set(users)
+        assert all(row["last_activity_at"] == datetime(2026, 1, 1, 0, 49) for row in rows)
+        await recorder.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_newer_timestamps(self, fake_session):
+        """Test that a failed flush is retried without overwriting activity recorded since."""
+        recorder = ActivityRecorder(flush_seconds=60)
+        user_id = uuid.uuid4()
+        recorder.record(user_id, datetime(2026, 1, 1, 0, 0))
+        fake_session.fail = True
+
+        with pytest.raises(ConnectionError):
+            await recorder.flush()
+        recorder.record(user_id, datetime(2026, 1, 1, 0, 5))
+        fake_session.fail = False
+        await recorder.close()
+
+        assert fake_session.updates == [[{"id": user_id, "last_activity_at": datetime(2026, 1, 1, 0, 5)}]]
@@ -0,0 +1,172 @@
+import asyncio
+import time
+import uuid
+import pytest
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.auth import AuthService
+from models.user import User, UserStatus
+from services.activity import activity_recorder
+from services.auth_cache import AuthCache, _changes_auth
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+
+class FakeSession:
+    """Counts queries and returns the same record for each of them."""
+
+    def __init__(self, value):
+        self.value = value
+        self.queries = 0
+        self.expunged = []
+
+    async def execute(self, statement):
+        self.queries += 1
+        return FakeResult(self.value)
+
+    def expunge(self, obj):
+        self.expunged.append(obj)
+
+
+class TestAuthCache:
+    """Test suite for the per-process auth cache."""
+
+    def test_claims_expire_with_token(self):
+        """Test that cached claims never outlive the token's own expiry."""
+        cache = AuthCache(ttl_seconds=60, max_size=10)
+        cache.set_claims("live", {"sub": "user-1", "exp": time.time() + 30})
+        cache.set_claims("expired", {"sub": "user-2", "exp": time.time() - 1})
+
+        assert cache.get_claims("live")["sub"] == "user-1"
+        assert cache.get_claims("expired") is None
+
+    def test_lru_bound(self):
+        """Test that the least recently used entries are evicted first."""
+        cache = AuthCache(ttl_seconds=60, max_size=2)
+        cache.set_claims("a", {"sub": "a"})
+        cache.set_claims("b", {"sub": "b"})
+        cache.get_claims("a")
+        cache.set_claims("c", {"sub": "c"})
+
+        assert cache.get_claims("b") is None
+        assert cache.get_claims("a") is not None
+
+    @pytest.mark.asyncio
+    async def test_user_loaded_once_until_invalidated(self):
+        """Test that a user costs one query until it is invalidated."""
+        user_id = str(uuid.uuid4())
+        user = User(id=uuid.UUID(user_id), email="a@example.com", status=UserStatus.ACTIVE)
+        db = FakeSession(user)
+        cache = AuthCache(ttl_seconds=60, max_size=10)
+
+        assert await cache.get_user(db, user_id) is user
+        assert await cache.get_user(db, user_id) is user
+        assert db.queries == 1
+        assert db.expunged == [user]
+
+        cache.invalidate_user(user_id)
+        await cache.get_user(db, user_id)
+
+        assert db.queries == 2
+
+    @pytest.mark.asyncio
+    async def test_missing_user_not_cached(self):
+        """Test that an unknown user is looked up again on the next request."""
+        db = FakeSession(None)
+        cache = AuthCache(ttl_seconds=60, max_size=10)
+
+        assert await cache.get_user(db, str(uuid.uuid4())) is None
+        assert len(cache.users) == 0
+
+    @pytest.mark.asyncio
+    async def test_api_key_verified_once(self):
+        """Test that a verified API key costs no query until its user changes key."""
+        user_id = uuid.uuid4()
+        user = User(id=user_id, api_key="hash-1", status=UserStatus.ACTIVE)
+        db = FakeSession(user)
+        cache = AuthCache(ttl_seconds=60, max_size=10)
+
+        assert await cache.get_api_key_user(db, "hash-1") is user
+        assert await cache.get_api_key_user(db, "hash-1") is user
+        assert db.queries == 1
+
+        user.api_key = "hash-2"  # rotated
+        db.value = None
+        assert await cache.get_api_key_user(db, "hash-1") is None
+        assert "hash-1" not in cache.api_keys
+
+    def test_activity_writes_keep_cached_user(self):
+        """Test that only changes other than activity timestamps evict a user."""
+        assert not _changes_auth(User(last_activity_at=None))
+        assert _changes_auth(User(status=UserStatus.SUSPENDED))
+
+
+@pytest.mark.asyncio
+class TestAPIKeys:
+    """Test suite for hashed API keys."""
+
+    async def make_user(self, db_session: AsyncSession, api_key=None) -> User:
+        user = User(
+            organization_id=uuid.uuid4(),
+            email="keys@example.com",
+            username="keys",
+            hashed_password="x",
+            status=UserStatus.ACTIVE,
+            api_key=api_key
+        )
+        db_session.add(user)
+        await db_session.commit()
+        return user
+
+    async def test_only_the_issued_key_authenticates(self, db_session: AsyncSession, monkeypatch):
+        """Test that an issued key works and its stored hash does not."""
+        monkeypatch.setattr(activity_recorder, "record", lambda user_id: None)
+        user = await self.make_user(db_session)
+
+        api_key = await AuthService.issue_api_key(db_session, user)
+
+        assert user.api_key == AuthService.hash_api_key(api_key)
+        assert (await AuthService.authenticate_api_key(db_session, api_key)).id == user.id
+        assert await AuthService.authenticate_api_key(db_session, user.api_key) is None
+
+    async def test_plaintext_keys_are_hashed_in_place(self, db_session: AsyncSession, monkeypatch):
+        """Test that a key stored before hashing keeps working once migrated, and is migrated once."""
+        monkeypatch.setattr(activity_recorder, "record", lambda user_id: None)
+        user = await self.make_user(db_session, api_key="legacy-key")
+
+        assert await AuthService.migrate_plaintext_api_keys(db_session) == 1
+        assert await AuthService.migrate_plaintext_api_keys(db_session) == 0
+
+        await db_session.refresh(user)
+        assert user.api_key == AuthService.hash_api_key("legacy-key")
+        assert (await AuthService.authenticate_api_key(db_session, "legacy-key")).id == user.id
+
+
+class TestPasswordHashing:
+    """Test suite for off-loop password hashing."""
+
+    @pytest.mark.asyncio
+    async def test_hashing_does_not_block_event_loop(self):
+        """Test that the event loop keeps running while bcrypt hashes."""
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        task = asyncio.create_task(ticker())
+        hashed = await AuthService.get_password_hash("correct horse")
+        verified = await AuthService.verify_password("correct horse", hashed)
+        task.cancel()
+
+        assert verified
+        assert ticks > 10
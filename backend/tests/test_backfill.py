@@ -0,0 +1,146 @@
+import pytest
+import uuid
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.computation import ComputationJob, ComputationTask, ComputeEngine, FeatureComputation, JobStatus, JobType
+from services.backfill import BackfillRunner, plan_shards
+from services.task_handlers import execute_job_task
+from services.local_executor import LocalComputeEngine, compute_partition
+
+RECORDS = [
+    {"user_id": f"u{hour % 3}", "amount": float(hour), "event_time": f"2026-01-01T{hour:02d}:30:00"}
+    for hour in range(6)
+]
+
+
+class InlineEngine(LocalComputeEngine):
+    """Computes partitions in-process and can fail chosen shards."""
+
+    def __init__(self, failing_hours=()):
+        super().__init__(max_workers=1)
+        self.failing_hours = set(failing_hours)
+        self.computed_hours = []
+        self.frame_hours = []
+
+    async def compute(self, frame, computation, spec):
+        hour = int(frame["event_time"].iloc[0][11:13])
+        self.computed_hours.append(hour)
+        self.frame_hours.append(sorted({int(t[11:13]) for t in frame["event_time"]}))
+        if hour in self.failing_hours:
+            raise RuntimeError(f"hour {hour} failed")
+        result, stats = compute_partition(ComputeEngine(computation.compute_engine).value, frame, spec)
+        yield result, stats, 1, 1
+
+
+async def make_backfill(db_session: AsyncSession) -> ComputationJob:
+    computation = FeatureComputation(
+        feature_id=uuid.uuid4(),
+        version_id=uuid.uuid4(),
+        job_type=JobType.BACKFILL,
+        compute_engine=ComputeEngine.PYTHON,
+        config={
+            "records": RECORDS,
+            "entity_column": "user_id",
+            "timestamp_column": "event_time",
+            "value_column": "amount",
+            "aggregation": "sum",
+            "start": "2026-01-01T00:00:00",
+            "end": "2026-01-01T06:00:00",
+            "shard_hours": 1,
+        },
+        organization_id="test-org"
+    )
+    job = ComputationJob(
+        computation=computation,
+        job_id=f"backfill-{uuid.uuid4()}",
+        job_name="Backfill",
+        max_retries=0,
+        organization_id="test-org"
+    )
+    db_session.add_all([computation, job])
+    await db_session.commit()
+    return job
+
+
+class TestPlanShards:
+    """Test suite for backfill range sharding."""
+
+    def test_shards_cover_range(self):
+        """Test that shards are contiguous and the last one is clipped."""
+        shards = plan_shards(datetime(2026, 1, 1), datetime(2026, 1, 2, 5), 12)
+
+        assert shards == [
+            (datetime(2026, 1, 1, 0), datetime(2026, 1, 1, 12)),
+            (datetime(2026, 1, 1, 12), datetime(2026, 1, 2, 0)),
+            (datetime(2026, 1, 2, 0), datetime(2026, 1, 2, 5)),
+        ]
+
+    def test_empty_range_rejected(self):
+        """Test that inverted ranges are rejected."""
+        with pytest.raises(ValueError):
+            plan_shards(datetime(2026, 1, 2), datetime(2026, 1, 1), 1)
+
+
+@pytest.mark.asyncio
+class TestBackfillRunner:
+    """Test suite for checkpointed backfills."""
+
+    async def test_failed_shard_checkpoints_the_rest(self, db_session: AsyncSession):
+        """Test that other shards complete and are recorded when one fails."""
+        job = await make_backfill(db_session)
+        runner = BackfillRunner(engine=InlineEngine(failing_hours={4}))
+
+        with pytest.raises(RuntimeError):
+            await runner.run(db_session, job, job.computation)
+
+        shards = job.checkpoint_data["shards"]
+        assert shards["2026-01-01T04:00:00"]["status"] == "failed"
+        assert sum(1 for s in shards.values() if s["status"] == "completed") == 5
+
+    async def test_resume_reruns_only_unfinished_shards(self, db_session: AsyncSession):
+        """Test that a retried backfill skips checkpointed shards."""
+        job = await make_backfill(db_session)
+        with pytest.raises(RuntimeError):
+            await BackfillRunner(engine=InlineEngine(failing_hours={4})).run(
+                db_session, job, job.computation
+            )
+
+        engine = InlineEngine()
+        result = await BackfillRunner(engine=engine).run(db_session, job, job.computation)
+
+        assert engine.computed_hours == [4]
+        assert result["shards_resumed"] == 5
+        assert job.status == JobStatus.COMPLETED
+        assert job.progress_percentage == 100.0
+
+    async def test_shard_reads_only_its_range(self, db_session: AsyncSession):
+        """Test that each shard is loaded with its own time range, and failed shards are not retried in place."""
+        job = await make_backfill(db_session)
+        job.max_retries = 3
+        await db_session.commit()
+        engine = InlineEngine(failing_hours={5})
+
+        with pytest.raises(RuntimeError):
+            await BackfillRunner(engine=engine).run(db_session, job, job.computation)
+
+        assert sorted(engine.computed_hours) == [0, 1, 2, 3, 4, 5]
+        assert all(hours == [hour] for hour, hours in zip(engine.computed_hours, engine.frame_hours))
+        assert not job.retry_count
+
+    async def test_queue_attempt_recorded_as_retry(self, db_session: AsyncSession):
+        """Test that a job run by a retried task records its retry count."""
+        job = await make_backfill(db_session)
+        job.input_data = {"end": "2025-12-31T00:00:00"}  # before start, so the run fails at once
+        task = ComputationTask(
+            job_id=job.id, name="Backfill", task_type="job", config={}, attempts=3, organization_id="test-org"
+        )
+        db_session.add(task)
+        await db_session.commit()
+
+        with pytest.raises(ValueError):
+            await execute_job_task(db_session, task)
+
+        assert job.retry_count == 2
+        assert job.status == JobStatus.FAILED
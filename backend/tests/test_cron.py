@@ -0,0 +1,70 @@
+import pytest
+from datetime import datetime, timedelta
+
+from services.cron import CronError, parse_cron
+
+
+class TestCronSchedule:
+    """Test suite for cron parsing and fire-time calculation."""
+
+    def test_next_after_skips_to_next_weekday(self):
+        """Test that business-hours schedules jump over the weekend."""
+        schedule = parse_cron("*/15 9-17 * * mon-fri")
+
+        # Friday evening -> Monday morning
+        assert schedule.next_after(datetime(2026, 10, 16, 17, 50)) == datetime(2026, 10, 19, 9, 0)
+
+    def test_aliases_and_year_rollover(self):
+        """Test @daily alias across a year boundary."""
+        assert parse_cron("@daily").next_after(datetime(2026, 12, 31, 5, 0)) == datetime(2027, 1, 1)
+
+    def test_leap_day(self):
+        """Test schedules that only fire on leap years."""
+        assert parse_cron("0 0 29 2 *").next_after(datetime(2026, 3, 1)) == datetime(2028, 2, 29)
+
+    def test_day_of_month_or_day_of_week(self):
+        """Test that restricted day-of-month and day-of-week fields match either."""
+        schedule = parse_cron("0 12 1 * 0")
+
+        assert schedule.next_after(datetime(2026, 10, 18, 13, 0)) == datetime(2026, 10, 25, 12, 0)
+        assert schedule.next_after(datetime(2026, 10, 25, 13, 0)) == datetime(2026, 11, 1, 12, 0)
+
+    def test_fires_between_keeps_latest(self):
+        """Test bounded enumeration of missed fires."""
+        fires = parse_cron("0 * * * *").fires_between(
+            datetime(2026, 1, 1, 0, 0), datetime(2026, 1, 1, 5, 30), keep_last=2
+        )
+
+        assert fires == [datetime(2026, 1, 1, 4, 0), datetime(2026, 1, 1, 5, 0)]
+
+    def test_previous_before_mirrors_next_after(self):
+        """Test that walking backwards finds the same fires as walking forwards."""
+        for expression in ["*/15 9-17 * * mon-fri", "0 12 1 * 0", "0 0 29 2 *", "30 2 * jan,jul *"]:
+            schedule = parse_cron(expression)
+            fire = schedule.next_after(datetime(2026, 10, 16, 17, 50))
+            following = schedule.next_after(fire)
+
+            assert schedule.previous_before(following) == fire
+            assert schedule.previous_before(fire + timedelta(seconds=30)) == fire
+
+    def test_keep_last_after_long_outage(self):
+        """Test that catching up on years of missed fires jumps straight to the latest ones."""
+        schedule = parse_cron("* * * * *")
+
+        fires = schedule.fires_between(datetime(2020, 1, 1), datetime(2026, 10, 18, 12, 0, 30), keep_last=1)
+
+        assert fires == [datetime(2026, 10, 18, 12, 0)]
+        assert schedule.fires_between(datetime(2026, 1, 1, 5, 0), datetime(2026, 1, 1, 5, 1), keep_last=5) == [
+            datetime(2026, 1, 1, 5, 0), datetime(2026, 1, 1, 5, 1)
+        ]
+
+    @pytest.mark.parametrize("expression", ["* * *", "61 * * * *", "*/0 * * * *", "0 0 * foo *"])
+    def test_invalid_expressions(self, expression: str):
+        """Test that malformed expressions are rejected."""
+        with pytest.raises(CronError):
+            parse_cron(expression)
+
+    def test_unsatisfiable_expression(self):
+        """Test that expressions that never fire raise instead of looping."""
+        with pytest.raises(CronError):
+            parse_cron("0 0 30 2 *").next_after(datetime(2026, 1, 1))
@@ -0,0 +1,81 @@
+import math
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+import api.database as database
+from api.database import ReplicaRouter
+
+# Portable types, so the session hooks can be exercised on SQLite
+NoteBase = declarative_base()
+
+
+class Note(NoteBase):
+    __tablename__ = "notes"
+
+    id = Column(Integer, primary_key=True)
+    text = Column(String(100))
+
+
+class FakePool:
+    def __init__(self, checked_out):
+        self.checked_out = checked_out
+
+    def checkedout(self):
+        return self.checked_out
+
+
+class FakeEngine:
+    def __init__(self, name, checked_out=0):
+        self.name = name
+        self.pool = FakePool(checked_out)
+
+
+class TestReplicaRouter:
+    """Test suite for read replica selection."""
+
+    def test_primary_until_lag_is_known(self):
+        """Test that reads stay on the primary until a replica has been checked."""
+        router = ReplicaRouter([FakeEngine("replica-1")], max_lag_seconds=5, check_seconds=60, sticky_seconds=10)
+
+        assert router.choose("client") is None
+
+    def test_least_busy_fresh_replica(self):
+        """Test that lagging replicas are skipped and the least busy fresh one is chosen."""
+        busy, idle, lagging = FakeEngine("busy", 8), FakeEngine("idle", 1), FakeEngine("lagging", 0)
+        router = ReplicaRouter([busy, idle, lagging], max_lag_seconds=5, check_seconds=60, sticky_seconds=10)
+        router.lag = {0: 0.0, 1: 2.0, 2: 30.0}
+
+        assert router.choose("client") is idle
+
+        router.lag[1] = math.inf  # unreachable
+        assert router.choose("client") is busy
+
+    def test_reads_stick_to_primary_after_write(self):
+        """Test that a client reads its own writes from the primary, and other clients do not."""
+        replica = FakeEngine("replica-1")
+        router = ReplicaRouter([replica], max_lag_seconds=5, check_seconds=60, sticky_seconds=10)
+        router.lag = {0: 0.0}
+
+        router.mark_write("writer")
+
+        assert router.choose("writer") is None
+        assert router.choose("reader") is replica
+
+        router.last_writes["writer"] -= 11
+        assert router.choose("writer") is replica
+
+    def test_commit_with_writes_marks_client(self, monkeypatch):
+        """Test that only a commit that wrote something starts the read-your-writes window."""
+        router = ReplicaRouter([FakeEngine("replica-1")], max_lag_seconds=5, check_seconds=60, sticky_seconds=10)
+        monkeypatch.setattr(database, "replica_router", router)
+        engine = create_engine("sqlite://")
+        NoteBase.metadata.create_all(engine)
+
+        with Session(engine, info={"client_key": "reader"}) as session:
+            session.get(Note, 1)
+            session.commit()
+        with Session(engine, info={"client_key": "writer"}) as session:
+            session.add(Note(text="hello"))
+            session.commit()
+
+        assert set(router.last_writes) == {"writer"}
@@ -0,0 +1,93 @@
+import pytest
+import pandas as pd
+
+from services.incremental import plan_delta, source_key
+from services.local_executor import compute_partition, merge_keys
+
+RECORDS = [
+    {"user_id": "u1", "amount": 1.0, "event_time": "2026-01-01T01:00:00"},
+    {"user_id": "u1", "amount": 2.0, "event_time": "2026-01-02T01:00:00"},
+    {"user_id": "u2", "amount": 5.0, "event_time": "2026-01-01T03:00:00"},
+    {"user_id": "u1", "amount": 7.0, "event_time": "2026-01-02T05:00:00"},
+]
+
+
+@pytest.fixture
+def spec():
+    """Incremental aggregation over inline records."""
+    return {
+        "records": RECORDS,
+        "entity_column": "user_id",
+        "timestamp_column": "event_time",
+        "value_column": "amount",
+        "aggregation": "sum",
+        "incremental": True,
+    }
+
+
+class TestPlanDelta:
+    """Test suite for incremental change planning."""
+
+    def test_first_run_reads_everything(self, spec):
+        """Test that a computation without a watermark processes the full input."""
+        frame, watermark = plan_delta(spec, None)
+
+        assert len(frame) == 4
+        assert watermark == pd.Timestamp("2026-01-02T05:00:00")
+
+    def test_nothing_changed(self, spec):
+        """Test that no rows are recomputed when the watermark is current."""
+        frame, watermark = plan_delta(spec, pd.Timestamp("2026-01-02T05:00:00"))
+
+        assert frame.empty
+        assert watermark is None
+
+    def test_aggregation_recomputes_changed_entities(self, spec):
+        """Test that aggregations reload the full history of changed entities only."""
+        frame, watermark = plan_delta(spec, pd.Timestamp("2026-01-02T02:00:00"))
+
+        assert set(frame["user_id"]) == {"u1"}
+        assert len(frame) == 3
+        assert watermark == pd.Timestamp("2026-01-02T05:00:00")
+
+    def test_windowed_aggregation_recomputes_changed_windows(self, spec):
+        """Test that only the changed entity/window pairs are recomputed."""
+        spec["window"] = "1D"
+
+        frame, _ = plan_delta(spec, pd.Timestamp("2026-01-02T02:00:00"))
+
+        assert sorted(frame["amount"]) == [2.0, 7.0]
+
+    def test_row_level_recomputes_changed_rows(self, spec):
+        """Test that computations without aggregation only process new rows."""
+        spec.pop("aggregation")
+
+        frame, _ = plan_delta(spec, pd.Timestamp("2026-01-02T02:00:00"))
+
+        assert frame["amount"].tolist() == [7.0]
+
+    def test_source_key(self, spec):
+        """Test that watermarks are keyed per source."""
+        assert source_key(spec) == "inline"
+        assert source_key({"source": {"format": "csv", "path": "/data/tx.csv"}}) == "csv:/data/tx.csv"
+
+
+class TestMergeKeys:
+    """Test suite for the keys incremental results replace."""
+
+    def test_aggregate_replaces_current_value(self, spec):
+        """Test that a plain aggregate is keyed by entity, so reruns replace rather than accumulate."""
+        result, _ = compute_partition("python", pd.DataFrame.from_records(RECORDS), spec)
+
+        assert "effective_timestamp" in result.columns
+        assert merge_keys(result, spec) == ["entity_id"]
+
+    def test_point_in_time_values_keyed_by_timestamp(self, spec):
+        """Test that windowed aggregates and row-level values keep one row per timestamp."""
+        frame = pd.DataFrame.from_records(RECORDS)
+        windowed = {**spec, "window": "1D"}
+        row_level = {key: value for key, value in spec.items() if key != "aggregation"}
+
+        for point_in_time in (windowed, row_level):
+            result, _ = compute_partition("python", frame, point_in_time)
+            assert merge_keys(result, point_in_time) == ["entity_id", "effective_timestamp"]
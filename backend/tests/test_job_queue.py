@@ -0,0 +1,138 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.computation import ComputationTask, JobStatus
+from services.job_queue import JobQueue
+
+
+def make_task(**kwargs) -> ComputationTask:
+    task_data = {
+        "name": "Test Task",
+        "task_type": "job",
+        "config": {},
+        "organization_id": "test-org",
+        **kwargs
+    }
+    return ComputationTask(**task_data)
+
+
+@pytest.mark.asyncio
+class TestJobQueue:
+    """Test suite for the table-backed computation task queue."""
+
+    async def test_lease_marks_task_running(self, db_session: AsyncSession):
+        """Test that leasing claims a pending task for the worker."""
+        queue = JobQueue(lease_seconds=30)
+        task = await queue.enqueue(db_session, make_task())
+
+        leased = await queue.lease(db_session, "worker-1")
+
+        assert [t.id for t in leased] == [task.id]
+        assert leased[0].status == JobStatus.RUNNING
+        assert leased[0].lease_owner == "worker-1"
+        assert leased[0].attempts == 1
+
+    async def test_leased_task_not_leased_twice(self, db_session: AsyncSession):
+        """Test that a second worker cannot lease a task that is already held."""
+        queue = JobQueue()
+        await queue.enqueue(db_session, make_task())
+
+        assert len(await queue.lease(db_session, "worker-1")) == 1
+        assert await queue.lease(db_session, "worker-2") == []
+
+    async def test_lease_orders_by_priority(self, db_session: AsyncSession):
+        """Test that higher priority tasks are leased first."""
+        queue = JobQueue()
+        await queue.enqueue(db_session, make_task(name="low"), priority=1)
+        high = await queue.enqueue(db_session, make_task(name="high"), priority=9)
+
+        leased = await queue.lease(db_session, "worker-1")
+
+        assert leased[0].id == high.id
+
+    async def test_pipeline_steps_are_not_leased(self, db_session: AsyncSession):
+        """Test that child steps are only run by their parent pipeline task."""
+        queue = JobQueue()
+        run = await queue.enqueue(db_session, make_task(task_type="pipeline"))
+        db_session.add(make_task(task_type="pipeline_step", parent_id=run.id, status=JobStatus.PENDING))
+        await db_session.commit()
+
+        leased = await queue.lease(db_session, "worker-1", limit=10)
+
+        assert [t.id for t in leased] == [run.id]
+
+    async def test_complete_requires_lease(self, db_session: AsyncSession):
+        """Test that only the lease holder can complete a task."""
+        queue = JobQueue()
+        await queue.enqueue(db_session, make_task())
+        task = (await queue.lease(db_session, "worker-1"))[0]
+
+        assert not await queue.complete(db_session, task.id, "worker-2", {})
+        assert await queue.complete(db_session, task.id, "worker-1", {"ok": True})
+        await db_session.commit()
+
+        await db_session.refresh(task)
+        assert task.status == JobStatus.COMPLETED
+        assert task.result == {"ok": True}
+
+    async def test_fail_retries_then_fails(self, db_session: AsyncSession):
+        """Test that failed attempts are retried with backoff until exhausted."""
+        queue = JobQueue(max_attempts=2, retry_backoff_seconds=1)
+        await queue.enqueue(db_session, make_task())
+
+        task = (await queue.lease(db_session, "worker-1"))[0]
+        assert await queue.fail(db_session, task, "worker-1", "boom") == JobStatus.PENDING
+
+        await db_session.refresh(task)
+        task.available_at = datetime.utcnow() - timedelta(seconds=1)
+        await db_session.commit()
+
+        task = (await queue.lease(db_session, "worker-1"))[0]
+        assert await queue.fail(db_session, task, "worker-1", "boom") == JobStatus.FAILED
+
+    async def test_reap_expired_leases(self, db_session: AsyncSession):
+        """Test that tasks from dead workers return to the queue."""
+        queue = JobQueue()
+        await queue.enqueue(db_session, make_task())
+        task = (await queue.lease(db_session, "worker-1"))[0]
+
+        task.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+        await db_session.commit()
+
+        assert await queue.reap_expired_leases(db_session) == 1
+        assert len(await queue.lease(db_session, "worker-2")) == 1
+
+    async def test_aging_promotes_waiting_tasks(self, db_session: AsyncSession):
+        """Test that long-waiting low priority work overtakes fresh high priority work."""
+        queue = JobQueue(aging_seconds=60)
+        old = await queue.enqueue(db_session, make_task(name="old"), priority=1)
+        old.available_at = datetime.utcnow() - timedelta(minutes=30)
+        await db_session.commit()
+        await queue.enqueue(db_session, make_task(name="urgent"), priority=9)
+
+        leased = await queue.lease(db_session, "worker-1")
+
+        assert leased[0].id == old.id
+
+    async def test_lease_respects_organization_quota(self, db_session: AsyncSession):
+        """Test that one organization cannot hold more than its running quota."""
+        queue = JobQueue(org_max_concurrent=2)
+        for _ in range(5):
+            await queue.enqueue(db_session, make_task(organization_id="busy-org"), priority=9)
+        other = await queue.enqueue(db_session, make_task(organization_id="other-org"), priority=0)
+
+        leased = await queue.lease(db_session, "worker-1", limit=10)
+
+        orgs = [t.organization_id for t in leased]
+        assert orgs.count("busy-org") == 2
+        assert other.id in [t.id for t in leased]
+        assert await queue.lease(db_session, "worker-2", limit=10) == []
+
+    async def test_queue_depth_counts_runnable_tasks(self, db_session: AsyncSession):
+        """Test that queue depth only counts tasks that could be leased now."""
+        queue = JobQueue()
+        await queue.enqueue(db_session, make_task())
+        await queue.enqueue(db_session, make_task(), delay_seconds=3600)
+
+        assert await queue.queue_depth(db_session) == {"job": 1}
@@ -0,0 +1,106 @@
+import pytest
+import uuid
+import pandas as pd
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.computation import ComputeEngine, DataSource, FeatureComputation, JobType
+from models.feature import FeatureValue
+from services.local_executor import LocalComputeEngine, compute_partition, partition_by_entity, resolve_input
+
+
+@pytest.fixture
+def transactions() -> pd.DataFrame:
+    """Sample transaction rows for local computation tests."""
+    return pd.DataFrame({
+        "user_id": ["u1", "u2", "u1", "u3", "u2", "u1"],
+        "amount": [10.0, 5.0, 2.5, 7.0, 1.0, 0.5],
+        "quantity": [1, 2, 4, 1, 3, 2],
+    })
+
+
+class TestLocalExecutor:
+    """Test suite for the local multiprocess compute engine."""
+
+    def test_partition_keeps_entities_together(self, transactions: pd.DataFrame):
+        """Test that every entity lands in exactly one partition."""
+        partitions = partition_by_entity(transactions, "user_id", 4)
+
+        assert sum(len(p) for p in partitions) == len(transactions)
+        seen = {}
+        for index, part in enumerate(partitions):
+            for user_id in part["user_id"].unique():
+                assert seen.setdefault(user_id, index) == index
+
+    def test_python_engine_aggregates_expression(self, transactions: pd.DataFrame):
+        """Test vectorized expression plus aggregation per entity."""
+        spec = {"entity_column": "user_id", "expression": "amount * quantity", "aggregation": "sum"}
+
+        result, stats = compute_partition(ComputeEngine.PYTHON.value, transactions, spec)
+
+        values = dict(zip(result["entity_id"], result["value"]))
+        assert values == {"u1": 21.0, "u2": 13.0, "u3": 7.0}
+        assert stats["input_rows"] == 6
+        assert stats["output_rows"] == 3
+        assert stats["cpu_seconds"] >= 0
+
+    def test_sql_engine_runs_query(self, transactions: pd.DataFrame):
+        """Test SQL computation over a partition."""
+        spec = {
+            "entity_column": "user_id",
+            "sql": "SELECT user_id AS entity_id, COUNT(*) AS value FROM input GROUP BY user_id",
+        }
+
+        result, _ = compute_partition(ComputeEngine.SQL.value, transactions, spec)
+
+        values = dict(zip(result["entity_id"], result["value"]))
+        assert values == {"u1": 3, "u2": 2, "u3": 1}
+
+
+@pytest.mark.asyncio
+class TestFeatureValueWrites:
+    """Test suite for resolving inputs and writing results."""
+
+    async def test_string_timestamps_are_stored(self, db_session: AsyncSession):
+        """Test that timestamps loaded as strings, e.g. from CSV, are written as naive UTC datetimes."""
+        computation = FeatureComputation(
+            feature_id=uuid.uuid4(),
+            version_id=uuid.uuid4(),
+            job_type=JobType.BATCH,
+            compute_engine=ComputeEngine.PYTHON,
+            config={},
+            organization_id="test-org"
+        )
+        db_session.add(computation)
+        await db_session.commit()
+        result = pd.DataFrame({
+            "entity_id": ["u1", "u2"],
+            "value": [1.0, 2.0],
+            "effective_timestamp": ["2026-01-01T00:30:00", "2026-01-01T01:00:00"],
+        })
+
+        written = await LocalComputeEngine(max_workers=1).write_values(db_session, result, computation, {})
+        await db_session.commit()
+
+        stored = (await db_session.execute(select(FeatureValue).order_by(FeatureValue.entity_id))).scalars().all()
+        assert written == 2
+        assert [value.effective_timestamp for value in stored] == [datetime(2026, 1, 1, 0, 30), datetime(2026, 1, 1, 1, 0)]
+
+    async def test_input_resolves_through_data_sources(self, db_session: AsyncSession):
+        """Test that inputs come from the organization's own data sources and paths in config are refused."""
+        db_session.add(DataSource(
+            name="transactions",
+            source_type="file",
+            connection_config={"format": "csv", "path": "/data/org-a/transactions.csv"},
+            organization_id="org-a"
+        ))
+        await db_session.commit()
+
+        spec = await resolve_input(db_session, "org-a", {"input_source": "transactions"})
+        assert spec["source"]["path"] == "/data/org-a/transactions.csv"
+
+        with pytest.raises(ValueError, match="not found"):
+            await resolve_input(db_session, "org-b", {"input_source": "transactions"})
+        with pytest.raises(ValueError, match="input_source"):
+            await resolve_input(db_session, "org-a", {"source": {"format": "csv", "path": "/etc/passwd"}})
@@ -0,0 +1,52 @@
+import logging
+import queue
+import pytest
+import structlog
+
+from api.config import settings
+from api.logging_config import (
+    LOG_LINES_DROPPED, DroppingQueueHandler, drop_unsampled, request_sampled, sample_rate, sample_request
+)
+
+
+class TestSampling:
+    """Test suite for per-route request sampling."""
+
+    def test_longest_prefix_wins(self, monkeypatch):
+        """Test that a path takes the rate of its longest configured prefix."""
+        monkeypatch.setattr(settings, "LOG_SAMPLE_RATES", {"/api": 0.5, "/api/v1/serving": 0.01, "/health": 0.0})
+        monkeypatch.setattr(settings, "LOG_SAMPLE_RATE_DEFAULT", 0.2)
+
+        assert sample_rate("/api/v1/serving/features") == 0.01
+        assert sample_rate("/api/v1/features") == 0.5
+        assert sample_rate("/health") == 0.0
+        assert sample_rate("/docs") == 0.2
+
+    def test_unsampled_request_drops_info_only(self, monkeypatch):
+        """Test that a sampled-out request drops debug/info events but keeps warnings."""
+        monkeypatch.setattr(settings, "LOG_SAMPLE_RATES", {"/health": 0.0})
+        token = request_sampled.set(True)
+        try:
+            assert not sample_request("/health")
+
+            with pytest.raises(structlog.DropEvent):
+                drop_unsampled(None, "info", {"event": "Request started"})
+            assert drop_unsampled(None, "warning", {"event": "Slow"}) == {"event": "Slow"}
+        finally:
+            request_sampled.reset(token)
+
+
+class TestDroppingQueueHandler:
+    """Test suite for the non-blocking log handler."""
+
+    def test_full_queue_drops_and_counts(self):
+        """Test that a full queue drops lines instead of blocking the caller."""
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "line", None, None)
+        dropped = LOG_LINES_DROPPED._value.get()
+
+        handler.handle(record)
+        handler.handle(record)
+
+        assert handler.queue.qsize() == 1
+        assert LOG_LINES_DROPPED._value.get() == dropped + 1
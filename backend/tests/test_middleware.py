@@ -0,0 +1,153 @@
+import asyncio
+import time
+import pytest
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from api import middleware
+from api.middleware import CONTEXT_KEY, OVERFLOW_ORGANIZATION, OrganizationLabels, create_middleware_stack
+from services.rate_limiter import RateLimiter, TokenBucket
+
+
+async def ping(request):
+    return PlainTextResponse(request.state.correlation_id)
+
+
+async def stream(request):
+    async def chunks():
+        for index in range(3):
+            yield f"chunk-{index}\n"
+            await asyncio.sleep(0)
+
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+async def call(app, path, headers=None):
+    """Run one request through an ASGI app and collect the messages it sends."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"test"), *(headers or [])],
+        "client": ("127.0.0.1", 50000),
+        "server": ("test", 80),
+        "state": {},
+    }
+    messages = []
+    received = asyncio.Event()
+
+    async def receive():
+        if received.is_set():
+            # Stay connected until the response is done
+            await asyncio.Event().wait()
+        received.set()
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return scope, messages
+
+
+@pytest.fixture
+def app():
+    """Test app behind the full middleware stack."""
+    return create_middleware_stack(Starlette(routes=[Route("/ping", ping), Route("/stream", stream)]))
+
+
+@pytest.fixture
+def rate_limiter(monkeypatch):
+    """A fresh rate limiter behind the middleware, so no sync task outlives its test's event loop."""
+    limiter = RateLimiter()
+    monkeypatch.setattr(middleware, "rate_limiter", limiter)
+    return limiter
+
+
+class TestMiddlewareStack:
+    """Test suite for the pure ASGI middleware stack."""
+
+    @pytest.mark.asyncio
+    async def test_headers_and_shared_context(self, app):
+        """Test that every middleware sees one context and adds its headers to the response."""
+        scope, messages = await call(app, "/ping", [(b"x-correlation-id", b"abc-123")])
+
+        headers = dict(messages[0]["headers"])
+        assert messages[0]["status"] == 200
+        assert headers[b"x-correlation-id"] == b"abc-123"
+        assert headers[b"x-frame-options"] == b"DENY"
+        assert messages[1]["body"] == b"abc-123"
+        assert len(scope["state"][CONTEXT_KEY].middleware) == 6
+
+    @pytest.mark.asyncio
+    async def test_streaming_passes_through(self, app):
+        """Test that streamed chunks are forwarded one by one, not buffered."""
+        _, messages = await call(app, "/stream")
+
+        bodies = [message["body"] for message in messages if message["type"] == "http.response.body"]
+        assert bodies[:3] == [b"chunk-0\n", b"chunk-1\n", b"chunk-2\n"]
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_request_short_circuits(self, app, rate_limiter):
+        """Test that a rejected request gets a 429 with Retry-After and never reaches the route."""
+        rate_limiter.set_plan("org-limited", "free")
+        rate_limiter.buckets["org-limited"] = TokenBucket(60, time.monotonic())
+        rate_limiter.buckets["org-limited"].tokens = 0
+
+        _, messages = await call(app, "/ping", [(b"x-organization-id", b"org-limited")])
+
+        headers = dict(messages[0]["headers"])
+        assert messages[0]["status"] == 429
+        assert b"retry-after" in headers
+        await rate_limiter.close()
+
+
+class TestRequestMetrics:
+    """Test suite for low-cardinality request metrics."""
+
+    @pytest.mark.asyncio
+    async def test_labels_use_route_template(self):
+        """Test that requests to different ids share the route template's series."""
+        api = FastAPI()
+
+        @api.get("/features/{feature_id}")
+        async def get_feature(feature_id: str):
+            return {"id": feature_id}
+
+        app = create_middleware_stack(api)
+        labels = {"method": "GET", "endpoint": "/features/{feature_id}", "status_code": "200", "organization_id": "org-metrics"}
+        before = REGISTRY.get_sample_value("http_requests_total", labels) or 0
+
+        for feature_id in ("f-1", "f-2", "f-3"):
+            await call(app, f"/features/{feature_id}", [(b"x-organization-id", b"org-metrics")])
+
+        assert REGISTRY.get_sample_value("http_requests_total", labels) == before + 3
+        assert REGISTRY.get_sample_value("http_requests_total", {**labels, "endpoint": "/features/f-1"}) is None
+
+    def test_organization_label_overflow(self):
+        """Test that organizations past the limit share the overflow label."""
+        label = OrganizationLabels(max_size=2)
+
+        assert [label(org) for org in ("a", "b", "c", "a", "d")] == ["a", "b", OVERFLOW_ORGANIZATION, "a", OVERFLOW_ORGANIZATION]
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint_skips_rate_limit(self, app, rate_limiter):
+        """Test that /metrics is served even for a client that is being rate limited."""
+        rate_limiter.set_plan("org-scraper", "free")
+        rate_limiter.buckets["org-scraper"] = TokenBucket(60, time.monotonic())
+        rate_limiter.buckets["org-scraper"].tokens = 0
+
+        _, messages = await call(app, "/metrics", [(b"x-organization-id", b"org-scraper")])
+
+        assert messages[0]["status"] == 200
+        assert b"http_requests_total" in messages[1]["body"]
+        await rate_limiter.close()
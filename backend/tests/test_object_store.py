@@ -0,0 +1,75 @@
+import gzip
+import pytest
+
+from services.object_store import LocalObjectStore, delete_offloaded, is_offloaded, load, offload
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Object store rooted in a temporary directory."""
+    return LocalObjectStore(str(tmp_path))
+
+
+class TestOffload:
+    """Test suite for offloading large payloads."""
+
+    @pytest.mark.asyncio
+    async def test_small_payload_stays_inline(self, store):
+        """Test that payloads under the threshold are returned unchanged."""
+        payload = {"records_output": 10}
+
+        assert await offload(payload, "org/results/small.json.gz", store, threshold=1024) is payload
+
+    @pytest.mark.asyncio
+    async def test_large_payload_round_trip(self, store, tmp_path):
+        """Test that large payloads are stored compressed and loaded back intact."""
+        payload = {"records_output": 5000, "rows": [{"entity_id": i, "value": i * 1.5} for i in range(5000)]}
+
+        pointer = await offload(payload, "org/results/large.json.gz", store, threshold=1024)
+
+        assert is_offloaded(pointer)
+        assert pointer["summary"] == {"records_output": 5000, "rows": "<list of 5000 items>"}
+        assert pointer["offloaded"]["compressed_bytes"] < pointer["offloaded"]["size_bytes"]
+        assert (tmp_path / "org" / "results" / "large.json.gz").exists()
+        assert await load(pointer, store) == payload
+
+    @pytest.mark.asyncio
+    async def test_corrupt_object_rejected(self, store):
+        """Test that a payload whose checksum no longer matches is not returned."""
+        pointer = await offload({"rows": list(range(1000))}, "org/results/bad.json.gz", store, threshold=100)
+        await store.put("org/results/bad.json.gz", gzip.compress(b'{"rows": []}'))
+
+        with pytest.raises(ValueError):
+            await load(pointer, store)
+
+    @pytest.mark.asyncio
+    async def test_pointer_is_not_uploaded_again(self, store, tmp_path):
+        """Test that offloading a pointer returns it without writing another object."""
+        pointer = await offload({"rows": list(range(1000))}, "org/jobs/1/output.json.gz", store, threshold=100)
+
+        assert await offload(pointer, "org/results/copy.json.gz", store, threshold=100) is pointer
+        assert not (tmp_path / "org" / "results" / "copy.json.gz").exists()
+
+    @pytest.mark.asyncio
+    async def test_delete_offloaded(self, store, tmp_path):
+        """Test that the objects behind pointers are removed and inline payloads are skipped."""
+        pointer = await offload({"rows": list(range(1000))}, "org/jobs/1/output.json.gz", store, threshold=100)
+
+        await delete_offloaded(pointer, {"records_output": 3}, None, store=store)
+
+        assert not (tmp_path / "org" / "jobs" / "1" / "output.json.gz").exists()
+
+    @pytest.mark.asyncio
+    async def test_inline_payload_loads_as_is(self, store):
+        """Test that rows written before offloading existed still load."""
+        assert await load({"records_output": 3}, store) == {"records_output": 3}
+
+
+class TestLocalObjectStore:
+    """Test suite for the filesystem backend."""
+
+    @pytest.mark.asyncio
+    async def test_rejects_keys_outside_root(self, store):
+        """Test that keys cannot escape the store's directory."""
+        with pytest.raises(ValueError):
+            await store.put("../outside", b"data")
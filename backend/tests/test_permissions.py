@@ -0,0 +1,94 @@
+import pytest
+
+from models.user import PermissionType, ResourceType
+from services.permissions import PermissionCache, PermissionSet, parse_permission
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Counts queries and returns the current grants for each of them."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        return FakeResult(list(self.rows))
+
+
+class TestPermissionSet:
+    """Test suite for compiled permission sets."""
+
+    def test_admin_implies_every_permission_on_its_resource(self):
+        """Test that admin on a resource type grants every action on it, and nothing else."""
+        permissions = PermissionSet([
+            (ResourceType.FEATURE, PermissionType.READ),
+            (ResourceType.MONITORING, PermissionType.ADMIN),
+        ])
+
+        assert permissions.allows(ResourceType.FEATURE, PermissionType.READ)
+        assert not permissions.allows(ResourceType.FEATURE, PermissionType.WRITE)
+        assert permissions.allows("monitoring", "write")
+        assert not permissions.allows(ResourceType.COMPUTATION, PermissionType.READ)
+
+    def test_claims_round_trip(self):
+        """Test that the compact token claim compiles back to the same grants."""
+        permissions = PermissionSet([(ResourceType.LINEAGE, PermissionType.READ), ("computation", "execute")])
+
+        claims = permissions.to_claims()
+
+        assert claims == ["computation:execute", "lineage:read"]
+        assert PermissionSet.from_claims(claims).grants == permissions.grants
+
+    def test_route_permission_names(self):
+        """Test that plural route resources map to their resource type."""
+        assert parse_permission("feature_values:write") == ("feature_value", "write")
+        assert parse_permission("monitoring:read") == ("monitoring", "read")
+        assert parse_permission("computation:execute") == ("computation", "execute")
+
+
+class TestPermissionCache:
+    """Test suite for versioned permission caching."""
+
+    @pytest.mark.asyncio
+    async def test_compiled_once_until_version_bump(self):
+        """Test that a role change in the organization recompiles its users' sets."""
+        db = FakeSession([(ResourceType.FEATURE, PermissionType.READ)])
+        cache = PermissionCache(ttl_seconds=60, max_size=10)
+
+        first = await cache.get("user-1", "org-1", db)
+        assert await cache.get("user-1", "org-1", db) is first
+        assert db.queries == 1
+
+        cache.bump("org-2")
+        await cache.get("user-1", "org-1", db)
+        assert db.queries == 1
+
+        db.rows.append((ResourceType.FEATURE, PermissionType.WRITE))
+        cache.bump("org-1")
+        permissions = await cache.get("user-1", "org-1", db)
+
+        assert db.queries == 2
+        assert permissions.allows(ResourceType.FEATURE, PermissionType.WRITE)
+
+    @pytest.mark.asyncio
+    async def test_global_bump_outdates_every_organization(self):
+        """Test that a change to a permission itself recompiles every set."""
+        db = FakeSession([])
+        cache = PermissionCache(ttl_seconds=60, max_size=10)
+        await cache.get("user-1", "org-1", db)
+        await cache.get("user-2", "org-2", db)
+
+        cache.bump()
+        await cache.get("user-1", "org-1", db)
+        await cache.get("user-2", "org-2", db)
+
+        assert db.queries == 4
@@ -0,0 +1,114 @@
+import pytest
+import asyncio
+import time
+
+from models.computation import JobStatus
+from services.pipeline_executor import PipelineExecutor, PipelineGraphError, topological_order
+
+
+DIAMOND = {
+    "extract": [],
+    "clean": ["extract"],
+    "enrich": ["extract"],
+    "aggregate": ["clean", "enrich"],
+    "independent": [],
+}
+
+
+class TestPipelineGraph:
+    """Test suite for pipeline dependency ordering."""
+
+    def test_topological_order_respects_dependencies(self):
+        """Test that every step is ordered after its dependencies."""
+        order = topological_order(DIAMOND)
+
+        for step, deps in DIAMOND.items():
+            for dep in deps:
+                assert order.index(dep) < order.index(step)
+
+    def test_cycle_rejected(self):
+        """Test that cyclic dependencies are rejected."""
+        with pytest.raises(PipelineGraphError):
+            topological_order({"a": ["b"], "b": ["a"]})
+
+    def test_unknown_dependency_rejected(self):
+        """Test that dependencies on missing steps are rejected."""
+        with pytest.raises(PipelineGraphError):
+            topological_order({"a": ["missing"]})
+
+
+@pytest.mark.asyncio
+class TestPipelineExecutor:
+    """Test suite for DAG pipeline execution."""
+
+    async def test_independent_branches_run_concurrently(self):
+        """Test that a pipeline finishes in critical-path time."""
+        async def run_step(step, inputs):
+            await asyncio.sleep(0.1)
+            return step
+
+        start = time.monotonic()
+        outcomes = await PipelineExecutor(run_step, max_concurrency=10).execute(DIAMOND)
+
+        # Critical path is extract -> clean -> aggregate (0.3s); run one at a time, the five steps take 0.5s
+        elapsed = time.monotonic() - start
+        assert 0.29 < elapsed < 0.45
+        assert all(o["status"] == JobStatus.COMPLETED for o in outcomes.values())
+
+    async def test_outputs_passed_downstream(self):
+        """Test that steps receive their dependencies' outputs."""
+        received = {}
+
+        async def run_step(step, inputs):
+            received[step] = inputs
+            return f"{step}-output"
+
+        await PipelineExecutor(run_step, max_concurrency=2).execute(DIAMOND)
+
+        assert received["aggregate"] == {"clean": "clean-output", "enrich": "enrich-output"}
+
+    async def test_failure_cancels_only_downstream(self):
+        """Test that a failed step cancels its subgraph and nothing else."""
+        async def run_step(step, inputs):
+            if step == "clean":
+                raise RuntimeError("bad data")
+            return step
+
+        outcomes = await PipelineExecutor(run_step, max_concurrency=10).execute(DIAMOND)
+
+        assert outcomes["clean"]["status"] == JobStatus.FAILED
+        assert outcomes["aggregate"]["status"] == JobStatus.CANCELLED
+        assert outcomes["enrich"]["status"] == JobStatus.COMPLETED
+        assert outcomes["independent"]["status"] == JobStatus.COMPLETED
+
+    async def test_completed_steps_are_not_rerun(self):
+        """Test that steps finished in an earlier attempt are skipped."""
+        ran = []
+
+        async def run_step(step, inputs):
+            ran.append(step)
+            return step
+
+        await PipelineExecutor(run_step).execute(DIAMOND, completed={"extract": "cached"})
+
+        assert "extract" not in ran
+
+    async def test_cancellation_stops_running_steps(self):
+        """Test that cancelling the execution cancels the steps in flight."""
+        started, cancelled = [], []
+
+        async def run_step(step, inputs):
+            started.append(step)
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(step)
+                raise
+
+        execution = asyncio.create_task(PipelineExecutor(run_step, max_concurrency=10).execute(DIAMOND))
+        await asyncio.sleep(0.05)
+        execution.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await execution
+
+        assert sorted(cancelled) == sorted(started) == ["extract", "independent"]
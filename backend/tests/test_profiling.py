@@ -0,0 +1,128 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.responses import PlainTextResponse
+
+from api.config import settings
+from api.middleware import create_middleware_stack
+from api.profiling import QueryProfile, check_profile, current_profile, install, violations
+
+engine = create_async_engine("sqlite+aiosqlite://")
+install(engine.sync_engine)
+
+
+def teardown_module():
+    # aiosqlite connections run on their own threads, which keep the process alive until closed
+    asyncio.run(engine.dispose())
+
+
+async def lookups(items: int = 1):
+    """Issues one statement per item, the shape of an N+1."""
+    async with engine.connect() as conn:
+        for item in range(items):
+            await conn.execute(text("SELECT :item"), {"item": item})
+    return PlainTextResponse("ok")
+
+
+async def call(app, path, query_string=b""):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("test", 80),
+        "state": {},
+    }
+    messages = []
+    received = asyncio.Event()
+
+    async def receive():
+        if received.is_set():
+            await asyncio.Event().wait()
+        received.set()
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(settings, "TESTING", True)
+    monkeypatch.setattr(settings, "SQL_N_PLUS_ONE_THRESHOLD", 10)
+    monkeypatch.setattr(settings, "SQL_QUERY_BUDGET_DEFAULT", 50)
+    violations.clear()
+    api = FastAPI()
+    api.add_api_route("/lookups", lookups)
+    yield create_middleware_stack(api)
+    violations.clear()
+
+
+class TestQueryProfile:
+    """Test suite for per-request query statistics."""
+
+    def test_budget_and_repeated_statements(self, monkeypatch):
+        """Test that a request over its route budget, or repeating one statement, is flagged."""
+        monkeypatch.setattr(settings, "SQL_QUERY_BUDGETS", {"GET /cheap": 2})
+        monkeypatch.setattr(settings, "SQL_N_PLUS_ONE_THRESHOLD", 3)
+        profile = QueryProfile()
+        for _ in range(3):
+            profile.record("SELECT * FROM features WHERE id = $1", 0.001)
+        profile.record("SELECT * FROM organizations WHERE id = $1", 0.005)
+
+        problems = check_profile("GET /cheap", profile)
+
+        assert profile.count == 4
+        assert profile.slowest == "SELECT * FROM organizations WHERE id = $1"
+        assert len(problems) == 2
+        assert "budget of 2" in problems[0]
+        assert "N+1" in problems[1]
+
+    @pytest.mark.asyncio
+    async def test_async_engine_statements_reach_profile(self):
+        """Test that statements run through an async engine are counted in the caller's profile."""
+        profile = QueryProfile()
+        token = current_profile.set(profile)
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                await conn.execute(text("SELECT 2"))
+        finally:
+            current_profile.reset(token)
+
+        assert profile.count == 2
+        assert profile.duration > 0
+
+
+class TestQueryProfilingMiddleware:
+    """Test suite for the profiling middleware."""
+
+    @pytest.mark.asyncio
+    async def test_server_timing_header(self, app):
+        """Test that a response reports its database time and statement count."""
+        messages = await call(app, "/lookups", b"items=3")
+
+        headers = dict(messages[0]["headers"])
+        assert headers[b"server-timing"].startswith(b"db;dur=")
+        assert headers[b"server-timing"].endswith(b'desc="3 queries"')
+        assert violations == []
+
+    @pytest.mark.asyncio
+    async def test_n_plus_one_flagged_in_tests(self, app):
+        """Test that repeating one statement per item is recorded as a violation."""
+        await call(app, "/lookups", b"items=12")
+
+        assert len(violations) == 1
+        assert "GET /lookups ran the same statement 12 times" in violations[0]
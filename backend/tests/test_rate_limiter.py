@@ -0,0 +1,153 @@
+import asyncio
+import time
+import pytest
+
+from api.config import settings
+from services.rate_limiter import DEFAULT_BUCKET, RateLimiter, TokenBucket, tier_limit
+
+
+class TestTokenBucket:
+    """Test suite for the local token bucket."""
+
+    def test_burst_then_refill(self):
+        """Test that a full bucket allows a burst of its capacity and then refills over time."""
+        bucket = TokenBucket(60, now=0.0)
+
+        assert all(bucket.take(0.0) for _ in range(60))
+        assert not bucket.take(0.0)
+        assert bucket.retry_after() == pytest.approx(1.0)
+        assert bucket.take(1.0)
+        assert bucket.spent == 61
+
+    def test_resize_keeps_fill_level(self):
+        """Test that an upgraded plan scales the remaining tokens with the new capacity."""
+        bucket = TokenBucket(100, now=0.0)
+        for _ in range(50):
+            bucket.take(0.0)
+
+        bucket.resize(1000)
+
+        assert bucket.tokens == pytest.approx(500)
+
+
+class TestRateLimiter:
+    """Test suite for per-organization limiting."""
+
+    def test_limits_by_plan_tier(self):
+        """Test that each organization is limited by its own plan."""
+        limiter = RateLimiter(sync_seconds=60, plan_cache_seconds=300)
+        limiter.set_plan("org-free", "free")
+        limiter.set_plan("org-pro", "pro")
+
+        free_allowed = sum(limiter.allow("org-free")[0] for _ in range(settings.RATE_LIMIT_FREE_TIER + 10))
+        pro_allowed = sum(limiter.allow("org-pro")[0] for _ in range(settings.RATE_LIMIT_FREE_TIER + 10))
+
+        assert free_allowed == settings.RATE_LIMIT_FREE_TIER
+        assert pro_allowed == settings.RATE_LIMIT_FREE_TIER + 10
+        assert limiter.allow("org-free")[1] > 0
+
+    def test_plan_change_resizes_bucket(self):
+        """Test that a refreshed plan takes effect on an existing bucket."""
+        limiter = RateLimiter(sync_seconds=60, plan_cache_seconds=300)
+        limiter.set_plan("org-1", "free")
+        limiter.allow("org-1")
+
+        limiter.set_plan("org-1", "enterprise")
+
+        assert limiter.buckets["org-1"].capacity == tier_limit("enterprise")
+
+    def test_unknown_organizations_share_default_bucket(self):
+        """Test that IDs naming no organization add no buckets or plans of their own."""
+        limiter = RateLimiter(sync_seconds=60, plan_cache_seconds=300)
+        limiter.set_plans({"org-1": "pro"})
+
+        allowed = sum(limiter.allow(f"made-up-{i}")[0] for i in range(settings.RATE_LIMIT_FREE_TIER + 10))
+        limiter.allow("org-1")
+
+        assert allowed == settings.RATE_LIMIT_FREE_TIER
+        assert set(limiter.buckets) == {"org-1", DEFAULT_BUCKET}
+        assert set(limiter.plans) == {"org-1"}
+
+    @pytest.mark.asyncio
+    async def test_plans_loaded_once_for_many_organizations(self):
+        """Test that new organization IDs do not each trigger a plan lookup."""
+        limiter = RateLimiter(sync_seconds=60, plan_cache_seconds=300)
+        loads = []
+
+        async def load_plans():
+            loads.append(1)
+            limiter.set_plans({"org-1": "free"})
+
+        limiter.load_plans = load_plans
+        for i in range(100):
+            limiter.allow(f"org-{i}")
+            await asyncio.sleep(0)
+
+        assert len(loads) == 1
+        # org-0 arrived before the plans were loaded, and is dropped on the next sync
+        assert set(limiter.buckets) == {"org-0", "org-1", DEFAULT_BUCKET}
+
+        async def get_redis():
+            return None
+
+        async def script(keys, args):
+            return "0"
+
+        limiter.get_redis = get_redis
+        limiter._script = script
+        await limiter.sync()
+
+        assert "org-0" not in limiter.buckets
+        await limiter.close()
+
+    def test_check_is_local(self):
+        """Test that a check costs microseconds, not a network round trip."""
+        limiter = RateLimiter(sync_seconds=60, plan_cache_seconds=300)
+        limiter.set_plan("org-1", "enterprise")
+
+        started = time.perf_counter()
+        for _ in range(10000):
+            limiter.allow("org-1")
+        per_check = (time.perf_counter() - started) / 10000
+
+        assert per_check < 50e-6
+
+    @pytest.mark.asyncio
+    async def test_sync_caps_local_tokens_at_global_remaining(self):
+        """Test that tokens spent by other processes are taken out of the local bucket on sync."""
+        limiter = RateLimiter(sync_seconds=60, plan_cache_seconds=300)
+        limiter.set_plan("org-1", "free")
+        for _ in range(10):
+            limiter.allow("org-1")
+        calls = []
+
+        async def get_redis():
+            return None
+
+        async def script(keys, args):
+            calls.append((keys, args))
+            return "5"  # other processes spent most of the shared bucket
+
+        limiter.get_redis = get_redis
+        limiter._script = script
+        await limiter.sync()
+
+        assert calls[0][0] == ["rate_limit:org-1"]
+        assert calls[0][1][3] == 10
+        assert limiter.buckets["org-1"].tokens <= 5
+        assert limiter.buckets["org-1"].spent == 0
+        await limiter.close()
+
+    def test_close_from_another_loop(self):
+        """Test that closing does not await a sync task left on a closed event loop."""
+        limiter = RateLimiter(sync_seconds=60, plan_cache_seconds=300)
+
+        async def start():
+            limiter.set_plan("org-1", "free")
+            limiter.allow("org-1")
+
+        asyncio.run(start())
+        assert limiter._sync_task is not None
+
+        asyncio.run(limiter.close())
+        assert limiter._sync_task is None
@@ -0,0 +1,60 @@
+import time
+import uuid
+import pytest
+
+from models.computation import ComputationJob
+from services.resource_monitor import build_samples, merge_samples, read_proc_usage, track_usage
+
+
+class TestTrackUsage:
+    """Test suite for per-block resource accounting and limits."""
+
+    def test_measures_cpu_and_memory(self):
+        """Test that CPU time, peak RSS and at least one sample are reported."""
+        with track_usage() as stats:
+            blob = b"x" * (64 * 1024 * 1024)
+            sum(range(2_000_000))
+        del blob
+
+        assert stats["cpu_seconds"] > 0
+        assert stats["peak_rss_bytes"] >= 64 * 1024 * 1024
+        assert len(stats["samples"]) >= 1
+
+    def test_memory_limit_raises(self):
+        """Test that exceeding memory_gb raises MemoryError in the work."""
+        baseline = read_proc_usage()["rss_bytes"]
+
+        with pytest.raises(MemoryError, match="memory limit"):
+            with track_usage({"memory_bytes": baseline + 32 * 1024 * 1024}):
+                blob = b"x" * (128 * 1024 * 1024)
+                time.sleep(5)
+        del blob
+
+    def test_cpu_limit_raises_timeout(self):
+        """Test that work past its CPU budget raises TimeoutError and the limit is restored."""
+        with pytest.raises(TimeoutError):
+            with track_usage({"cpu_seconds": 1}):
+                while True:
+                    pass
+
+        # The process keeps running normally afterwards
+        with track_usage() as stats:
+            sum(range(1000))
+        assert stats["cpu_seconds"] >= 0
+
+
+class TestSamples:
+    """Test suite for job resource time series."""
+
+    def test_concurrent_partitions_are_summed(self):
+        """Test that samples from different processes in one interval add up."""
+        series = {}
+        merge_samples(series, 101, [[1000.0, 2.5, 1024 ** 3]])
+        merge_samples(series, 102, [[1001.0, 2.5, 1024 ** 3]])
+
+        job = ComputationJob(id=uuid.uuid4(), organization_id="org-1")
+        samples = build_samples(job, series)
+
+        assert len(samples) == 1
+        assert samples[0].cpu_cores == pytest.approx(1.0)
+        assert samples[0].memory_gb == pytest.approx(2.0)
@@ -0,0 +1,116 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.computation import ComputationJob, ComputeEngine, FeatureComputation, JobType, SchedulerLease
+from services.scheduler import ComputationScheduler
+
+
+class TestCatchupPolicy:
+    """Test suite for missed-run handling."""
+
+    NOW = datetime(2026, 1, 1, 6, 30)
+    DUE_SINCE = datetime(2026, 1, 1, 1, 0)
+
+    def test_latest_runs_once(self):
+        """Test that the latest policy collapses missed fires into one run."""
+        scheduler = ComputationScheduler(catchup_policy="latest")
+
+        assert scheduler.due_fires("0 * * * *", self.DUE_SINCE, self.NOW) == [datetime(2026, 1, 1, 6, 0)]
+
+    def test_all_runs_every_missed_fire(self):
+        """Test that the all policy replays each missed fire."""
+        scheduler = ComputationScheduler(catchup_policy="all")
+
+        assert len(scheduler.due_fires("0 * * * *", self.DUE_SINCE, self.NOW)) == 6
+
+    def test_skip_drops_stale_fires(self):
+        """Test that the skip policy ignores fires outside the misfire grace period."""
+        scheduler = ComputationScheduler(catchup_policy="skip")
+
+        assert scheduler.due_fires("0 * * * *", self.DUE_SINCE, self.NOW) == []
+        assert scheduler.due_fires("30 * * * *", self.DUE_SINCE, self.NOW) == [self.NOW]
+
+    def test_unknown_policy_rejected(self):
+        """Test that misconfigured policies fail fast."""
+        with pytest.raises(ValueError):
+            ComputationScheduler(catchup_policy="sometimes")
+
+
+@pytest.mark.asyncio
+class TestSchedulerLeadership:
+    """Test suite for scheduler leader election."""
+
+    async def test_only_one_leader(self, db_session: AsyncSession):
+        """Test that a second replica cannot lead while the lease is live."""
+        first = ComputationScheduler(instance_id="replica-1")
+        second = ComputationScheduler(instance_id="replica-2")
+
+        assert await first.acquire_leadership(db_session)
+        assert not await second.acquire_leadership(db_session)
+        assert await first.acquire_leadership(db_session)
+
+    async def test_expired_lease_is_taken_over(self, db_session: AsyncSession):
+        """Test failover once the leader stops renewing."""
+        first = ComputationScheduler(instance_id="replica-1")
+        second = ComputationScheduler(instance_id="replica-2")
+        assert await first.acquire_leadership(db_session)
+
+        lease = await db_session.get(SchedulerLease, "computation-scheduler")
+        lease.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        await db_session.commit()
+
+        assert await second.acquire_leadership(db_session)
+        assert not await first.acquire_leadership(db_session)
+
+    async def test_release_hands_over_immediately(self, db_session: AsyncSession):
+        """Test that a stopping leader frees the lease."""
+        first = ComputationScheduler(instance_id="replica-1")
+        second = ComputationScheduler(instance_id="replica-2")
+        assert await first.acquire_leadership(db_session)
+
+        await first.release_leadership(db_session)
+
+        assert await second.acquire_leadership(db_session)
+
+
+@pytest.mark.asyncio
+class TestEnqueueDue:
+    """Test suite for enqueueing due computations."""
+
+    def make_computation(self, name: str, next_run_at: datetime) -> FeatureComputation:
+        return FeatureComputation(
+            feature_id=uuid.uuid4(),
+            version_id=uuid.uuid4(),
+            job_type=JobType.BATCH,
+            compute_engine=ComputeEngine.PYTHON,
+            schedule="0 * * * *",
+            next_run_at=next_run_at,
+            is_active=True,
+            config={"name": name},
+            organization_id="test-org"
+        )
+
+    async def test_duplicate_run_does_not_block_batch(self, db_session: AsyncSession):
+        """Test that a fire that was already enqueued is skipped while the rest of the batch commits."""
+        hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        colliding = self.make_computation("colliding", hour - timedelta(hours=1))
+        other = self.make_computation("other", hour)
+        db_session.add_all([colliding, other])
+        await db_session.flush()
+        db_session.add(ComputationJob(
+            computation_id=colliding.id,
+            job_id=f"scheduled-{colliding.id}-{hour:%Y%m%dT%H%M}",
+            job_name="Already enqueued",
+            organization_id="test-org"
+        ))
+        await db_session.commit()
+
+        enqueued = await ComputationScheduler(catchup_policy="latest")._enqueue_due(db_session)
+
+        await db_session.refresh(colliding)
+        await db_session.refresh(other)
+        assert enqueued == 1
+        assert colliding.next_run_at > hour
+        assert other.next_run_at > hour
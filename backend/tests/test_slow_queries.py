@@ -0,0 +1,101 @@
+import time
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from api.config import settings
+from api.database import SlowQueryLog, fingerprint
+
+
+class FakeDialect:
+    def __init__(self, name):
+        self.name = name
+
+
+class FakeEngine:
+    def __init__(self, name="postgresql"):
+        self.dialect = FakeDialect(name)
+
+
+class TestFingerprint:
+    """Test suite for statement fingerprints."""
+
+    def test_literals_and_parameters_normalized(self):
+        """Test that statements differing only in values share a fingerprint."""
+        a = fingerprint("SELECT * FROM features WHERE id = $1 AND name = 'a'  AND version > 3")
+        b = fingerprint("SELECT *\n  FROM features WHERE id = $2 AND name = 'it''s' AND version > 10")
+
+        assert a == b == "SELECT * FROM features WHERE id = ? AND name = ? AND version > ?"
+
+    def test_in_lists_collapsed(self):
+        """Test that IN lists of any length share a fingerprint, and casts are kept."""
+        assert fingerprint("SELECT 1 FROM t2 WHERE id IN ($1::UUID, $2::UUID, $3::UUID)") == (
+            fingerprint("SELECT 1 FROM t2 WHERE id IN ($1::UUID)")
+        )
+        assert fingerprint("SELECT a FROM t WHERE id IN (:id_1, :id_2)") == "SELECT a FROM t WHERE id IN (?)"
+
+
+class TestSlowQueryLog:
+    """Test suite for the slow query log."""
+
+    def test_aggregates_by_fingerprint(self):
+        """Test that slow statements are counted per fingerprint, and the log is bounded."""
+        log = SlowQueryLog(threshold_seconds=0.1, max_fingerprints=2, explain_sample_rate=0)
+        log.observe("SELECT * FROM users WHERE id = $1", 0.3)
+        log.observe("SELECT * FROM users WHERE id = $1", 0.5)
+        log.observe("SELECT * FROM roles", 0.2)
+        log.observe("EXPLAIN (ANALYZE) SELECT * FROM roles", 9.0)
+
+        entries = log.snapshot("max")
+        assert [entry["count"] for entry in entries] == [2, 1]
+        assert entries[0]["total_seconds"] == pytest.approx(0.8)
+        assert entries[0]["mean_seconds"] == pytest.approx(0.4)
+
+        log.observe("SELECT * FROM users WHERE id = $1", 0.1)
+        log.observe("SELECT * FROM permissions", 0.2)  # evicts the least recently seen
+        assert [entry["statement"] for entry in log.snapshot("count")] == [
+            "SELECT * FROM users WHERE id = $1", "SELECT * FROM permissions"
+        ]
+
+    def test_explain_sampling(self, monkeypatch):
+        """Test that only PostgreSQL reads are explained, once per interval and within the concurrency cap."""
+        monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN_CONCURRENCY", 1)
+        log = SlowQueryLog(threshold_seconds=0.1, explain_sample_rate=1.0, explain_interval_seconds=60)
+        scheduled = []
+        monkeypatch.setattr(log, "_schedule_explain", lambda stats, *args: scheduled.append(stats.fingerprint))
+        postgres = FakeEngine()
+
+        log.observe("SELECT * FROM users WHERE id = $1", 0.3, (1,), postgres)
+        log.observe("DELETE FROM users WHERE id = $1", 0.3, (1,), postgres)
+        log.observe("SELECT * FROM roles WHERE id = ?", 0.3, (1,), FakeEngine("sqlite"))
+        log.observe("WITH recent AS (SELECT * FROM jobs) SELECT * FROM recent WHERE id = $1", 0.3, (1,), postgres)
+        assert scheduled == [
+            "SELECT * FROM users WHERE id = ?",
+            "WITH recent AS (SELECT * FROM jobs) SELECT * FROM recent WHERE id = ?",
+        ]
+
+        log._explaining.add("SELECT * FROM users WHERE id = ?")
+        log.observe("SELECT * FROM features WHERE id = $1", 0.3, (1,), postgres)
+        assert len(scheduled) == 2  # one EXPLAIN already running
+
+        log._explaining.clear()
+        log.stats["SELECT * FROM users WHERE id = ?"].explained_at = time.time()
+        log.observe("SELECT * FROM users WHERE id = $1", 0.3, (2,), postgres)
+        assert len(scheduled) == 2  # explained within the interval
+
+    @pytest.mark.asyncio
+    async def test_cursor_hooks_record_slow_statements(self):
+        """Test that statements over the threshold are recorded from an engine, and fast ones are not."""
+        engine = create_async_engine("sqlite+aiosqlite://")
+        log = SlowQueryLog(threshold_seconds=0.05, explain_sample_rate=1.0)
+        log.install(engine)
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        assert log.stats == {}
+
+        log.threshold_seconds = 0
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT :value"), {"value": 1})
+        await engine.dispose()
+
+        assert list(log.stats) == ["SELECT ?"]
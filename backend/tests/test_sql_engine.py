@@ -0,0 +1,83 @@
+import pytest
+import pandas as pd
+
+from services.sql_engine import SQLTransformationEngine, referenced_tables
+
+
+@pytest.fixture
+def transactions_csv(tmp_path):
+    """Small CSV data source."""
+    path = tmp_path / "transactions.csv"
+    pd.DataFrame({
+        "user_id": ["u1", "u2", "u1", "u3"],
+        "amount": [10.0, 5.0, 2.5, 7.0],
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+class TestSQLTransformationEngine:
+    """Test suite for the embedded SQL transformation engine."""
+
+    def test_referenced_tables(self):
+        """Test that FROM and JOIN targets are detected once each."""
+        sql = """
+            SELECT t.user_id AS entity_id, SUM(t.amount) AS value
+            FROM transactions t JOIN users u ON u.id = t.user_id
+            LEFT JOIN "transactions" x ON x.user_id = t.user_id
+            GROUP BY t.user_id
+        """
+
+        assert referenced_tables(sql) == ["transactions", "users"]
+
+    def test_table_functions_rejected(self):
+        """Test that queries cannot name table functions in place of their sources."""
+        with pytest.raises(ValueError):
+            referenced_tables("SELECT * FROM read_csv_auto('/etc/passwd')")
+
+    def test_plan_cannot_read_other_files(self, transactions_csv, tmp_path):
+        """Test that a plan only sees its own sources, however the file read is spelled."""
+        secret = tmp_path / "other_org.csv"
+        secret.write_text("entity_id,value\nx,1\n")
+        engine = SQLTransformationEngine()
+        sources = {"transactions": {"path": transactions_csv, "format": "csv"}}
+
+        with pytest.raises(Exception, match="disabled"):
+            engine.get_plan("v1", f"SELECT * FROM transactions, read_csv_auto('{secret}')", sources)
+
+    def test_plan_streams_batches(self, transactions_csv):
+        """Test that results come back in batches of at most batch_rows."""
+        engine = SQLTransformationEngine(batch_rows=2)
+        sql = "SELECT user_id AS entity_id, SUM(amount) AS value FROM transactions GROUP BY user_id ORDER BY user_id"
+        plan = engine.get_plan("v1", sql, {"transactions": {"path": transactions_csv, "format": "csv"}})
+
+        batches = list(plan.batches(2))
+
+        assert all(len(batch) <= 2 for batch in batches)
+        result = pd.concat(batches)
+        assert dict(zip(result["entity_id"], result["value"])) == {"u1": 12.5, "u2": 5.0, "u3": 7.0}
+
+    def test_plans_cached_per_version(self, transactions_csv):
+        """Test that a version's plan is compiled once and evicted by LRU."""
+        engine = SQLTransformationEngine(plan_cache_size=1)
+        sources = {"transactions": {"path": transactions_csv, "format": "csv"}}
+        sql = "SELECT user_id AS entity_id, amount AS value FROM transactions"
+
+        first = engine.get_plan("v1", sql, sources)
+        assert engine.get_plan("v1", sql, sources) is first
+
+        engine.get_plan("v2", sql, sources)
+        assert engine.get_plan("v1", sql, sources) is not first
+
+    def test_changed_source_recompiles(self, transactions_csv):
+        """Test that a plan is rebuilt when its source file changes."""
+        engine = SQLTransformationEngine()
+        sources = {"transactions": {"path": transactions_csv, "format": "csv"}}
+        sql = "SELECT user_id AS entity_id, amount AS value FROM transactions"
+        first = engine.get_plan("v1", sql, sources)
+
+        with open(transactions_csv, "a") as f:
+            f.write("u4,1.0\n")
+        plan = engine.get_plan("v1", sql, sources)
+
+        assert plan is not first
+        assert len(pd.concat(plan.batches(100))) == 5
@@ -0,0 +1,114 @@
+import asyncio
+import uuid
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.computation import ComputationJob, JobStatus
+from services.status_events import StatusBroker, is_terminal, status_broker
+
+
+@pytest.fixture
+def local_broker(monkeypatch):
+    """The shared broker, delivering in-process instead of through Redis."""
+    async def publish(event_data):
+        status_broker.deliver(event_data)
+
+    async def listen():
+        return None
+
+    monkeypatch.setattr(status_broker, "publish", publish)
+    monkeypatch.setattr(status_broker, "_listen", listen)
+    return status_broker
+
+
+class TestStatusBroker:
+    """Test suite for status event fan-out."""
+
+    @pytest.mark.asyncio
+    async def test_fan_out_to_all_subscribers(self):
+        """Test that one event reaches every subscriber of that job, and only them."""
+        broker = StatusBroker(queue_size=10)
+        broker._listen = lambda: asyncio.sleep(0)
+        first = await broker.subscribe("job", "j1")
+        second = await broker.subscribe("job", "j1")
+        other = await broker.subscribe("job", "j2")
+
+        broker.deliver({"type": "job", "id": "j1", "status": "running"})
+
+        assert first.get_nowait()["status"] == "running"
+        assert second.get_nowait()["status"] == "running"
+        assert other.empty()
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_keeps_latest(self):
+        """Test that a full queue drops its oldest event."""
+        broker = StatusBroker(queue_size=2)
+        broker._listen = lambda: asyncio.sleep(0)
+        queue = await broker.subscribe("job", "j1")
+
+        for progress in (10.0, 20.0, 30.0):
+            broker.deliver({"type": "job", "id": "j1", "progress_percentage": progress})
+
+        assert [queue.get_nowait()["progress_percentage"] for _ in range(2)] == [20.0, 30.0]
+
+    def test_terminal_statuses(self):
+        """Test that streams end on completion, failure, cancellation or timeout."""
+        assert is_terminal({"status": "completed"})
+        assert is_terminal({"status": "timeout"})
+        assert not is_terminal({"status": "running"})
+
+
+class TestSessionHooks:
+    """Test suite for publishing committed status changes."""
+
+    @pytest.mark.asyncio
+    async def test_commit_publishes_progress(self, db_session: AsyncSession, local_broker):
+        """Test that committed status and progress changes are published once per commit."""
+        job = ComputationJob(
+            computation_id=uuid.uuid4(),
+            job_id="job-events",
+            job_name="events",
+            status=JobStatus.PENDING,
+            organization_id="org-1"
+        )
+        db_session.add(job)
+        await db_session.commit()
+
+        queue = await local_broker.subscribe("job", str(job.id))
+        try:
+            job.status = JobStatus.RUNNING
+            job.progress_percentage = 50.0
+            await db_session.commit()
+            await asyncio.sleep(0)
+
+            event_data = queue.get_nowait()
+            assert event_data["status"] == "running"
+            assert event_data["progress_percentage"] == 50.0
+            assert queue.empty()
+        finally:
+            local_broker.unsubscribe("job", str(job.id), queue)
+
+    @pytest.mark.asyncio
+    async def test_rollback_publishes_nothing(self, db_session: AsyncSession, local_broker):
+        """Test that changes rolled back after a flush are never published."""
+        job = ComputationJob(
+            computation_id=uuid.uuid4(),
+            job_id="job-rollback",
+            job_name="rollback",
+            status=JobStatus.PENDING,
+            organization_id="org-1"
+        )
+        db_session.add(job)
+        await db_session.commit()
+        job_id = str(job.id)
+
+        queue = await local_broker.subscribe("job", job_id)
+        try:
+            job.status = JobStatus.RUNNING
+            await db_session.flush()
+            await db_session.rollback()
+            await asyncio.sleep(0)
+
+            assert queue.empty()
+        finally:
+            local_broker.unsubscribe("job", job_id, queue)
@@ -0,0 +1,87 @@
+import pytest
+import pandas as pd
+
+from models.computation import FeatureComputation
+from services.udf_runtime import UDFRuntime, load_udf, run_udf_batch, split_batches
+
+SERIES_UDF = """
+def transform(df):
+    return df["amount"] * df["quantity"]
+"""
+
+FRAME_UDF = """
+def transform(df):
+    totals = df.groupby("user_id", sort=True)["amount"].sum()
+    return pd.DataFrame({"entity_id": totals.index, "value": np.round(totals.values, 2)})
+"""
+
+
+@pytest.fixture
+def transactions() -> pd.DataFrame:
+    """Sample transaction rows for UDF tests."""
+    return pd.DataFrame({
+        "user_id": ["u1", "u2", "u1", "u3"],
+        "amount": [10.0, 5.0, 2.5, 7.0],
+        "quantity": [1, 2, 4, 1],
+    })
+
+
+class TestUDFRuntime:
+    """Test suite for the vectorized Python UDF runtime."""
+
+    def test_udf_compiled_once_per_version(self):
+        """Test that the compiled function is reused for the same version."""
+        first = load_udf("v1:abc", SERIES_UDF, "transform")
+
+        assert load_udf("v1:abc", SERIES_UDF, "transform") is first
+
+    def test_missing_function_rejected(self):
+        """Test that sources without the entry point are rejected."""
+        with pytest.raises(ValueError):
+            load_udf("v2:abc", "x = 1", "transform")
+
+    def test_series_output_uses_entity_column(self, transactions: pd.DataFrame):
+        """Test that Series results are paired with the batch's entities."""
+        result, stats = run_udf_batch("v3:abc", SERIES_UDF, "transform", transactions, {"entity_column": "user_id"})
+
+        assert result["entity_id"].tolist() == ["u1", "u2", "u1", "u3"]
+        assert result["value"].tolist() == [10.0, 10.0, 10.0, 7.0]
+        assert stats["input_rows"] == 4
+
+    def test_frame_output(self, transactions: pd.DataFrame):
+        """Test aggregating UDFs that return entity/value frames."""
+        result, _ = run_udf_batch("v4:abc", FRAME_UDF, "transform", transactions, {})
+
+        assert dict(zip(result["entity_id"], result["value"])) == {"u1": 12.5, "u2": 5.0, "u3": 7.0}
+
+    def test_batches_keep_entities_together(self, transactions: pd.DataFrame):
+        """Test that batching never splits an entity across batches."""
+        batches = split_batches(transactions, {"entity_column": "user_id"}, batch_rows=1, min_batches=1)
+
+        seen = {}
+        for index, batch in enumerate(batches):
+            for user_id in batch["user_id"].unique():
+                assert seen.setdefault(user_id, index) == index
+        assert sum(len(b) for b in batches) == 4
+
+    def test_memory_limit_is_the_lower_of_runtime_and_computation(self):
+        """Test that the RSS limit is the runtime cap unless the computation asks for less."""
+        runtime = UDFRuntime(max_workers=1, memory_limit_mb=1024)
+
+        assert runtime.limits(FeatureComputation(memory_gb=None))["memory_bytes"] == 1024 ** 3
+        assert runtime.limits(FeatureComputation(memory_gb=4))["memory_bytes"] == 1024 ** 3
+        assert UDFRuntime(max_workers=1, memory_limit_mb=8192).limits(
+            FeatureComputation(memory_gb=2)
+        )["memory_bytes"] == 2 * 1024 ** 3
+        assert UDFRuntime(max_workers=1, memory_limit_mb=0).limits(
+            FeatureComputation(memory_gb=None)
+        )["memory_bytes"] is None
+
+    @pytest.mark.asyncio
+    async def test_inline_source_path_rejected(self):
+        """Test that UDF input cannot name a file directly, only a data source."""
+        runtime = UDFRuntime(max_workers=1)
+        computation = FeatureComputation(organization_id="test-org")
+
+        with pytest.raises(ValueError, match="input_source"):
+            await runtime.load_frame(None, computation, {"source": {"format": "csv", "path": "/etc/passwd"}})
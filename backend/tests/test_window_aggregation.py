@@ -0,0 +1,151 @@
+import json
+import pytest
+from datetime import datetime
+
+from services.window_aggregation import DistinctAggregate, WindowAggregator, WindowSpec
+
+
+def values(rows):
+    """Map emitted rows to ``{(entity, window end): value}``."""
+    return {(row["entity_id"], row["effective_timestamp"]): row["value"] for row in rows}
+
+
+def at(seconds):
+    return datetime.utcfromtimestamp(seconds)
+
+
+class TestWindowSpec:
+    """Test suite for window geometry."""
+
+    def test_tumbling_slide_equals_size(self):
+        """Test that tumbling windows advance by their size."""
+        window = WindowSpec("tumbling", "1h")
+
+        assert (window.size, window.slide, window.pane) == (3600, 3600, 3600)
+
+    def test_hopping_pane_is_gcd(self):
+        """Test that panes are the greatest common divisor of size and slide."""
+        window = WindowSpec("hopping", 600, 240)
+
+        assert window.pane == 120
+
+    def test_invalid_slide(self):
+        """Test that a slide larger than the window is rejected."""
+        with pytest.raises(ValueError):
+            WindowSpec("hopping", 60, 120)
+
+
+class TestWindowAggregator:
+    """Test suite for incremental windowed aggregation."""
+
+    def test_tumbling_count(self):
+        """Test that tumbling windows emit once the watermark passes their end."""
+        aggregator = WindowAggregator(WindowSpec("tumbling", 60), "count")
+
+        emitted = aggregator.process(
+            [{"user": "u1", "ts": 5}, {"user": "u1", "ts": 30}, {"user": "u2", "ts": 50}, {"user": "u1", "ts": 70}],
+            "user", "ts"
+        )
+
+        assert values(emitted) == {("u1", at(60)): 2, ("u2", at(60)): 1}
+
+    def test_sliding_sum_resets_after_data_leaves(self):
+        """Test that a sliding window reports 0 once an entity's events age out."""
+        aggregator = WindowAggregator(WindowSpec("sliding", 60, 30), "sum")
+        aggregator.process([{"user": "u1", "ts": 10, "amount": 4.0}], "user", "ts", "amount")
+
+        emitted = aggregator.advance(200)
+
+        assert values(emitted) == {("u1", at(30)): 4.0, ("u1", at(60)): 4.0, ("u1", at(90)): 0.0}
+        assert aggregator.advance(300) == []
+
+    def test_late_event_reemits_window(self):
+        """Test that an event within the allowed lateness corrects an emitted window."""
+        aggregator = WindowAggregator(WindowSpec("tumbling", 60), "sum", allowed_lateness=120)
+        aggregator.process([{"user": "u1", "ts": 10, "amount": 1.0}, {"user": "u1", "ts": 100, "amount": 1.0}],
+                           "user", "ts", "amount")
+
+        emitted = aggregator.process([{"user": "u1", "ts": 20, "amount": 2.0}], "user", "ts", "amount")
+
+        assert values(emitted) == {("u1", at(60)): 3.0}
+        assert aggregator.late_events == 0
+
+    def test_too_late_event_dropped(self):
+        """Test that events beyond the allowed lateness are dropped and counted."""
+        aggregator = WindowAggregator(WindowSpec("tumbling", 60), "count", allowed_lateness=30)
+        aggregator.process([{"user": "u1", "ts": 500}], "user", "ts")
+
+        emitted = aggregator.process([{"user": "u1", "ts": 10}], "user", "ts")
+
+        assert emitted == []
+        assert aggregator.late_events == 1
+
+    def test_out_of_orderness_delays_emission(self):
+        """Test that the watermark trails the newest event by the configured bound."""
+        aggregator = WindowAggregator(WindowSpec("tumbling", 60), "count", max_out_of_orderness=30)
+
+        assert aggregator.process([{"user": "u1", "ts": 10}, {"user": "u1", "ts": 80}], "user", "ts") == []
+        assert values(aggregator.process([{"user": "u1", "ts": 95}], "user", "ts")) == {("u1", at(60)): 1}
+
+    def test_state_is_evicted(self):
+        """Test that panes no window can use are dropped."""
+        aggregator = WindowAggregator(WindowSpec("tumbling", 60), "count")
+        aggregator.process([{"user": "u1", "ts": 10}], "user", "ts")
+
+        aggregator.advance(1000)
+
+        assert aggregator.panes == {}
+        assert aggregator.last_emitted == {}
+
+    def test_idle_stream_closes_last_window(self):
+        """Test that the watermark follows the clock once the stream is idle."""
+        aggregator = WindowAggregator(WindowSpec("tumbling", 60), "count", idle_timeout=30)
+        aggregator.process([{"user": "u1", "ts": 10}], "user", "ts")
+        last_event_at = aggregator.last_event_at
+
+        assert aggregator.advance(now=last_event_at + 60) == []
+        assert values(aggregator.advance(now=last_event_at + 90)) == {("u1", at(60)): 1}
+
+    def test_advance_only_visits_due_windows(self):
+        """Test that advancing pops only the windows that closed."""
+        aggregator = WindowAggregator(WindowSpec("tumbling", 60), "count")
+        events = [{"user": f"u{i}", "ts": 10} for i in range(100)] + [{"user": "u0", "ts": 500}]
+        aggregator.process(events, "user", "ts")
+        aggregator.advance(130)
+        due = len(aggregator._due)
+
+        assert aggregator.advance(140) == []
+        assert len(aggregator._due) == due
+
+    def test_snapshot_round_trip(self):
+        """Test that restored state continues exactly where the snapshot left off."""
+        events = [{"user": "u1", "ts": t, "id": f"d{t % 7}"} for t in range(0, 120, 5)]
+        original = WindowAggregator(WindowSpec("hopping", 60, 30), "approx_distinct")
+        original.process(events[:12], "user", "ts", "id")
+
+        restored = WindowAggregator(WindowSpec("hopping", 60, 30), "approx_distinct")
+        restored.restore(json.loads(json.dumps(original.snapshot())))
+
+        assert restored.process(events[12:], "user", "ts", "id") == original.process(events[12:], "user", "ts", "id")
+
+
+class TestDistinctAggregate:
+    """Test suite for the HyperLogLog distinct count."""
+
+    def test_estimate_within_error(self):
+        """Test that the estimate is within a few standard errors."""
+        aggregate = DistinctAggregate()
+        for value in range(50000):
+            aggregate.add(value)
+
+        assert abs(aggregate.result() - 50000) / 50000 < 0.05
+
+    def test_merge_is_union(self):
+        """Test that merging sketches counts overlapping values once."""
+        left, right = DistinctAggregate(), DistinctAggregate()
+        for value in range(1000):
+            left.add(value)
+            right.add(value + 500)
+        left.merge(right)
+
+        assert abs(left.result() - 1500) / 1500 < 0.05
@@ -0,0 +1,47 @@
+import pytest
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+import services.task_handlers as task_handlers
+from models.computation import ComputationTask, JobStatus
+from services.job_queue import JobQueue
+from services.status_events import status_broker
+from services.worker import ComputationWorker
+
+
+@pytest.mark.asyncio
+class TestComputationWorker:
+    """Test suite for running leased tasks."""
+
+    async def test_failing_handler_releases_task_for_retry(self, db_session: AsyncSession, monkeypatch):
+        """Test that a handler that rolls back and raises records the failure and backs off."""
+        async def failing(db, task):
+            await db.rollback()  # as run_computation_job does before re-raising
+            raise RuntimeError("boom")
+
+        events = []
+
+        async def publish(event_data):
+            events.append(event_data)
+
+        monkeypatch.setitem(task_handlers.TASK_HANDLERS, "failing", failing)
+        monkeypatch.setattr(status_broker, "publish", publish)
+        queue = JobQueue(max_attempts=3, retry_backoff_seconds=60)
+        await queue.enqueue(db_session, ComputationTask(
+            name="Failing", task_type="failing", config={}, organization_id="test-org"
+        ))
+        task = (await queue.lease(db_session, "w1"))[0]
+        worker = ComputationWorker(
+            worker_id="w1",
+            queue=queue,
+            session_factory=async_sessionmaker(db_session.bind, expire_on_commit=False)
+        )
+
+        await worker._process(task)
+
+        await db_session.refresh(task)
+        assert task.status == JobStatus.PENDING
+        assert task.lease_owner is None
+        assert task.error_message == "boom"
+        assert task.available_at > datetime.utcnow()
+        assert (events[-1]["status"], events[-1]["error_message"]) == ("pending", "boom")